@@ -6,10 +6,12 @@ from .data.server import *
 from .data.member import *
 
 from .autoexec import *
+from .banlist import *
 from .bot import *
 from .const import *
 from .extension import *
 from .listener import *
+from .migrations import *
 from .mizfile import *
 from .plugin import *
 from .utils import *
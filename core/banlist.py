@@ -0,0 +1,304 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import json
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import select
+import threading
+import uuid
+from contextlib import closing
+from core.data.const import Status
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from core import DCSServerBot, Server
+
+
+class BanList:
+    """
+    In-memory index of all active bans.
+    It is loaded once on startup and kept current by the database notifications that are sent on every change
+    of the bans table, no matter which node did the change. Expired bans are removed by a timer.
+    Every change increases the revision of the ban list, so that DCS servers only receive the changes since the
+    revision they have already applied. A new version is created whenever the whole list has been reloaded.
+    Servers confirm an update after they have received all of its messages, unconfirmed updates are sent again.
+    """
+    # maximum size of an UDP message, LuaSocket receives at most 8 KB per datagram
+    MAX_MESSAGE_SIZE = 6000
+    # seconds to wait for a server to report the applied ban list, before the update is sent again
+    ACK_TIMEOUT = 10
+    MAX_RETRIES = 3
+    # maximum number of changes to keep for delta updates
+    MAX_CHANGES = 10000
+
+    def __init__(self, bot: DCSServerBot):
+        self.bot = bot
+        self.log = bot.log
+        self.pool = bot.pool
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.bans: dict[str, dict] = dict()
+        self._expiry: list[tuple[datetime, str]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stopped = threading.Event()
+        self.version: str = uuid.uuid4().hex[:8]
+        self.revision: int = 0
+        self._changes: list[tuple[int, str, Optional[dict]]] = []
+        # ban list revision that each server has reported as applied
+        self.revisions: dict[str, int] = dict()
+        self._retries: dict[str, int] = dict()
+        self._pending: Optional[asyncio.TimerHandle] = None
+
+    def __contains__(self, ucid: str) -> bool:
+        return self.is_banned(ucid)
+
+    def is_banned(self, ucid: str) -> bool:
+        ban = self.bans.get(ucid)
+        return ban is not None and ban['banned_until'] >= datetime.now()
+
+    def get(self, ucid: str) -> Optional[dict]:
+        return self.bans.get(ucid) if self.is_banned(ucid) else None
+
+    def all(self) -> list[dict]:
+        now = datetime.now()
+        return [ban for ban in self.bans.values() if ban['banned_until'] >= now]
+
+    def read(self) -> Optional[dict[str, dict]]:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
+                cursor.execute('SELECT ucid, banned_by, reason, banned_until FROM bans WHERE banned_until >= NOW()')
+                return {row['ucid']: dict(row) for row in cursor.fetchall()}
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            return None
+        finally:
+            self.pool.putconn(conn)
+
+    def _apply(self, bans: Optional[dict[str, dict]]) -> None:
+        if bans is None:
+            return
+        self.bans = bans
+        self.version = uuid.uuid4().hex[:8]
+        self.revision = 0
+        self._changes.clear()
+        self.revisions.clear()
+        self._changed()
+        self._expiry = [(ban['banned_until'], ucid) for ucid, ban in bans.items()
+                        if ban['banned_until'].year != 9999]
+        heapq.heapify(self._expiry)
+        self._schedule()
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._apply(await asyncio.to_thread(self.read))
+        # the listener blocks its thread for the whole runtime, so it does not use a worker of the executor
+        threading.Thread(target=self._listen, name='BanListener', daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._timer:
+            self._timer.cancel()
+        if self._pending:
+            self._pending.cancel()
+
+    def add(self, ucid: str, banned_by: str, reason: str, banned_until: datetime) -> None:
+        self.bans[ucid] = {
+            "ucid": ucid,
+            "banned_by": banned_by,
+            "reason": reason,
+            "banned_until": banned_until
+        }
+        self._record(ucid, self.bans[ucid])
+        if banned_until.year != 9999:
+            heapq.heappush(self._expiry, (banned_until, ucid))
+            self._schedule()
+
+    def remove(self, ucid: str) -> None:
+        # expiry entries of removed bans are skipped when they are due
+        if self.bans.pop(ucid, None):
+            self._record(ucid, None)
+
+    def _record(self, ucid: str, ban: Optional[dict]) -> None:
+        self.revision += 1
+        self._changes.append((self.revision, ucid, ban))
+        if len(self._changes) > self.MAX_CHANGES:
+            del self._changes[:len(self._changes) - self.MAX_CHANGES]
+        self._changed()
+
+    def _changed(self) -> None:
+        # changes are collected for a second to send them in as few messages as possible
+        if self.loop and not self._pending:
+            self._pending = self.loop.call_later(1, self._sync_all)
+
+    def _sync_all(self) -> None:
+        self._pending = None
+        for server in self.bot.servers.values():
+            if server.status in [Status.PAUSED, Status.RUNNING, Status.STOPPED]:
+                self.sync(server)
+        # changes that all servers have received are not needed anymore
+        if self.revisions:
+            revision = min(self.revisions.values())
+            self._changes = [x for x in self._changes if x[0] > revision]
+
+    @staticmethod
+    def _format(ban: dict) -> dict:
+        if ban['banned_until'].year == 9999:
+            until = 'never'
+        else:
+            until = ban['banned_until'].astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M') + ' (UTC)'
+        return {
+            "ucid": ban['ucid'],
+            "reason": ban['reason'] or 'n/a',
+            "banned_until": until
+        }
+
+    def _batches(self, bans: list[dict], unbans: list[str]) -> list[tuple[list[dict], list[str]]]:
+        # the batches are built by the size of the encoded entries, so that every message fits into one datagram
+        batches = []
+        batch_bans, batch_unbans, size = [], [], 0
+        for entry in bans + unbans:
+            length = len(json.dumps(entry)) + 2
+            if (batch_bans or batch_unbans) and size + length > self.MAX_MESSAGE_SIZE:
+                batches.append((batch_bans, batch_unbans))
+                batch_bans, batch_unbans, size = [], [], 0
+            if isinstance(entry, dict):
+                batch_bans.append(entry)
+            else:
+                batch_unbans.append(entry)
+            size += length
+        batches.append((batch_bans, batch_unbans))
+        return batches
+
+    def sync(self, server: Server, version: Optional[str] = None, revision: Optional[int] = None) -> None:
+        # the server reported the ban list it has applied (on registration)
+        if version is not None:
+            self.revisions[server.name] = revision if version == self.version else -1
+            self._retries.pop(server.name, None)
+        applied = self.revisions.get(server.name, -1)
+        if applied == self.revision:
+            return
+        oldest = self._changes[0][0] if self._changes else self.revision + 1
+        if 0 <= applied and applied >= oldest - 1:
+            # only send the latest state of each changed ban
+            delta: dict[str, Optional[dict]] = {ucid: ban for rev, ucid, ban in self._changes if rev > applied}
+            bans = [self._format(ban) for ban in delta.values() if ban]
+            unbans = [ucid for ucid, ban in delta.items() if not ban]
+            full = False
+        else:
+            bans = [self._format(ban) for ban in self.all()]
+            unbans = []
+            full = True
+        batches = self._batches(bans, unbans)
+        for i, (batch_bans, batch_unbans) in enumerate(batches):
+            server.sendtoDCS({
+                "command": "updateBans",
+                "version": self.version,
+                "revision": self.revision,
+                "full": full,
+                "batch": i,
+                "batches": len(batches),
+                "bans": batch_bans,
+                "unbans": batch_unbans
+            })
+        # the revision counts as applied, when the server has reported it
+        if self.loop:
+            self.loop.call_later(self.ACK_TIMEOUT, self._check_applied, server, self.version, self.revision)
+
+    def applied(self, server: Server, version: str, revision: int) -> None:
+        # reported by the server after all batches of an update were received
+        if version == self.version and revision > self.revisions.get(server.name, -1):
+            self.revisions[server.name] = revision
+            self._retries.pop(server.name, None)
+
+    def _check_applied(self, server: Server, version: str, revision: int) -> None:
+        if version != self.version or self.revisions.get(server.name, -1) >= revision or \
+                server.status not in [Status.PAUSED, Status.RUNNING, Status.STOPPED]:
+            return
+        retries = self._retries.get(server.name, 0)
+        if retries >= self.MAX_RETRIES:
+            self.log.warning(f'Server "{server.name}" did not confirm the ban list update, giving up.')
+            return
+        self._retries[server.name] = retries + 1
+        # lost or truncated messages, send the update again
+        self.sync(server)
+
+    def _schedule(self) -> None:
+        if not self.loop:
+            return
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._expiry:
+            delay = (self._expiry[0][0] - datetime.now()).total_seconds()
+            self._timer = self.loop.call_later(max(delay, 0), self._expire)
+
+    def _expire(self) -> None:
+        self._timer = None
+        now = datetime.now()
+        expired = []
+        while self._expiry and self._expiry[0][0] < now:
+            until, ucid = heapq.heappop(self._expiry)
+            ban = self.bans.get(ucid)
+            # the ban might have been removed or changed in the meantime
+            if ban and ban['banned_until'] == until:
+                del self.bans[ucid]
+                expired.append(ucid)
+        for ucid in expired:
+            self._record(ucid, None)
+            for server in self.bot.servers.values():
+                player = server.get_player(ucid=ucid)
+                if player:
+                    player.banned = False
+        if expired and self.bot.master:
+            self.loop.create_task(asyncio.to_thread(self._delete, expired))
+        self._schedule()
+
+    def _delete(self, ucids: list[str]) -> None:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('DELETE FROM bans WHERE ucid = ANY(%s) AND banned_until < NOW()', (ucids, ))
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
+
+    def _notify(self, data: dict) -> None:
+        if data['op'] == 'DELETE':
+            self.remove(data['ucid'])
+        else:
+            self.add(data['ucid'], data['banned_by'], data['reason'], self._parse_time(data['banned_until']))
+
+    @staticmethod
+    def _parse_time(value: str) -> datetime:
+        # older triggers sent the timestamp as it was, with a variable number of fractional digits
+        try:
+            return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+        except ValueError:
+            return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                with closing(psycopg2.connect(self.bot.config['BOT']['DATABASE_URL'], sslmode='allow')) as conn:
+                    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                    with closing(conn.cursor()) as cursor:
+                        cursor.execute('LISTEN bans')
+                    while not self._stopped.is_set():
+                        if select.select([conn], [], [], 5) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            notify = conn.notifies.pop(0)
+                            self.loop.call_soon_threadsafe(self._notify, json.loads(notify.payload))
+            except (Exception, psycopg2.DatabaseError) as error:
+                self.log.exception(error)
+                if self._stopped.wait(10):
+                    break
+                # we might have missed notifications in between
+                self.loop.call_soon_threadsafe(self._apply, self.read())
@@ -2,6 +2,7 @@ import asyncio
 import concurrent
 import discord
 import json
+import os
 import platform
 import psycopg2
 import re
@@ -15,6 +16,7 @@ from discord.ext import commands
 from queue import Queue
 from socketserver import BaseRequestHandler, ThreadingUDPServer
 from typing import Callable, Optional, Tuple, Union
+from .banlist import BanList
 from .listener import EventListener
 
 
@@ -33,6 +35,7 @@ class DCSServerBot(commands.Bot):
         self.pool = kwargs['pool']
         self.log = kwargs['log']
         self.config = kwargs['config']
+        self.timer: utils.PhaseTimer = kwargs.get('timer') or utils.PhaseTimer()
         self.master: bool = self.config.getboolean('BOT', 'MASTER')
         self.master_only: bool = self.config.getboolean('BOT', 'MASTER_ONLY')
         plugins: str = self.config['BOT']['PLUGINS']
@@ -50,6 +53,7 @@ class DCSServerBot(commands.Bot):
         self.synced: bool = not self.master
         self.tree.on_error = self.on_app_command_error
         self.executor = ThreadPoolExecutor(thread_name_prefix='BotExecutor', max_workers=20)
+        self.bans: BanList = BanList(self)
 
     async def close(self):
         await self.audit(message="DCSServerBot stopped.")
@@ -60,6 +64,7 @@ class DCSServerBot(commands.Bot):
             self.log.debug("- All messages processed.")
             self.udp_server.server_close()
         self.log.debug('- Listener stopped.')
+        self.bans.stop()
         self.executor.shutdown(wait=True)
         self.log.debug('- Executor stopped.')
         self.log.info('- Unloading Plugins ...')
@@ -202,21 +207,30 @@ class DCSServerBot(commands.Bot):
                 self.member = self.guilds[0].get_member(self.user.id)
                 self.external_ip = await utils.get_external_ip() if 'PUBLIC_IP' not in self.config['BOT'] else self.config['BOT']['PUBLIC_IP']
                 self.log.info('- Checking Roles & Channels ...')
-                self.check_roles(['Admin', 'DCS Admin', 'DCS', 'GameMaster'])
-                for server in self.servers.values():
-                    if self.config.getboolean(server.installation, 'COALITIONS'):
-                        self.check_roles(['Coalition Red', 'Coalition Blue'], server)
-                    self.check_channels(server.installation)
+                with self.timer.measure('roles & channels'):
+                    self.check_roles(['Admin', 'DCS Admin', 'DCS', 'GameMaster'])
+                    for server in self.servers.values():
+                        if self.config.getboolean(server.installation, 'COALITIONS'):
+                            self.check_roles(['Coalition Red', 'Coalition Blue'], server)
+                        self.check_channels(server.installation)
                 self.log.info('- Loading Plugins ...')
-                for plugin in self.plugins:
-                    if not await self.load_plugin(plugin.lower()):
-                        self.log.info(f'  => {plugin.title()} NOT loaded.')
+                plugins = utils.PhaseTimer()
+                with self.timer.measure('plugins'):
+                    for plugin in self.plugins:
+                        with plugins.measure(plugin.lower()):
+                            if not await self.load_plugin(plugin.lower()):
+                                self.log.info(f'  => {plugin.title()} NOT loaded.')
+                    # the bans table is created by the admin plugin, so load the bans afterwards
+                    await self.bans.start()
+                    self.remove_plugin_luas()
                 if not self.synced:
                     self.log.info('- Registering Discord Commands (this might take a bit) ...')
-                    self.tree.copy_global_to(guild=self.guilds[0])
-                    await self.tree.sync(guild=self.guilds[0])
+                    with self.timer.measure('commands'):
+                        self.tree.copy_global_to(guild=self.guilds[0])
+                        await self.tree.sync(guild=self.guilds[0])
                     self.synced = True
                     self.log.info('- Discord Commands registered.')
+                self.report_startup(plugins)
                 if 'DISCORD_STATUS' in self.config['BOT']:
                     await self.change_presence(activity=discord.Game(name=self.config['BOT']['DISCORD_STATUS']))
                 # start the UDP listener to accept commands from DCS
@@ -229,6 +243,20 @@ class DCSServerBot(commands.Bot):
         except Exception as ex:
             self.log.exception(ex)
 
+    def remove_plugin_luas(self):
+        # luas of plugins that were removed from the configuration or failed to load
+        plugins = [x.plugin_name for x in self.cogs.values() if hasattr(x, 'plugin_name')]
+        for dcs_home in {os.path.expandvars(self.config[x.installation]['DCS_HOME']) for x in self.servers.values()}:
+            for plugin in utils.remove_plugin_luas(dcs_home, plugins):
+                self.log.info(f'  => Luas of plugin {plugin.title()} removed from {dcs_home}.')
+
+    def report_startup(self, plugins: utils.PhaseTimer):
+        # the remaining time was mainly spent connecting to Discord
+        other = self.timer.total - sum(self.timer.phases.values())
+        self.log.info(f'- Startup took {self.timer.total:.1f}s ({self.timer}, discord & other {other:.1f}s).')
+        slowest = sorted(plugins.phases.items(), key=lambda x: x[1], reverse=True)
+        self.log.info('  => Plugins: ' + ', '.join(f'{plugin} {duration:.1f}s' for plugin, duration in slowest))
+
     async def on_command_error(self, ctx: commands.Context, err: Exception):
         if isinstance(err, commands.CommandInvokeError):
             err = err.original
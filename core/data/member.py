@@ -17,17 +17,10 @@ class Member(DataObject):
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
-                cursor.execute("""
-                    SELECT p.ucid, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS banned, manual 
-                    FROM players p LEFT OUTER JOIN bans b ON p.ucid = b.ucid 
-                    WHERE p.discord_id = %s AND COALESCE(b.banned_until, NOW()) >= NOW()
-                """, (self.member.id, ))
-                banned = False
+                cursor.execute('SELECT ucid, manual FROM players WHERE discord_id = %s', (self.member.id, ))
                 for row in cursor.fetchall():
-                    self.ucids[row[0]] = row[2]
-                    if row[1] is True:
-                        banned = True
-                self.banned = banned
+                    self.ucids[row[0]] = row[1]
+                self.banned = any(self.bot.bans.is_banned(ucid) for ucid in self.ucids.keys())
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
         finally:
@@ -43,21 +43,19 @@ class Player(DataObject):
         try:
             with closing(conn.cursor()) as cursor:
                 cursor.execute("""
-                    SELECT p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS banned, 
-                           p.manual, c.coalition 
-                    FROM players p LEFT OUTER JOIN bans b ON p.ucid = b.ucid 
-                    LEFT OUTER JOIN coalitions c ON p.ucid = c.player_ucid 
-                    WHERE p.ucid = %s AND COALESCE(b.banned_until, NOW()) >= NOW()
+                    SELECT p.discord_id, p.manual, c.coalition 
+                    FROM players p LEFT OUTER JOIN coalitions c ON p.ucid = c.player_ucid 
+                    WHERE p.ucid = %s
                 """, (self.ucid, ))
                 # existing member found?
                 if cursor.rowcount == 1:
                     row = cursor.fetchone()
                     if row[0] != -1:
                         self.member = self._member = self.bot.guilds[0].get_member(row[0])
-                        self._verified = row[2]
-                    self.banned = row[1]
-                    if row[3]:
-                        self.coalition = Coalition.RED if row[3] == 'red' else Coalition.BLUE
+                        self._verified = row[1]
+                    if row[2]:
+                        self.coalition = Coalition.RED if row[2] == 'red' else Coalition.BLUE
+                self.banned = self.bot.bans.is_banned(self.ucid)
                 cursor.execute(
                     'INSERT INTO players (ucid, discord_id, name, last_seen) VALUES (%s, -1, %s, NOW()) ON '
                     'CONFLICT (ucid) DO UPDATE SET name=excluded.name, last_seen=excluded.last_seen',
@@ -45,6 +45,11 @@ class Extension(ABC):
     def is_running(self) -> bool:
         return True
 
+    @property
+    def standalone(self) -> bool:
+        # external programs that do not need a running DCS server are started before it
+        return False
+
     @property
     def name(self) -> str:
         return type(self).__name__
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import glob
+import hashlib
+import os
+import psycopg2
+import re
+import threading
+from contextlib import closing
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from logging import Logger
+    from psycopg2.pool import ThreadedConnectionPool
+
+MIGRATIONS_DDL = 'CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, checksum TEXT NOT NULL, ' \
+                 'applied TIMESTAMP NOT NULL DEFAULT NOW())'
+
+
+def init_migrations(cursor) -> None:
+    # databases from before v1.7 don't have the table yet
+    cursor.execute(MIGRATIONS_DDL)
+
+
+def get_migration_name(filename: str) -> str:
+    return os.path.relpath(filename).replace('\\', '/')
+
+
+def get_applied_migrations(cursor) -> dict[str, str]:
+    cursor.execute('SELECT name, checksum FROM migrations')
+    return {x[0]: x[1] for x in cursor.fetchall()}
+
+
+def get_checksum(script: str) -> str:
+    return hashlib.sha256(script.encode('utf-8')).hexdigest()
+
+
+def check_migrations(log: Logger, applied: dict[str, str], directory: str) -> None:
+    # tables.sql always holds the latest schema, so only the update and background scripts must not change
+    files = glob.glob(os.path.join(directory, 'update_*.sql')) + glob.glob(os.path.join(directory, 'background_*.sql'))
+    for filename in sorted(files):
+        name = get_migration_name(filename)
+        if name not in applied:
+            continue
+        with open(filename, encoding='utf-8') as file:
+            if get_checksum(file.read()) != applied[name]:
+                log.warning(f'Migration {name} has been changed after it was applied, the changes will not be '
+                            f'applied to your database!')
+
+
+def drop_invalid_indexes(cursor, log: Logger, script: str) -> None:
+    # a failed CREATE INDEX CONCURRENTLY leaves an invalid index behind, that IF NOT EXISTS would not rebuild
+    names = re.findall(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', script,
+                       re.IGNORECASE)
+    if not names:
+        return
+    cursor.execute('SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+                   'WHERE NOT i.indisvalid AND c.relname = ANY(%s)', ([x.lower() for x in names], ))
+    for index in [x[0] for x in cursor.fetchall()]:
+        log.warning(f'  => Dropping invalid index {index} to rebuild it ...')
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index}')
+
+
+def run_migration(cursor, filename: str) -> None:
+    """
+    Executes a migration script as a whole and records it together with the checksum of its content. The caller
+    commits the transaction, so that a failing script does not leave anything behind.
+    """
+    with open(filename, encoding='utf-8') as file:
+        script = file.read()
+    cursor.execute(script)
+    cursor.execute('INSERT INTO migrations (name, checksum) VALUES (%s, %s) ON CONFLICT (name) DO UPDATE SET '
+                   'checksum = excluded.checksum, applied = NOW()',
+                   (get_migration_name(filename), get_checksum(script)))
+
+
+def _run_background_migrations(pool: ThreadedConnectionPool, log: Logger, directory: str) -> None:
+    conn = pool.getconn()
+    try:
+        # statements like CREATE INDEX CONCURRENTLY can't run inside a transaction
+        conn.autocommit = True
+        with closing(conn.cursor()) as cursor:
+            applied = get_applied_migrations(cursor)
+            check_migrations(log, applied, directory)
+            for filename in sorted(glob.glob(os.path.join(directory, 'background_*.sql'))):
+                name = get_migration_name(filename)
+                if name in applied:
+                    continue
+                log.info(f'  => Running background migration {name} ...')
+                with open(filename, encoding='utf-8') as file:
+                    script = file.read()
+                drop_invalid_indexes(cursor, log, script)
+                for query in script.splitlines():
+                    if query.strip() and not query.strip().startswith('--'):
+                        log.debug(query.rstrip())
+                        cursor.execute(query.rstrip())
+                cursor.execute('INSERT INTO migrations (name, checksum) VALUES (%s, %s) ON CONFLICT (name) DO NOTHING',
+                               (name, get_checksum(script)))
+                log.info(f'  => Background migration {name} done.')
+    except (Exception, psycopg2.DatabaseError) as error:
+        # not recorded, so it will be retried on the next start
+        log.exception(error)
+    finally:
+        conn.autocommit = False
+        pool.putconn(conn)
+
+
+def start_background_migrations(pool: ThreadedConnectionPool, log: Logger, directory: str) -> None:
+    """
+    Runs all background_*.sql scripts of a directory that were not applied yet in a separate thread, in the order of
+    their names. Their statements are executed one by one outside of a transaction, so they have to be idempotent.
+    Invalid indexes left behind by an earlier failed run are dropped first, so that they get rebuilt. Applied
+    scripts that have been changed since are reported.
+    """
+    if glob.glob(os.path.join(directory, '*.sql')):
+        threading.Thread(target=_run_background_migrations, args=(pool, log, directory), daemon=True).start()
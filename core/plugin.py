@@ -9,9 +9,9 @@ from copy import deepcopy
 from core import utils
 from discord.ext import commands
 from os import path
-from shutil import copytree
 from typing import Type, Optional, TYPE_CHECKING, Tuple
 from .listener import TEventListener
+from .migrations import init_migrations, run_migration, start_background_migrations
 
 if TYPE_CHECKING:
     from core import DCSServerBot, Server
@@ -34,10 +34,13 @@ class Plugin(commands.Cog):
         self.eventlistener: Type[TEventListener] = eventlistener(self) if eventlistener else None
 
     async def cog_load(self) -> None:
-        await self.install()
+        timer = utils.PhaseTimer()
+        with timer.measure('install'):
+            await self.install()
         if self.eventlistener:
             self.bot.register_eventListener(self.eventlistener)
         self.log.info(f'  => {self.plugin_name.title()} loaded.')
+        self.log.debug(f'  => {self.plugin_name.title()}: {timer}')
 
     async def cog_unload(self):
         if self.eventlistener:
@@ -99,10 +102,12 @@ class Plugin(commands.Cog):
         for server in self.bot.servers.values():
             source_path = f'./plugins/{self.plugin_name}/lua'
             if path.exists(source_path):
-                target_path = path.expandvars(self.bot.config[server.installation]['DCS_HOME'] +
-                                              f'\\Scripts\\net\\DCSServerBot\\{self.plugin_name}\\')
-                copytree(source_path, target_path, dirs_exist_ok=True)
-                self.log.debug(f'  => Luas installed into {server.installation}')
+                dcs_home = path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
+                changed, removed = utils.install_luas(source_path, dcs_home,
+                                                      f'Scripts\\net\\DCSServerBot\\{self.plugin_name}')
+                if changed or removed:
+                    self.log.debug(f'  => Luas installed into {server.installation} ({len(changed)} updated, '
+                                   f'{len(removed)} removed)')
         # create report directories for convenience
         source_path = f'./plugins/{self.plugin_name}/reports'
         if path.exists(source_path):
@@ -131,10 +136,8 @@ class Plugin(commands.Cog):
                 if cursor.rowcount == 0:
                     tables_file = f'./plugins/{self.plugin_name}/db/tables.sql'
                     if path.exists(tables_file):
-                        with open(tables_file) as tables_sql:
-                            for query in tables_sql.readlines():
-                                self.log.debug(query.rstrip())
-                                cursor.execute(query.rstrip())
+                        init_migrations(cursor)
+                        run_migration(cursor, tables_file)
                     cursor.execute('INSERT INTO plugins (plugin, version) VALUES (%s, %s) ON CONFLICT (plugin) DO '
                                    'NOTHING', (self.plugin_name, self.plugin_version))
                     self.log.info(f'  => {self.plugin_name.title()} installed.')
@@ -143,25 +146,28 @@ class Plugin(commands.Cog):
                     # old variant, to be migrated
                     if installed.startswith('v'):
                         installed = installed[1:]
+                    # the installed version decides which update scripts are pending
                     while installed != self.plugin_version:
                         updates_file = f'./plugins/{self.plugin_name}/db/update_v{installed}.sql'
                         if path.exists(updates_file):
-                            with open(updates_file) as updates_sql:
-                                for query in updates_sql.readlines():
-                                    self.log.debug(query.rstrip())
-                                    cursor.execute(query.rstrip())
+                            init_migrations(cursor)
+                            run_migration(cursor, updates_file)
                         ver, rev = installed.split('.')
                         installed = ver + '.' + str(int(rev) + 1)
                         self.migrate(installed)
+                        # every version step runs in its own transaction
+                        cursor.execute('UPDATE plugins SET version = %s WHERE plugin = %s',
+                                       (installed, self.plugin_name))
+                        conn.commit()
                         self.log.info(f'  => {self.plugin_name.title()} migrated to version {installed}.')
-                    cursor.execute('UPDATE plugins SET version = %s WHERE plugin = %s',
-                                   (self.plugin_version, self.plugin_name))
             conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             conn.rollback()
             self.log.exception(error)
+            return
         finally:
             self.pool.putconn(conn)
+        start_background_migrations(self.pool, self.log, f'./plugins/{self.plugin_name}/db')
 
     def read_locals(self) -> dict:
         if path.exists(f'./config/{self.plugin_name}.json'):
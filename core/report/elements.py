@@ -2,7 +2,6 @@ from __future__ import annotations
 import concurrent
 import discord
 import inspect
-import numpy as np
 import os
 import psycopg2
 import sys
@@ -15,9 +14,11 @@ from core.report.errors import UnknownGraphElement, ClassNotFound, TooManyElemen
 from core.report.utils import parse_params
 from datetime import timedelta
 from discord import ButtonStyle, Interaction
-from matplotlib import pyplot as plt
 from typing import Optional, List, Any, TYPE_CHECKING, Union
 
+np = utils.lazy_import('numpy')
+plt = utils.lazy_import('matplotlib.pyplot')
+
 if TYPE_CHECKING:
     from core import DCSServerBot
 
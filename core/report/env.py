@@ -2,10 +2,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from discord import Embed
 from discord.ui import View
-from matplotlib.figure import Figure
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from matplotlib.figure import Figure
     from core import DCSServerBot
 
 
@@ -1,29 +1,54 @@
 from __future__ import annotations
 import psycopg2
+import time
 from contextlib import closing
-from typing import TYPE_CHECKING, Tuple, Any
+from typing import TYPE_CHECKING, Tuple, Any, Optional
 
 if TYPE_CHECKING:
     from core import Server
 
 
+# running campaign per server: server name => (id, name, expiry of this information as monotonic time)
+_running_campaigns: dict[str, Tuple[Any, Any, float]] = dict()
+# campaigns changed by other nodes are recognized after this amount of seconds
+CAMPAIGN_CACHE_TTL = 300
+
+
 def get_running_campaign(server: Server) -> Tuple[Any, Any]:
+    cached = _running_campaigns.get(server.name)
+    if cached and time.monotonic() < cached[2]:
+        return cached[0], cached[1]
     conn = server.pool.getconn()
     try:
         with closing(conn.cursor()) as cursor:
-            cursor.execute('SELECT id, name FROM campaigns c, campaigns_servers s WHERE c.id = s.campaign_id AND '
-                           's.server_name = %s AND NOW() BETWEEN c.start AND COALESCE(c.stop, NOW())', (server.name,))
+            cursor.execute('SELECT id, name, EXTRACT(EPOCH FROM (c.stop - NOW())) FROM campaigns c, '
+                           'campaigns_servers s WHERE c.id = s.campaign_id AND s.server_name = %s AND NOW() BETWEEN '
+                           'c.start AND COALESCE(c.stop, NOW())', (server.name,))
             if cursor.rowcount == 1:
-                row = cursor.fetchone()
-                return row[0], row[1]
+                campaign_id, name, valid = cursor.fetchone()
             else:
-                return None, None
+                # no campaign running, so the information is valid until the next campaign starts
+                campaign_id = name = None
+                cursor.execute('SELECT EXTRACT(EPOCH FROM (MIN(c.start) - NOW())) FROM campaigns c, '
+                               'campaigns_servers s WHERE c.id = s.campaign_id AND s.server_name = %s AND '
+                               'c.start > NOW()', (server.name,))
+                valid = cursor.fetchone()[0]
+            ttl = min(CAMPAIGN_CACHE_TTL, float(valid)) if valid is not None else CAMPAIGN_CACHE_TTL
+            _running_campaigns[server.name] = (campaign_id, name, time.monotonic() + ttl)
+            return campaign_id, name
     except (Exception, psycopg2.DatabaseError) as error:
         server.log.exception(error)
     finally:
         server.pool.putconn(conn)
 
 
+def invalidate_running_campaigns(server_name: Optional[str] = None) -> None:
+    if server_name:
+        _running_campaigns.pop(server_name, None)
+    else:
+        _running_campaigns.clear()
+
+
 def get_all_campaigns(self) -> list[str]:
     conn = self.pool.getconn()
     try:
@@ -1,6 +1,8 @@
 import aiohttp
 import certifi
+import fnmatch
 import gzip
+import hashlib
 import json
 import luadata
 import math
@@ -19,6 +21,10 @@ REGEXP = {
     'server_name': re.compile(r'\["name"\] = "(?P<server_name>.*)"')
 }
 UPDATER_URL = 'https://www.digitalcombatsimulator.com/gameapi/updater/branch/{}/'
+# hashes of the installed luas, relative to DCS_HOME
+HOOKS_MANIFEST = os.path.join('Scripts', 'net', 'DCSServerBot', 'manifest.json')
+# hashes of the source files by path, size and modification time
+_hashes: dict[tuple[str, int, int], str] = dict()
 
 
 def findDCSInstallations(server_name: Optional[str] = None) -> List[Tuple[str, str]]:
@@ -71,6 +77,108 @@ async def getLatestVersion(branch: str) -> Optional[str]:
     return None
 
 
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while data := file.read(1024 * 1024):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def _source_hash(path: str) -> str:
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        _hashes[key] = _sha256(path)
+    return _hashes[key]
+
+
+def read_hooks_manifest(dcs_home: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(dcs_home, HOOKS_MANIFEST), encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_hooks_manifest(dcs_home: str, manifest: dict) -> None:
+    path = os.path.join(dcs_home, HOOKS_MANIFEST)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def install_luas(source: str, dcs_home: str, target: str,
+                 ignore: Optional[list[str]] = None) -> Tuple[List[str], List[str]]:
+    """
+    Installs the files of the source directory into DCS_HOME/target, but only the ones that differ from the installed
+    ones. The manifest keeps hash, size and modification time of every installed file, so unchanged files only cost a
+    stat call. Files that don't match the manifest anymore are compared by their hash before they get overwritten.
+    Files that were installed from the same source before but are not part of it anymore are removed.
+    Returns the changed and the removed files.
+    """
+    manifest = read_hooks_manifest(dcs_home) or dict()
+    key = target.replace('\\', '/')
+    installed: dict[str, dict] = manifest.get(key, dict())
+    files: dict[str, dict] = dict()
+    changed = []
+    for root, _, filenames in os.walk(source):
+        for filename in filenames:
+            if ignore and any(fnmatch.fnmatch(filename, x) for x in ignore):
+                continue
+            path = os.path.join(root, filename)
+            rel = os.path.relpath(path, source).replace('\\', '/')
+            digest = _source_hash(path)
+            dest = os.path.join(dcs_home, target, rel)
+            entry = installed.get(rel)
+            try:
+                stat = os.stat(dest)
+            except FileNotFoundError:
+                stat = None
+            if not stat or not entry or entry['hash'] != digest or entry['size'] != stat.st_size or \
+                    entry['mtime'] != stat.st_mtime_ns:
+                if not stat or _sha256(dest) != digest:
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    shutil.copy2(path, dest)
+                    changed.append(rel)
+                    stat = os.stat(dest)
+                entry = {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+            files[rel] = entry
+    removed = []
+    for rel in installed.keys() - files.keys():
+        dest = os.path.join(dcs_home, target, rel)
+        if os.path.exists(dest):
+            os.remove(dest)
+            removed.append(rel)
+    if changed or removed or files != installed:
+        manifest[key] = files
+        write_hooks_manifest(dcs_home, manifest)
+    return changed, removed
+
+
+def remove_plugin_luas(dcs_home: str, plugins: list[str]) -> list[str]:
+    """
+    Removes the luas of all plugins that were installed before but are not in the given list of active plugins, as
+    DCS would load them otherwise. Returns the names of the removed plugins.
+    """
+    manifest = read_hooks_manifest(dcs_home)
+    if not manifest:
+        return []
+    prefix = 'Scripts/net/DCSServerBot/'
+    removed = []
+    for key in [x for x in manifest.keys() if x.startswith(prefix)]:
+        plugin = key[len(prefix):]
+        if plugin in plugins:
+            continue
+        shutil.rmtree(os.path.join(dcs_home, 'Scripts', 'net', 'DCSServerBot', plugin), ignore_errors=True)
+        del manifest[key]
+        removed.append(plugin)
+    if removed:
+        write_hooks_manifest(dcs_home, manifest)
+    return removed
+
+
 def desanitize(self, _filename: str = None) -> None:
     # Sanitizing MissionScripting.lua
     if not _filename:
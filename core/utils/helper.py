@@ -1,15 +1,18 @@
 from __future__ import annotations
 import importlib
+import importlib.util
 import json
 import luadata
 import os
 import psycopg2
 import re
 import string
+import time
 import unicodedata
-from contextlib import closing
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta
 from typing import Optional, Union, TYPE_CHECKING, Tuple, Generator
+from . import config
 
 if TYPE_CHECKING:
     from core import Server
@@ -217,21 +220,66 @@ def get_all_players(self, **kwargs) -> list[Tuple[str, str]]:
 
 
 def is_banned(self, ucid: str):
-    conn = self.pool.getconn()
-    try:
-        with closing(conn.cursor()) as cursor:
-            cursor.execute(f"SELECT COUNT(*) FROM bans WHERE ucid = %s AND banned_until >= NOW()", (ucid,))
-            return cursor.fetchone()[0] > 0
-    except (Exception, psycopg2.DatabaseError) as error:
-        self.log.exception(error)
-    finally:
-        self.pool.putconn(conn)
+    return self.bot.bans.is_banned(ucid)
 
 
 def is_ucid(ucid: str) -> bool:
     return len(ucid) == 32 and ucid.isalnum() and ucid == ucid.lower()
 
 
+class LazyModule:
+    """
+    Placeholder for a module that is imported on first access of one of its attributes.
+    """
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, item):
+        if not self.__module:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, item)
+
+
+def lazy_import(name: str):
+    """
+    Imports heavy modules like matplotlib.pyplot or pandas on their first use instead of on bot start.
+    Can be disabled with LAZY_IMPORTS = false in dcsserverbot.ini.
+    """
+    if not config.getboolean('BOT', 'LAZY_IMPORTS'):
+        return importlib.import_module(name)
+    # missing packages are still reported on start
+    if not importlib.util.find_spec(name.split('.')[0]):
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
+
+
+class PhaseTimer:
+    """
+    Measures the duration of the phases of a longer running process like the bot start or a server launch.
+    """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.phases: dict[str, float] = dict()
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[phase] = self.phases.get(phase, 0) + time.monotonic() - start
+
+    @property
+    def total(self) -> float:
+        return time.monotonic() - self.start
+
+    def __str__(self) -> str:
+        return ', '.join(f'{phase} {duration:.1f}s' for phase, duration in self.phases.items())
+
+
 class SettingsDict(dict):
     def __init__(self, server: Server, path: str, root: Optional[str] = None):
         super().__init__()
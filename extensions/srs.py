@@ -94,6 +94,10 @@ class SRS(Extension):
                 self.process = None
         return await super().shutdown(data)
 
+    @property
+    def standalone(self) -> bool:
+        return self.config.get('autostart', True)
+
     def is_running(self) -> bool:
         server_ip = self.locals['Server Settings']['SERVER_IP'] if 'SERVER_IP' in self.locals['Server Settings'] else '127.0.0.1'
         if server_ip == '0.0.0.0':
@@ -37,10 +37,8 @@ class AdminAgent(Plugin):
         self.update_pending = False
         if self.bot.config.getboolean('DCS', 'AUTOUPDATE') is True:
             self.check_for_dcs_update.start()
-        self.check_for_unban.start()
 
     async def cog_unload(self):
-        self.check_for_unban.cancel()
         if self.bot.config.getboolean('DCS', 'AUTOUPDATE') is True:
             self.check_for_dcs_update.cancel()
         await super().cog_unload()
@@ -309,32 +307,12 @@ class AdminAgent(Plugin):
         await msg.delete()
 
     def update_bans(self, data: Optional[dict] = None):
-        banlist = []
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                cursor.execute('SELECT ucid, reason, banned_until FROM bans WHERE banned_until >= NOW()')
-                banlist = [dict(row) for row in cursor.fetchall()]
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
         if data is not None:
             servers = [self.bot.servers[data['server_name']]]
         else:
             servers = self.bot.servers.values()
         for server in servers:
-            for ban in banlist:
-                if ban['banned_until'].year == 9999:
-                    until = 'never'
-                else:
-                    until = ban['banned_until'].astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M') + ' (UTC)'
-                server.sendtoDCS({
-                    "command": "ban",
-                    "ucid": ban['ucid'],
-                    "reason": ban['reason'],
-                    "banned_until": until
-                })
+            self.bot.bans.sync(server)
 
     @commands.command(description='Bans a user by ucid or discord id', usage='<member|ucid> [days] [reason]')
     @utils.has_role('DCS Admin')
@@ -564,34 +542,6 @@ class AdminAgent(Plugin):
     async def before_check(self):
         await self.bot.wait_until_ready()
 
-    @tasks.loop(minutes=1.0)
-    async def check_for_unban(self):
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor()) as cursor:
-                # migrate active bans from the punishment system and migrate them to the new method (fix days only)
-                cursor.execute("""SELECT ucid FROM bans WHERE banned_until < NOW()""")
-                for row in cursor.fetchall():
-                    for server in self.bot.servers.values():
-                        if server.status not in [Status.PAUSED, Status.RUNNING, Status.STOPPED]:
-                            continue
-                        server.sendtoDCS({
-                            "command": "unban",
-                            "ucid": row[0]
-                        })
-                # we need to make sure that every agent got the unban information
-                cursor.execute("DELETE FROM bans WHERE banned_until < (NOW() - interval '1 minutes')")
-            conn.commit()
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
-            conn.rollback()
-        finally:
-            self.pool.putconn(conn)
-
-    @check_for_unban.before_loop
-    async def before_check_unban(self):
-        await self.bot.wait_until_ready()
-
     async def process_message(self, message) -> bool:
         async with aiohttp.ClientSession() as session:
             async with session.get(message.attachments[0].url) as response:
@@ -781,6 +731,8 @@ class AdminMaster(AdminAgent):
                     except psycopg2.errors.UniqueViolation:
                         ctx.send(f'UCID {ucid} was banned already.')
                 conn.commit()
+                for ucid in ucids:
+                    self.bot.bans.add(ucid, ctx.message.author.display_name, reason, until)
                 await super().ban(self, ctx, user, *args)
             if isinstance(user, discord.Member):
                 await ctx.send('Member {} banned.'.format(utils.escape_string(user.display_name)))
@@ -813,6 +765,8 @@ class AdminMaster(AdminAgent):
                 for ucid in ucids:
                     cursor.execute('DELETE FROM bans WHERE ucid = %s', (ucid, ))
                 conn.commit()
+                for ucid in ucids:
+                    self.bot.bans.remove(ucid)
                 await super().unban(self, ctx, user)
             if isinstance(user, discord.Member):
                 await ctx.send('Member {} unbanned.'.format(utils.escape_string(user.display_name)))
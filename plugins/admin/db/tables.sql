@@ -1 +1,3 @@
 CREATE TABLE IF NOT EXISTS bans (ucid TEXT PRIMARY KEY, banned_by TEXT NOT NULL, reason TEXT, banned_at TIMESTAMP NOT NULL DEFAULT NOW(), banned_until TIMESTAMP NOT NULL DEFAULT TO_DATE('99991231','YYYYMMDD'));
+CREATE OR REPLACE FUNCTION bans_notify() RETURNS trigger AS $$ BEGIN IF (TG_OP = 'DELETE') THEN PERFORM pg_notify('bans', json_build_object('op', TG_OP, 'ucid', OLD.ucid)::text); ELSE PERFORM pg_notify('bans', json_build_object('op', TG_OP, 'ucid', NEW.ucid, 'banned_by', NEW.banned_by, 'reason', NEW.reason, 'banned_until', to_char(NEW.banned_until, 'YYYY-MM-DD"T"HH24:MI:SS.US'))::text); END IF; RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE TRIGGER tgr_bans_notify AFTER INSERT OR UPDATE OR DELETE ON bans FOR EACH ROW EXECUTE PROCEDURE bans_notify();
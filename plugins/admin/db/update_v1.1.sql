@@ -0,0 +1,2 @@
+CREATE OR REPLACE FUNCTION bans_notify() RETURNS trigger AS $$ BEGIN IF (TG_OP = 'DELETE') THEN PERFORM pg_notify('bans', json_build_object('op', TG_OP, 'ucid', OLD.ucid)::text); ELSE PERFORM pg_notify('bans', json_build_object('op', TG_OP, 'ucid', NEW.ucid, 'banned_by', NEW.banned_by, 'reason', NEW.reason, 'banned_until', NEW.banned_until)::text); END IF; RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE TRIGGER tgr_bans_notify AFTER INSERT OR UPDATE OR DELETE ON bans FOR EACH ROW EXECUTE PROCEDURE bans_notify();
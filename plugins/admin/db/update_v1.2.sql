@@ -0,0 +1 @@
+CREATE OR REPLACE FUNCTION bans_notify() RETURNS trigger AS $$ BEGIN IF (TG_OP = 'DELETE') THEN PERFORM pg_notify('bans', json_build_object('op', TG_OP, 'ucid', OLD.ucid)::text); ELSE PERFORM pg_notify('bans', json_build_object('op', TG_OP, 'ucid', NEW.ucid, 'banned_by', NEW.banned_by, 'reason', NEW.reason, 'banned_until', to_char(NEW.banned_until, 'YYYY-MM-DD"T"HH24:MI:SS.US'))::text); END IF; RETURN NULL; END; $$ LANGUAGE 'plpgsql';
@@ -9,8 +9,12 @@ class AdminEventListener(EventListener):
 
     @event(name="registerDCSServer")
     async def registerDCSServer(self, server: Server, data: dict) -> None:
-        # upload the current bans to the server
-        self.plugin.update_bans(data)
+        # upload the changes of the ban list since the last registration (or the full list) to the server
+        self.bot.bans.sync(server, data.get('ban_version', ''), int(data.get('ban_revision', -1)))
+
+    @event(name="banListApplied")
+    async def banListApplied(self, server: Server, data: dict) -> None:
+        self.bot.bans.applied(server, data['version'], int(data['revision']))
 
     @event(name="ban")
     async def ban(self, server: Server, data: dict) -> None:
@@ -23,7 +23,7 @@ end
 function dcsbot.ban(json)
     log.write('DCSServerBot', log.DEBUG, 'Admin: ban()')
     banned_until = json.banned_until or 'never'
-    dcsbot.banList[json.ucid] = json.reason .. '.\nExpires ' .. banned_until
+    dcsbot.banList[json.ucid] = (json.reason or 'n/a') .. '.\nExpires ' .. banned_until
     dcsbot.kick(json)
 end
 
@@ -32,6 +32,51 @@ function dcsbot.unban(json)
 	dcsbot.banList[json.ucid] = nil
 end
 
+function dcsbot.updateBans(json)
+    log.write('DCSServerBot', log.DEBUG, 'Admin: updateBans()')
+    local revision = tonumber(json.revision)
+    local batch = tonumber(json.batch) or 0
+    local batches = tonumber(json.batches) or 1
+    -- a new update starts, count its batches
+    local pending = dcsbot.banListPending
+    if pending == nil or pending.version ~= json.version or pending.revision ~= revision then
+        pending = { version = json.version, revision = revision, received = {}, count = 0 }
+        dcsbot.banListPending = pending
+    end
+    if json.full == true and batch == 0 then
+        dcsbot.banList = {}
+    end
+    local online = {}
+    plist = net.get_player_list()
+    for i = 2, table.getn(plist) do
+        online[net.get_player_info(plist[i], 'ucid')] = plist[i]
+    end
+    for _, ban in pairs(json.bans) do
+        dcsbot.banList[ban.ucid] = (ban.reason or 'n/a') .. '.\nExpires ' .. (ban.banned_until or 'never')
+        if online[ban.ucid] then
+            net.kick(online[ban.ucid], ban.reason or 'n/a')
+        end
+    end
+    for _, ucid in pairs(json.unbans) do
+        dcsbot.banList[ucid] = nil
+    end
+    if not pending.received[batch] then
+        pending.received[batch] = true
+        pending.count = pending.count + 1
+    end
+    -- only a completely received update counts as applied, otherwise the bot sends it again
+    if pending.count == batches then
+        dcsbot.banListPending = nil
+        dcsbot.banListVersion = json.version
+        dcsbot.banListRevision = revision
+        local msg = {}
+        msg.command = 'banListApplied'
+        msg.version = json.version
+        msg.revision = revision
+        utils.sendBotTable(msg)
+    end
+end
+
 function dcsbot.force_player_slot(json)
     log.write('DCSServerBot', log.DEBUG, 'Admin: force_player_slot()')
     net.force_player_slot(json.playerID, json.sideID or 0, json.slotID or '')
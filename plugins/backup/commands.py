@@ -1,14 +1,22 @@
 import asyncio
+import json
 import os
 import platform
 import shlex
 import shutil
+import subprocess
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from zipfile import ZipFile
-from discord.ext import tasks
+from typing import Optional
+from zipfile import ZipFile, ZipInfo
+from discord.ext import commands, tasks
 
-from core import Plugin, DCSServerBot, utils, PluginInstallationError
+from core import Plugin, DCSServerBot, utils, PluginInstallationError, Server
+from .database import IncrementalDump
+from .store import ChunkStore
+from .throttle import Throttle, lower_priority
 
 
 class BackupAgent(Plugin):
@@ -17,10 +25,28 @@ class BackupAgent(Plugin):
         super().__init__(bot)
         if not self.locals:
             raise PluginInstallationError(reason=f"No {self.plugin_name}.json file found!", plugin=self.plugin_name)
+        # targets that are due, but did not run yet
+        self.pending: set[str] = set()
+        self.running: set[str] = set()
+        self.scheduled: dict[str, str] = dict()
+        self.semaphore = asyncio.Semaphore(self.locals.get('parallel', 2))
+        bandwidth = self.locals.get('bandwidth', 0)
+        self.throttle = Throttle(bandwidth * 1048576) if bandwidth else None
+        self.niceness = self.locals.get('niceness', 10)
+        self.executor = ThreadPoolExecutor(max_workers=self.locals.get('parallel', 2), thread_name_prefix='backup',
+                                           initializer=lower_priority if self.niceness else None,
+                                           initargs=(self.niceness, ) if self.niceness else ())
         self.schedule.start()
 
     def cog_unload(self):
         self.schedule.stop()
+        self.executor.shutdown(wait=False)
+
+    def get_store(self) -> Optional[ChunkStore]:
+        if not self.locals.get('incremental', False):
+            return None
+        return ChunkStore(os.path.join(os.path.expandvars(self.locals.get('target')), 'store'),
+                          level=self.locals.get('compression', 6), throttle=self.throttle)
 
     def mkdir(self) -> str:
         target = os.path.expandvars(self.locals.get('target'))
@@ -28,45 +54,59 @@ class BackupAgent(Plugin):
         os.makedirs(directory, exist_ok=True)
         return directory
 
-    @staticmethod
-    def zip_path(zf: ZipFile, base: str, path: str):
+    def zip_path(self, zf: ZipFile, base: str, path: str):
         for root, dirs, files in os.walk(os.path.join(base, path)):
             for file in files:
-                zf.write(os.path.join(root, file), os.path.join(root.replace(base, ''), file))
+                filename = os.path.join(root, file)
+                arcname = os.path.join(root.replace(base, ''), file)
+                if not self.throttle:
+                    zf.write(filename, arcname)
+                    continue
+                zinfo = ZipInfo.from_file(filename, arcname)
+                zinfo.compress_type = zf.compression
+                with open(filename, 'rb') as src, zf.open(zinfo, 'w') as dst:
+                    while data := src.read(1048576):
+                        self.throttle.consume(len(data))
+                        dst.write(data)
 
-    def backup_bot(self):
-        self.log.info("Backing up DCSServerBot ...")
+    def backup_directories(self, name: str, base: str, directories: list[str]) -> int:
+        store = self.get_store()
+        if store:
+            manifest, stats = store.backup(utils.slugify(platform.node()) + '_' + name, base, directories)
+            self.log.info(f"- Manifest {manifest}: {stats['files']} files, {stats['bytes'] / 1048576:.1f} MB, "
+                          f"{stats['written'] / 1048576:.1f} MB new.")
+            return stats['written']
         target = self.mkdir()
+        filename = os.path.join(target, f"{name}_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".zip")
+        with ZipFile(filename, mode="w") as zf:
+            for directory in directories:
+                self.zip_path(zf, base, directory)
+        return os.path.getsize(filename)
+
+    def backup_bot(self) -> int:
+        self.log.info("Backing up DCSServerBot ...")
         config = self.locals['backups'].get('bot')
-        filename = "bot_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".zip"
-        zf = ZipFile(os.path.join(target, filename), mode="w")
         try:
-            for directory in config.get('directories'):
-                self.zip_path(zf, "", directory)
+            size = self.backup_directories('bot', '', config.get('directories'))
             self.log.info("Backup of DCSServerBot complete.")
+            return size
         except Exception as ex:
             self.log.debug(ex)
             self.log.error("Backup of DCSServerBot failed. See logfile for details.")
-        finally:
-            zf.close()
+            return 0
 
-    def backup_servers(self):
-        target = self.mkdir()
+    def backup_server(self, server: Server) -> int:
+        self.log.info(f'Backing up server "{server.name}" ...')
         config = self.locals['backups'].get('servers')
-        for server_name, server in self.bot.servers.items():
-            self.log.info(f'Backing up server "{server_name}" ...')
-            filename = f"{server.installation}_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".zip"
-            zf = ZipFile(os.path.join(target, filename), mode="w")
-            try:
-                rootdir = os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
-                for directory in config.get('directories'):
-                    self.zip_path(zf, rootdir, directory)
-            except Exception as ex:
-                self.log.debug(ex)
-                self.log.error(f'Backup of server "{server_name}" failed. See logfile for details.')
-            finally:
-                zf.close()
-            self.log.info(f'Backup of server "{server_name}" complete.')
+        try:
+            rootdir = os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
+            size = self.backup_directories(server.installation, rootdir, config.get('directories'))
+            self.log.info(f'Backup of server "{server.name}" complete.')
+            return size
+        except Exception as ex:
+            self.log.debug(ex)
+            self.log.error(f'Backup of server "{server.name}" failed. See logfile for details.')
+            return 0
 
     @staticmethod
     def can_run(config: dict):
@@ -77,12 +117,101 @@ class BackupAgent(Plugin):
                     return True
         return False
 
-    @tasks.loop(minutes=1)
-    async def schedule(self):
+    @commands.command(description='Restore an incremental backup', usage='[backup] [directory]')
+    @utils.has_role('Admin')
+    @commands.guild_only()
+    async def restore(self, ctx, manifest: Optional[str] = None, directory: Optional[str] = None):
+        store = self.get_store()
+        if not store:
+            await ctx.send('Incremental backups are not enabled.')
+            return
+        node = utils.slugify(platform.node())
+        manifests = store.list_manifests()
+        if not manifest:
+            backups = [x for x in manifests if x.startswith(node + '_')][-10:]
+            if backups:
+                await ctx.send(f'Node {platform.node()}: latest backups:\n```' + '\n'.join(backups) + '```')
+            return
+        # only the node that took the backup restores it
+        if not manifest.startswith(node + '_'):
+            return
+        if manifest not in manifests:
+            await ctx.send(f'Node {platform.node()}: Backup {manifest} not found.')
+            return
+        if not directory:
+            directory = os.path.join(os.path.expandvars(self.locals.get('target')), 'restore', manifest)
+        try:
+            num = await asyncio.to_thread(store.restore, manifest, directory)
+            await ctx.send(f'Node {platform.node()}: {num} files restored to {directory}.')
+        except Exception as ex:
+            self.log.exception(ex)
+            await ctx.send(f'Node {platform.node()}: Restore of {manifest} failed. See logfile for details.')
+
+    def get_due(self) -> list[str]:
+        due = []
         if 'bot' in self.locals['backups'] and self.can_run(self.locals['backups']['bot']):
-            await asyncio.to_thread(self.backup_bot)
+            due.append('bot')
         if 'servers' in self.locals['backups'] and self.can_run(self.locals['backups']['servers']):
-            await asyncio.to_thread(self.backup_servers)
+            due.extend(f'server:{server_name}' for server_name in self.bot.servers.keys())
+        return due
+
+    def is_ready(self, target: str) -> bool:
+        if target.startswith('server:'):
+            server = self.bot.servers.get(target[7:])
+            # don't disturb people that are flying
+            return server is not None and not server.get_active_players()
+        return True
+
+    async def do_backup(self, target: str) -> int:
+        if target == 'bot':
+            return await self.loop.run_in_executor(self.executor, self.backup_bot)
+        elif target.startswith('server:'):
+            server = self.bot.servers.get(target[7:])
+            if server:
+                return await self.loop.run_in_executor(self.executor, self.backup_server, server)
+        return 0
+
+    def record(self, target: str, start: datetime, duration: float, size: int) -> None:
+        self.log.info(f"Backup of {target} took {duration:.0f} seconds, {size / 1048576:.1f} MB written.")
+        file = os.path.join(os.path.expandvars(self.locals.get('target')),
+                            f"stats_{utils.slugify(platform.node())}.json")
+        try:
+            stats = {}
+            if os.path.exists(file):
+                with open(file) as f:
+                    stats = json.load(f)
+            stats[target] = {
+                "start": start.isoformat(),
+                "duration": round(duration, 1),
+                "bytes": size
+            }
+            with open(file, 'w') as f:
+                json.dump(stats, f, indent=2)
+        except Exception as ex:
+            self.log.exception(ex)
+
+    async def run_backup(self, target: str) -> None:
+        try:
+            async with self.semaphore:
+                start = datetime.now()
+                size = await self.do_backup(target)
+                self.record(target, start, (datetime.now() - start).total_seconds(), size)
+        finally:
+            self.running.discard(target)
+
+    @tasks.loop(minutes=1)
+    async def schedule(self):
+        minute = datetime.now().strftime('%Y%m%d%H%M')
+        for target in self.get_due():
+            if self.scheduled.get(target) != minute:
+                self.scheduled[target] = minute
+                self.pending.add(target)
+        for target in list(self.pending):
+            if target in self.running or not self.is_ready(target):
+                continue
+            self.pending.discard(target)
+            self.running.add(target)
+            asyncio.create_task(self.run_backup(target))
 
 
 class BackupMaster(BackupAgent):
@@ -96,31 +225,89 @@ class BackupMaster(BackupAgent):
         if self.locals['delete_after'].lower() != 'never':
             self.delete.stop()
 
-    async def backup_database(self):
+    async def pg_dump(self, path: str) -> None:
+        config = self.locals['backups'].get('database')
+        cmd = os.path.join(os.path.expandvars(config['path']), "pg_dump")
+        database = f"{os.path.basename(self.bot.config['BOT']['DATABASE_URL'])}"
+        exe = f'"{cmd}" -U postgres -F t -f "{path}" -d "{database}"'
+        args = shlex.split(exe)
+        os.environ['PGPASSWORD'] = config['password']
+        process = await asyncio.create_subprocess_exec(*args, stdin=asyncio.subprocess.DEVNULL,
+                                                       stdout=asyncio.subprocess.DEVNULL,
+                                                       **self.get_priority_args())
+        if await process.wait() != 0:
+            raise Exception(f"pg_dump returned with exit code {process.returncode}")
+
+    def capture(self, dump: IncrementalDump) -> int:
+        conn = self.pool.getconn()
         try:
+            return dump.capture(conn)
+        finally:
+            self.pool.putconn(conn)
+
+    def start_base(self, dump: IncrementalDump, tables: list[str]) -> str:
+        conn = self.pool.getconn()
+        try:
+            return dump.start_base(conn, tables)
+        finally:
+            self.pool.putconn(conn)
+
+    def get_capture_tables(self) -> list[str]:
+        conn = self.pool.getconn()
+        try:
+            return IncrementalDump.get_capture_tables(conn)
+        finally:
+            self.pool.putconn(conn)
+
+    async def backup_incremental_database(self) -> int:
+        config = self.locals['backups'].get('database')
+        dump = IncrementalDump(os.path.join(os.path.expandvars(self.locals.get('target')),
+                                            'database_' + utils.slugify(platform.node())))
+        tables = await asyncio.to_thread(self.get_capture_tables)
+        if not dump.needs_base(config.get('base_days', 7), tables):
+            self.log.info("Backing up database changes ...")
+            return await self.loop.run_in_executor(self.executor, self.capture, dump)
+        self.log.info("Backing up database (base dump) ...")
+        base = await asyncio.to_thread(self.start_base, dump, tables)
+        path = os.path.join(base, 'base.tar')
+        await self.pg_dump(path)
+        dump.finish_base(base)
+        return os.path.getsize(path)
+
+    async def backup_database(self) -> int:
+        try:
+            if self.locals['backups']['database'].get('incremental', False):
+                size = await self.backup_incremental_database()
+                self.log.info("Backup of database complete.")
+                return size
             target = self.mkdir()
             self.log.info("Backing up database...")
-            config = self.locals['backups'].get('database')
-            cmd = os.path.join(os.path.expandvars(config['path']), "pg_dump")
-            filename = f"db_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".tar"
-            path = os.path.join(target, filename)
-            database = f"{os.path.basename(self.bot.config['BOT']['DATABASE_URL'])}"
-            exe = f'"{cmd}" -U postgres -F t -f "{path}" -d "{database}"'
-            args = shlex.split(exe)
-            os.environ['PGPASSWORD'] = config['password']
-            process = await asyncio.create_subprocess_exec(*args, stdin=asyncio.subprocess.DEVNULL,
-                                                           stdout=asyncio.subprocess.DEVNULL)
-            await process.wait()
+            path = os.path.join(target, f"db_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".tar")
+            await self.pg_dump(path)
             self.log.info("Backup of database complete.")
+            return os.path.getsize(path) if os.path.exists(path) else 0
         except Exception as ex:
             self.log.debug(ex)
             self.log.error("Backup of database failed. See logfile for details.")
+            return 0
 
-    @tasks.loop(minutes=1)
-    async def schedule(self):
-        await super().schedule()
+    def get_priority_args(self) -> dict:
+        if not self.niceness:
+            return {}
+        if sys.platform == 'win32':
+            return {"creationflags": subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+        return {"preexec_fn": lambda: os.nice(self.niceness)}
+
+    def get_due(self) -> list[str]:
+        due = super().get_due()
         if 'database' in self.locals['backups'] and self.can_run(self.locals['backups']['database']):
-            await self.backup_database()
+            due.append('database')
+        return due
+
+    async def do_backup(self, target: str) -> int:
+        if target == 'database':
+            return await self.backup_database()
+        return await super().do_backup(target)
 
     @tasks.loop(hours=24)
     async def delete(self):
@@ -129,7 +316,16 @@ class BackupMaster(BackupAgent):
             if not os.path.exists(path):
                 return
             now = time.time()
-            for f in [os.path.join(path, x) for x in os.listdir(path)]:
+            store = self.get_store()
+            if store:
+                manifests, chunks = await asyncio.to_thread(store.gc, int(self.locals['delete_after']))
+                self.log.debug(f'Backup: {manifests} manifests and {chunks} chunks deleted.')
+            for dump in [IncrementalDump(os.path.join(path, x)) for x in os.listdir(path) if x.startswith('database_')]:
+                bases = await asyncio.to_thread(dump.gc, int(self.locals['delete_after']))
+                self.log.debug(f'Backup: {bases} database backups deleted.')
+            # the store and incremental database backups are cleaned up by their garbage collection
+            for f in [os.path.join(path, x) for x in os.listdir(path)
+                      if x != 'store' and not x.startswith('database_')]:
                 if os.stat(f).st_mtime < (now - int(self.locals['delete_after']) * 86400):
                     if os.path.isfile(f):
                         os.remove(f)
@@ -0,0 +1,194 @@
+import argparse
+import gzip
+import json
+import os
+import psycopg2
+import shutil
+import subprocess
+import sys
+from contextlib import closing
+from datetime import datetime
+from typing import Optional
+
+# tables that are captured incrementally, with the columns that identify a row
+CAPTURE_TABLES = {
+    "statistics": ("mission_id", "player_ucid", "hop_on"),
+    "missionstats": ("id", ),
+    "serverstats": ("id", ),
+    "credits_log": ("id", ),
+    "pu_events": ("id", )
+}
+# version of the state, bases of older versions can't be continued
+STATE_VERSION = 2
+
+
+class IncrementalDump:
+    """
+    Incremental database backup.
+    A base dump is taken with pg_dump every few days. In between, only the rows of the CAPTURE_TABLES that were
+    inserted or changed since the last run are exported with COPY. Every insert and update stores the id of its
+    transaction in capture_xid. The high-water mark is the oldest transaction that was still running at the last run,
+    so rows of transactions that commit late are captured by the next run. Deleted rows are not tracked, the next base
+    dump picks up these changes.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def get_base(self) -> Optional[str]:
+        bases = sorted(x for x in os.listdir(self.root) if os.path.exists(os.path.join(self.root, x, 'state.json')))
+        return os.path.join(self.root, bases[-1]) if bases else None
+
+    @staticmethod
+    def read_state(base: str) -> dict:
+        with open(os.path.join(base, 'state.json'), encoding='utf-8') as file:
+            return json.load(file)
+
+    @staticmethod
+    def write_state(base: str, state: dict) -> None:
+        path = os.path.join(base, 'state.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=2)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def get_capture_tables(conn) -> list[str]:
+        # the capture triggers are installed by background migrations of the plugins that own the tables
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT c.relname FROM pg_trigger t, pg_class c WHERE t.tgrelid = c.oid AND "
+                           "t.tgname = 'tgr_' || c.relname || '_capture_xid' AND c.relname = ANY(%s)",
+                           (list(CAPTURE_TABLES.keys()), ))
+            tables = [x[0] for x in cursor.fetchall()]
+        conn.rollback()
+        return tables
+
+    @staticmethod
+    def get_marks(conn, tables: list[str]) -> dict[str, int]:
+        with closing(conn.cursor()) as cursor:
+            # transactions before the oldest running one are either committed or rolled back
+            cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+            mark = cursor.fetchone()[0]
+        return {table: mark for table in tables}
+
+    def needs_base(self, days: int, tables: list[str]) -> bool:
+        base = self.get_base()
+        if not base:
+            return True
+        state = self.read_state(base)
+        # tables that got their capture trigger after the base was taken need a new base
+        if state.get('version') != STATE_VERSION or set(state['marks'].keys()) != set(tables):
+            return True
+        created = datetime.fromisoformat(state['created'])
+        return (datetime.now() - created).days >= days
+
+    def start_base(self, conn, tables: list[str]) -> str:
+        base = os.path.join(self.root, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(base)
+        # the marks are taken before the dump, rows in between are captured twice and replaced on restore
+        state = {
+            "version": STATE_VERSION,
+            "created": datetime.now().isoformat(),
+            "marks": self.get_marks(conn, tables),
+            "increments": []
+        }
+        conn.rollback()
+        with open(os.path.join(base, 'marks.json'), 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=2)
+        return base
+
+    @staticmethod
+    def finish_base(base: str) -> None:
+        # a base only counts once the dump is complete
+        os.replace(os.path.join(base, 'marks.json'), os.path.join(base, 'state.json'))
+
+    def capture(self, conn) -> int:
+        base = self.get_base()
+        state = self.read_state(base)
+        size = 0
+        marks = self.get_marks(conn, list(state['marks'].keys()))
+        with closing(conn.cursor()) as cursor:
+            for table in state['marks'].keys():
+                cursor.execute('SELECT column_name FROM information_schema.columns WHERE table_schema = %s AND '
+                               'table_name = %s ORDER BY ordinal_position', ('public', table))
+                columns = [x[0] for x in cursor.fetchall()]
+                if not columns:
+                    continue
+                filename = f"{len(state['increments']):05d}_{table}.copy.gz"
+                sql = cursor.mogrify(f'SELECT {", ".join(columns)} FROM {table} WHERE capture_xid >= %s AND '
+                                     f'capture_xid < %s', (state['marks'][table], marks[table])).decode('utf-8')
+                with gzip.open(os.path.join(base, filename), 'wb') as file:
+                    cursor.copy_expert(f'COPY ({sql}) TO STDOUT', file)
+                size += os.path.getsize(os.path.join(base, filename))
+                state['increments'].append({
+                    "file": filename,
+                    "table": table,
+                    "columns": columns,
+                    "from": state['marks'][table],
+                    "to": marks[table]
+                })
+                state['marks'][table] = marks[table]
+                self.write_state(base, state)
+        conn.rollback()
+        return size
+
+    def gc(self, days: int) -> int:
+        # a base and its increments are deleted together, the latest base is always kept
+        latest = self.get_base()
+        cutoff = datetime.now().timestamp() - days * 86400
+        deleted = 0
+        for base in [os.path.join(self.root, x) for x in os.listdir(self.root)]:
+            if base == latest or not os.path.isdir(base):
+                continue
+            state = os.path.join(base, 'state.json')
+            if os.stat(state if os.path.exists(state) else base).st_mtime < cutoff:
+                shutil.rmtree(base)
+                deleted += 1
+        return deleted
+
+
+def replay(conn, base: str) -> None:
+    state = IncrementalDump.read_state(base)
+    with closing(conn.cursor()) as cursor:
+        for increment in state['increments']:
+            table = increment['table']
+            columns = ', '.join(increment['columns'])
+            print(f"Replaying {increment['file']} ...")
+            cursor.execute(f'CREATE TEMP TABLE replay AS SELECT {columns} FROM {table} WITH NO DATA')
+            with gzip.open(os.path.join(base, increment['file']), 'rb') as file:
+                cursor.copy_expert(f'COPY replay ({columns}) FROM STDIN', file)
+            # rows might have been captured before, the latest version replaces them
+            keys = ' AND '.join(f't.{x} = r.{x}' for x in CAPTURE_TABLES[table])
+            cursor.execute(f'DELETE FROM {table} t USING replay r WHERE {keys}')
+            cursor.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM replay')
+            cursor.execute('DROP TABLE replay')
+        # serials have to continue after the replayed rows
+        for table in CAPTURE_TABLES.keys():
+            cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_schema = 'public' AND "
+                           "table_name = %s AND column_default LIKE 'nextval%%'", (table, ))
+            for column in [x[0] for x in cursor.fetchall()]:
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({column}), 0) + 1, "
+                               f"false) FROM {table}", (table, column))
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Restore an incremental database backup of DCSServerBot into an '
+                                                 'empty database. The password is read from PGPASSWORD.')
+    parser.add_argument('backup', help='directory of the base dump, for instance Backup/database_node/20230101_030000')
+    parser.add_argument('-d', '--database', required=True, help='name of the (empty) database to restore into')
+    parser.add_argument('-U', '--user', default='postgres')
+    parser.add_argument('-H', '--host', default='localhost')
+    parser.add_argument('-p', '--port', default='5432')
+    parser.add_argument('--path', default='', help='path to the PostgreSQL binaries')
+    args = parser.parse_args()
+    print('Restoring base dump ...')
+    subprocess.run([os.path.join(args.path, 'pg_restore'), '-U', args.user, '-h', args.host, '-p', args.port,
+                    '-d', args.database, os.path.join(args.backup, 'base.tar')], check=True)
+    with closing(psycopg2.connect(dbname=args.database, user=args.user, host=args.host, port=args.port)) as conn:
+        replay(conn, args.backup)
+    print('Database restored.')
+
+
+if __name__ == "__main__":
+    sys.exit(main())
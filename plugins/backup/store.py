@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional
+from .throttle import Throttle
+
+
+class ChunkStore:
+    """
+    Content-addressed store for incremental backups.
+    Files are split into chunks, which are stored compressed and only once per content (sha256). Every backup run
+    writes a manifest that lists the chunks of each file. Files with the same size and modification time as in the
+    previous manifest of the same backup are not read again.
+    """
+    CHUNK_SIZE = 4 * 1024 * 1024
+    # unreferenced chunks younger than this might belong to a backup that is still running
+    GC_GRACE = 86400
+
+    def __init__(self, root: str, *, level: int = 6, throttle: Optional[Throttle] = None):
+        self.root = root
+        self.level = level
+        self.throttle = throttle
+        self.chunks = os.path.join(root, 'chunks')
+        self.manifests = os.path.join(root, 'manifests')
+        os.makedirs(self.chunks, exist_ok=True)
+        os.makedirs(self.manifests, exist_ok=True)
+
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunks, digest[:2], digest)
+
+    def put_chunk(self, data: bytes) -> tuple[str, int]:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            # protect the chunk from a concurrent garbage collection
+            os.utime(path)
+            return digest, 0
+        compressed = zlib.compress(data, self.level)
+        # already compressed data (zip, acmi, ogg) is stored as is
+        payload = b'Z' + compressed if len(compressed) < len(data) else b'R' + data
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmpfile = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmpfile, 'wb') as file:
+            file.write(payload)
+        os.replace(tmpfile, path)
+        return digest, len(payload)
+
+    def get_chunk(self, digest: str) -> bytes:
+        with open(self.chunk_path(digest), 'rb') as file:
+            payload = file.read()
+        data = zlib.decompress(payload[1:]) if payload[:1] == b'Z' else payload[1:]
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f'Chunk {digest} is corrupted.')
+        return data
+
+    def list_manifests(self, name: Optional[str] = None) -> list[str]:
+        manifests = sorted(x[:-5] for x in os.listdir(self.manifests) if x.endswith('.json'))
+        if name:
+            manifests = [x for x in manifests if x.rsplit('_', 2)[0] == name]
+        return manifests
+
+    def read_manifest(self, manifest: str) -> dict:
+        with open(os.path.join(self.manifests, manifest + '.json'), encoding='utf-8') as file:
+            return json.load(file)
+
+    def write_manifest(self, manifest: str, data: dict) -> None:
+        path = os.path.join(self.manifests, manifest + '.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(path + '.tmp', path)
+
+    def _reuse(self, old: Optional[dict], stat: os.stat_result) -> Optional[list[str]]:
+        if not old or old['size'] != stat.st_size or old['mtime'] != stat.st_mtime_ns:
+            return None
+        try:
+            for digest in old['chunks']:
+                os.utime(self.chunk_path(digest))
+            return old['chunks']
+        except FileNotFoundError:
+            return None
+
+    def backup(self, name: str, base: str, directories: list[str]) -> tuple[str, dict]:
+        manifests = self.list_manifests(name)
+        previous = self.read_manifest(manifests[-1])['files'] if manifests else {}
+        files = {}
+        stats = {"files": 0, "bytes": 0, "written": 0}
+        for directory in directories:
+            for root, _, filenames in os.walk(os.path.join(base, directory)):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    rel = os.path.relpath(path, base or '.')
+                    stat = os.stat(path)
+                    chunks = self._reuse(previous.get(rel), stat)
+                    if chunks is None:
+                        chunks = []
+                        with open(path, 'rb') as file:
+                            while data := file.read(self.CHUNK_SIZE):
+                                if self.throttle:
+                                    self.throttle.consume(len(data))
+                                digest, written = self.put_chunk(data)
+                                chunks.append(digest)
+                                stats['written'] += written
+                    files[rel] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "chunks": chunks}
+                    stats['files'] += 1
+                    stats['bytes'] += stat.st_size
+        manifest = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.write_manifest(manifest, {
+            "name": name,
+            "created": datetime.now().isoformat(),
+            "base": base,
+            "files": files
+        })
+        return manifest, stats
+
+    def restore(self, manifest: str, directory: str) -> int:
+        directory = os.path.abspath(directory)
+        files = self.read_manifest(manifest)['files']
+        for rel, info in files.items():
+            path = os.path.abspath(os.path.join(directory, rel))
+            if os.path.commonpath([directory, path]) != directory:
+                raise ValueError(f'Invalid path {rel} in manifest {manifest}.')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as file:
+                for digest in info['chunks']:
+                    file.write(self.get_chunk(digest))
+            os.replace(path + '.tmp', path)
+            os.utime(path, ns=(info['mtime'], info['mtime']))
+        return len(files)
+
+    def gc(self, days: int) -> tuple[int, int]:
+        # delete expired manifests, but always keep the latest one of each backup
+        cutoff = datetime.now() - timedelta(days=days)
+        latest = dict()
+        for manifest in self.list_manifests():
+            latest[manifest.rsplit('_', 2)[0]] = manifest
+        deleted_manifests = 0
+        referenced = set()
+        for manifest in self.list_manifests():
+            data = self.read_manifest(manifest)
+            if manifest not in latest.values() and datetime.fromisoformat(data['created']) < cutoff:
+                os.remove(os.path.join(self.manifests, manifest + '.json'))
+                deleted_manifests += 1
+                continue
+            for info in data['files'].values():
+                referenced.update(info['chunks'])
+        # delete all chunks that are not referenced anymore
+        deleted_chunks = 0
+        now = time.time()
+        for root, _, filenames in os.walk(self.chunks):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                if filename not in referenced and os.stat(path).st_mtime < now - self.GC_GRACE:
+                    os.remove(path)
+                    deleted_chunks += 1
+        return deleted_manifests, deleted_chunks
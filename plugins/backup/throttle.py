@@ -0,0 +1,40 @@
+import os
+import sys
+import threading
+import time
+
+
+class Throttle:
+    """
+    Limits the bandwidth of all backup threads together to a number of bytes per second.
+    """
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.allowance = float(rate)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, size: int) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.last) * self.rate) - size
+            self.last = now
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def lower_priority(niceness: int) -> None:
+    """
+    Lowers the priority of the calling thread.
+    """
+    if sys.platform == 'win32':
+        import ctypes
+
+        # background mode lowers the cpu and the i/o priority of the thread
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 0x00010000)
+    elif sys.platform.startswith('linux'):
+        # on Linux, the nice value is set for the calling thread only
+        os.setpriority(os.PRIO_PROCESS, 0, niceness)
@@ -0,0 +1,96 @@
+import aiohttp
+import asyncio
+import certifi
+import gzip
+import json
+import random
+import ssl
+import time
+from typing import Any, Optional
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CloudClient:
+    """
+    HTTP client for the cloud service.
+    All requests share one keep-alive connection pool and are throttled by a token bucket. Connection errors,
+    timeouts and temporary server errors are retried with exponential backoff and jitter.
+    """
+    # status codes that are worth a retry
+    RETRY_STATUS = [408, 429, 500, 502, 503, 504]
+    BACKOFF = 1.0
+    MAX_BACKOFF = 30.0
+
+    def __init__(self, base_url: str, token: Optional[str] = None, *, rate: float = 5.0, retries: int = 3,
+                 connections: int = 10, compress: bool = False):
+        self.base_url = base_url
+        self.retries = retries
+        self.compress = compress
+        self.bucket = TokenBucket(rate, max(int(rate), 1) * 2)
+        headers = {
+            "Content-type": "application/json"
+        }
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(ssl=ssl.create_default_context(cafile=certifi.where()),
+                                           limit=connections, keepalive_timeout=60),
+            raise_for_status=True, headers=headers, timeout=aiohttp.ClientTimeout(total=60)
+        )
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def request(self, method: str, request: str, data: Any = None) -> Any:
+        url = f"{self.base_url}/{request}"
+        kwargs = {}
+        if data is not None:
+            if self.compress:
+                kwargs['data'] = gzip.compress(json.dumps(data).encode('utf-8'))
+                kwargs['headers'] = {"Content-Encoding": "gzip"}
+            else:
+                kwargs['json'] = data
+        for attempt in range(self.retries + 1):
+            await self.bucket.acquire()
+            delay = min(self.MAX_BACKOFF, self.BACKOFF * 2 ** attempt)
+            try:
+                async with self.session.request(method, url, **kwargs) as response:  # type: aiohttp.ClientResponse
+                    return await response.json()
+            except aiohttp.ClientResponseError as error:
+                if error.status not in self.RETRY_STATUS or attempt == self.retries:
+                    raise
+                retry_after = error.headers.get('Retry-After') if error.headers else None
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            except aiohttp.ClientConnectionError:
+                if attempt == self.retries:
+                    raise
+            except asyncio.TimeoutError:
+                if attempt == self.retries:
+                    # callers only need to handle aiohttp.ClientError
+                    raise aiohttp.ServerTimeoutError(f'Timeout on {method} {url}')
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def get(self, request: str) -> Any:
+        return await self.request('GET', request)
+
+    async def post(self, request: str, data: Any) -> Any:
+        return await self.request('POST', request, data)
@@ -1,19 +1,20 @@
 import aiohttp
 import asyncio
-import certifi
 import discord
 import os
-import pandas as pd
 import platform
 import psycopg2
+import psycopg2.extras
 import shutil
-import ssl
 from contextlib import closing
 from core import Plugin, DCSServerBot, utils, TEventListener, PaginationReport, Status
 from discord.ext import commands, tasks
 from typing import Type, Any, Optional, Union
+from .client import CloudClient
 from .listener import CloudListener
 
+pd = utils.lazy_import('pandas')
+
 
 class CloudHandlerAgent(Plugin):
 
@@ -22,16 +23,10 @@ class CloudHandlerAgent(Plugin):
         if not len(self.read_locals()):
             raise commands.ExtensionFailed(self.plugin_name, FileNotFoundError("No cloud.json available."))
         self.config = self.locals['configs'][0]
-        headers = {
-            "Content-type": "application/json"
-        }
-        if 'token' in self.config:
-            headers['Authorization'] = f"Bearer {self.config['token']}"
-        self.session = aiohttp.ClientSession(
-            connector=aiohttp.TCPConnector(ssl=ssl.create_default_context(cafile=certifi.where())),
-            raise_for_status=True, headers=headers
-        )
         self.base_url = f"{self.config['protocol']}://{self.config['host']}:{self.config['port']}"
+        self.http = CloudClient(self.base_url, self.config.get('token'),
+                                rate=self.config.get('rate-limit', 5.0), retries=self.config.get('retries', 3),
+                                compress=self.config.get('compress', False))
         self.client = {
             "guild_id": self.bot.guilds[0].id,
             "guild_name": self.bot.guilds[0].name,
@@ -43,25 +38,18 @@ class CloudHandlerAgent(Plugin):
     async def cog_unload(self):
         if 'dcs-ban' not in self.config or self.config['dcs-ban']:
             self.cloud_bans.cancel()
-        asyncio.create_task(self.session.close())
+        asyncio.create_task(self.http.close())
         await super().cog_unload()
 
     async def get(self, request: str) -> Any:
-        url = f"{self.base_url}/{request}"
-        async with self.session.get(url) as response:  # type: aiohttp.ClientResponse
-            return await response.json()
+        return await self.http.get(request)
 
     async def post(self, request: str, data: Any) -> Any:
-        async def send(element):
-            url = f"{self.base_url}/{request}/"
-            async with self.session.post(url, json=element) as response:  # type: aiohttp.ClientResponse
-                return await response.json()
-
-        if isinstance(data, list):
-            for line in data:
-                await send(line)
+        if isinstance(data, list) and not self.config.get('bulk-upload', False):
+            # concurrency and rate are limited by the client
+            return await asyncio.gather(*[self.http.post(f"{request}/", line) for line in data])
         else:
-            await send(data)
+            return await self.http.post(f"{request}/", data)
 
     @commands.command(description='Test the cloud-connection')
     @utils.has_role('Admin')
@@ -80,16 +68,15 @@ class CloudHandlerAgent(Plugin):
     @tasks.loop(minutes=15.0)
     async def cloud_bans(self):
         try:
-            bans = await self.get('bans')
+            bans = {x['ucid']: x['reason'] for x in await self.get('bans')}
             for server in self.bot.servers.values():
                 if server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED]:
-                    for ban in bans:
-                        player = server.get_player(ucid=ban["ucid"], active=True)
-                        if player:
+                    for player in server.get_active_players():
+                        if player.ucid in bans:
                             server.sendtoDCS({
                                 "command": "ban",
-                                "ucid": ban["ucid"],
-                                "reason": ban["reason"]
+                                "ucid": player.ucid,
+                                "reason": bans[player.ucid]
                             })
         except aiohttp.ClientError:
             self.log.warning('- Cloud service not responding.')
@@ -186,26 +173,28 @@ class CloudHandlerMaster(CloudHandlerAgent):
         conn = self.pool.getconn()
         try:
             if self.config.get('dcs-ban', False):
-                with closing(conn.cursor()) as cursor:
-                    for ban in (await self.get('bans')):
-                        cursor.execute('INSERT INTO bans (ucid, banned_by, reason) VALUES (%s, %s, %s) '
-                                       'ON CONFLICT DO NOTHING', (ban['ucid'], self.plugin_name, ban['reason']))
-                conn.commit()
+                bans = await self.get('bans')
+                if bans:
+                    with closing(conn.cursor()) as cursor:
+                        psycopg2.extras.execute_values(
+                            cursor, 'INSERT INTO bans (ucid, banned_by, reason) VALUES %s ON CONFLICT DO NOTHING',
+                            [(ban['ucid'], self.plugin_name, ban['reason']) for ban in bans], page_size=1000)
+                    conn.commit()
             if self.config.get('discord-ban', False):
-                bans: list[dict] = await self.get('discord-bans')
-                users_to_ban = [await self.bot.fetch_user(x['discord_id']) for x in bans]
+                users_to_ban = {x['discord_id']: x['reason'] for x in await self.get('discord-bans')}
                 guild = self.bot.guilds[0]
-                guild_bans = [entry async for entry in guild.bans()]
-                banned_users = [x.user for x in guild_bans if x.reason and x.reason.startswith('DGSA:')]
+                banned_users = {
+                    entry.user.id: entry.user async for entry in guild.bans()
+                    if entry.reason and entry.reason.startswith('DGSA:')
+                }
                 # unban users that should not be banned anymore
-                for user in [x for x in banned_users if x not in users_to_ban]:
+                for user in [user for user_id, user in banned_users.items() if user_id not in users_to_ban]:
                     await guild.unban(user, reason='DGSA: ban revoked.')
-                # ban users that were not banned yet
-                for user in [x for x in users_to_ban if x not in banned_users]:
-                    if user.id == self.bot.owner_id:
+                # ban users that were not banned yet, no need to fetch them from Discord for that
+                for user_id, reason in users_to_ban.items():
+                    if user_id in banned_users or user_id == self.bot.owner_id:
                         continue
-                    reason = next(x['reason'] for x in bans if x['discord_id'] == user.id)
-                    await guild.ban(user, reason='DGSA: ' + reason)
+                    await guild.ban(discord.Object(id=user_id), reason='DGSA: ' + reason)
         except aiohttp.ClientError:
             self.log.warning('- Cloud service not responding.')
         except discord.Forbidden:
@@ -216,36 +205,90 @@ class CloudHandlerMaster(CloudHandlerAgent):
         finally:
             self.pool.putconn(conn)
 
-    @tasks.loop(seconds=10)
-    async def cloud_sync(self):
+    SQL_STATISTICS = 'SELECT s.player_ucid, m.mission_theatre, s.slot, SUM(s.kills) as kills, ' \
+                     'SUM(s.pvp) as pvp, SUM(deaths) as deaths, SUM(ejections) as ejections, ' \
+                     'SUM(crashes) as crashes, SUM(teamkills) as teamkills, SUM(kills_planes) AS ' \
+                     'kills_planes, SUM(kills_helicopters) AS kills_helicopters, SUM(kills_ships) AS ' \
+                     'kills_ships, SUM(kills_sams) AS kills_sams, SUM(kills_ground) AS kills_ground, ' \
+                     'SUM(deaths_pvp) as deaths_pvp, SUM(deaths_planes) AS deaths_planes, ' \
+                     'SUM(deaths_helicopters) AS deaths_helicopters, SUM(deaths_ships) AS deaths_ships, ' \
+                     'SUM(deaths_sams) AS deaths_sams, SUM(deaths_ground) AS deaths_ground, ' \
+                     'SUM(takeoffs) as takeoffs, SUM(landings) as landings, ROUND(SUM( ' \
+                     'EXTRACT(EPOCH FROM (s.hop_off - s.hop_on)))) AS playtime FROM statistics s, ' \
+                     'missions m WHERE {where} AND s.hop_off IS NOT null AND s.mission_id = m.id GROUP BY 1, 2, 3'
+
+    async def upload(self, lines: list[dict]):
+        for line in lines:
+            line['client'] = self.client
+        if lines:
+            await self.post('upload', lines)
+
+    def read_batch(self, batch_size: int) -> tuple[list[dict], Optional[list[str]], Optional[list[dict]]]:
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute('SELECT ucid FROM players WHERE synced IS FALSE ORDER BY last_seen DESC LIMIT 10')
-                for row in cursor.fetchall():
-                    cursor.execute('SELECT s.player_ucid, m.mission_theatre, s.slot, SUM(s.kills) as kills, '
-                                   'SUM(s.pvp) as pvp, SUM(deaths) as deaths, SUM(ejections) as ejections, '
-                                   'SUM(crashes) as crashes, SUM(teamkills) as teamkills, SUM(kills_planes) AS '
-                                   'kills_planes, SUM(kills_helicopters) AS kills_helicopters, SUM(kills_ships) AS '
-                                   'kills_ships, SUM(kills_sams) AS kills_sams, SUM(kills_ground) AS kills_ground, '
-                                   'SUM(deaths_pvp) as deaths_pvp, SUM(deaths_planes) AS deaths_planes, '
-                                   'SUM(deaths_helicopters) AS deaths_helicopters, SUM(deaths_ships) AS deaths_ships, '
-                                   'SUM(deaths_sams) AS deaths_sams, SUM(deaths_ground) AS deaths_ground, '
-                                   'SUM(takeoffs) as takeoffs, SUM(landings) as landings, ROUND(SUM( '
-                                   'EXTRACT(EPOCH FROM (s.hop_off - s.hop_on)))) AS playtime FROM statistics s, '
-                                   'missions m WHERE s.player_ucid = %s AND s.hop_off IS NOT null AND s.mission_id = '
-                                   'm.id GROUP BY 1, 2, 3', (row['ucid'], ))
-                    for line in cursor.fetchall():
-                        line['client'] = self.client
-                        await self.post('upload', line)
-                    cursor.execute('UPDATE players SET synced = TRUE WHERE ucid = %s', (row['ucid'], ))
-                conn.commit()
+                # new players and players marked by .resync are uploaded completely
+                cursor.execute('SELECT ucid FROM players WHERE synced IS FALSE ORDER BY last_seen DESC LIMIT %s',
+                               (batch_size, ))
+                ucids = [row['ucid'] for row in cursor.fetchall()]
+                if ucids:
+                    cursor.execute(self.SQL_STATISTICS.format(where='s.player_ucid = ANY(%s)'), (ucids, ))
+                    return cursor.fetchall(), ucids, None
+                # only the slots that were flagged by the listener, the delay makes sure that the statistics of
+                # the last session have been closed
+                cursor.execute("SELECT player_ucid, mission_theatre, slot, time FROM cloud_outbox WHERE time < "
+                               "NOW() - interval '1 minute' ORDER BY time LIMIT %s", (batch_size, ))
+                rows = cursor.fetchall()
+                if not rows:
+                    return [], None, None
+                cursor.execute(self.SQL_STATISTICS.format(
+                    where='(s.player_ucid, m.mission_theatre, s.slot) IN (SELECT * FROM unnest(%s::TEXT[], '
+                          '%s::TEXT[], %s::TEXT[]))'),
+                    ([x['player_ucid'] for x in rows], [x['mission_theatre'] for x in rows],
+                     [x['slot'] for x in rows]))
+                return cursor.fetchall(), None, rows
+        finally:
+            conn.rollback()
+            self.pool.putconn(conn)
+
+    def mark_synced(self, ucids: Optional[list[str]], rows: Optional[list[dict]]) -> None:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                if ucids:
+                    cursor.execute('UPDATE players SET synced = TRUE WHERE ucid = ANY(%s)', (ucids, ))
+                if rows:
+                    # slots that were flagged again in the meantime stay in the outbox
+                    cursor.execute('DELETE FROM cloud_outbox WHERE (player_ucid, mission_theatre, slot, time) IN '
+                                   '(SELECT * FROM unnest(%s::TEXT[], %s::TEXT[], %s::TEXT[], %s::TIMESTAMP[]))',
+                                   ([x['player_ucid'] for x in rows], [x['mission_theatre'] for x in rows],
+                                    [x['slot'] for x in rows], [x['time'] for x in rows]))
+            conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
             conn.rollback()
+            raise error
         finally:
             self.pool.putconn(conn)
 
+    @tasks.loop(seconds=10)
+    async def cloud_sync(self):
+        batch_size = self.config.get('sync-batch-size', 100)
+        catch_up = False
+        try:
+            # no connection is held while the upload is running
+            lines, ucids, rows = await asyncio.to_thread(self.read_batch, batch_size)
+            if not ucids and not rows:
+                return
+            await self.upload(lines)
+            # if the upload fails, the batch is sent again with the next run
+            await asyncio.to_thread(self.mark_synced, ucids, rows)
+            catch_up = len(ucids or rows) == batch_size
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+        finally:
+            # catch up faster as long as there are players left to sync
+            self.cloud_sync.change_interval(seconds=1 if catch_up else 10)
+
     @tasks.loop(hours=24)
     async def register(self):
         conn = self.pool.getconn()
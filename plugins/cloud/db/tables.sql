@@ -1 +1,3 @@
-ALTER TABLE players ADD COLUMN IF NOT EXISTS synced BOOLEAN DEFAULT FALSE;
\ No newline at end of file
+ALTER TABLE players ADD COLUMN IF NOT EXISTS synced BOOLEAN DEFAULT FALSE;
+CREATE INDEX IF NOT EXISTS idx_players_unsynced ON players(last_seen DESC) WHERE synced IS FALSE;
+CREATE TABLE IF NOT EXISTS cloud_outbox (player_ucid TEXT NOT NULL, mission_theatre TEXT NOT NULL, slot TEXT NOT NULL, time TIMESTAMP NOT NULL DEFAULT NOW(), PRIMARY KEY (player_ucid, mission_theatre, slot));
@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS idx_players_unsynced ON players(last_seen DESC) WHERE synced IS FALSE;
@@ -0,0 +1 @@
+CREATE TABLE IF NOT EXISTS cloud_outbox (player_ucid TEXT NOT NULL, mission_theatre TEXT NOT NULL, slot TEXT NOT NULL, time TIMESTAMP NOT NULL DEFAULT NOW(), PRIMARY KEY (player_ucid, mission_theatre, slot));
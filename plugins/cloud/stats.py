@@ -1,11 +1,16 @@
+from __future__ import annotations
 import discord
-import matplotlib.pyplot as plt
-import numpy as np
 from core import report, utils, Pagination
-from matplotlib.axes import Axes
-from matplotlib.patches import ConnectionPatch
-from pandas import DataFrame
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
+
+np = utils.lazy_import('numpy')
+pd = utils.lazy_import('pandas')
+plt = utils.lazy_import('matplotlib.pyplot')
+patches = utils.lazy_import('matplotlib.patches')
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from pandas import DataFrame
 
 
 class GuildPagination(Pagination):
@@ -157,7 +162,7 @@ class KDRatio(report.MultiGraphElement):
         else:
             series = data
         series = series.groupby('player_ucid').sum()
-        result = DataFrame()
+        result = pd.DataFrame()
         result['AI Kills'] = series['kills'] - series['pvp']
         result['Player Kills'] = series['pvp']
         result['Deaths by AI'] = series['deaths_planes'] + series['deaths_helicopters'] + series['deaths_ships'] + \
@@ -304,8 +309,8 @@ class KDRatio(report.MultiGraphElement):
             # draw top connecting line
             x = r * np.cos(np.pi / 180 * theta2) + center[0]
             y = r * np.sin(np.pi / 180 * theta2) + center[1]
-            con = ConnectionPatch(xyA=(-0.2 / 2, bar_height), coordsA=self.axes[2].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(-0.2 / 2, bar_height), coordsA=self.axes[2].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
@@ -314,8 +319,8 @@ class KDRatio(report.MultiGraphElement):
             # draw bottom connecting line
             x = r * np.cos(np.pi / 180 * theta1) + center[0]
             y = r * np.sin(np.pi / 180 * theta1) + center[1]
-            con = ConnectionPatch(xyA=(-0.2 / 2, 0), coordsA=self.axes[2].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(-0.2 / 2, 0), coordsA=self.axes[2].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
@@ -337,8 +342,8 @@ class KDRatio(report.MultiGraphElement):
             # draw top connecting line
             x = r * np.cos(np.pi / 180 * theta2) + center[0]
             y = r * np.sin(np.pi / 180 * theta2) + center[1]
-            con = ConnectionPatch(xyA=(0.2 / 2, 0), coordsA=self.axes[0].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(0.2 / 2, 0), coordsA=self.axes[0].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
@@ -347,8 +352,8 @@ class KDRatio(report.MultiGraphElement):
             # draw bottom connecting line
             x = r * np.cos(np.pi / 180 * theta1) + center[0]
             y = r * np.sin(np.pi / 180 * theta1) + center[1]
-            con = ConnectionPatch(xyA=(0.2 / 2, bar_height), coordsA=self.axes[0].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(0.2 / 2, bar_height), coordsA=self.axes[0].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
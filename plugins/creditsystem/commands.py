@@ -1,15 +1,30 @@
 import discord
 import psycopg2
 from contextlib import closing
-from core import utils, DCSServerBot, Plugin, PluginRequiredError, Server
-from discord.ext import commands
-from typing import Optional, cast, Union
+from core import utils, DCSServerBot, Plugin, PluginRequiredError, Server, TEventListener
+from discord.ext import commands, tasks
+from typing import Optional, cast, Union, Type
+from .ledger import CreditLedger
 from .listener import CreditSystemListener
 from .player import CreditPlayer
+from .rules import CreditRules
 
 
 class CreditSystemAgent(Plugin):
 
+    def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
+        super().__init__(bot, eventlistener)
+        self.ledger = CreditLedger(self)
+        self.rules: dict[str, CreditRules] = dict()
+        self.flush_ledger.start()
+
+    async def cog_unload(self):
+        self.flush_ledger.cancel()
+        await super().cog_unload()
+        # write all outstanding changes before the bot goes down
+        self.ledger.close()
+        await self.ledger.flush()
+
     def get_config(self, server: Server, *, use_cache: Optional[bool] = True) -> Optional[dict]:
         if server.name not in self._config or not use_cache:
             default, specific = self.get_base_config(server)
@@ -40,8 +55,19 @@ class CreditSystemAgent(Plugin):
                 self._config[server.name] = merged
             else:
                 return None
+            # the lookup tables are only compiled on (re-)load of the configuration
+            self.rules[server.name] = CreditRules(self._config[server.name])
         return self._config.get(server.name)
 
+    def get_rules(self, server: Server) -> Optional[CreditRules]:
+        if not self.get_config(server):
+            return None
+        return self.rules.get(server.name)
+
+    @tasks.loop(seconds=5.0)
+    async def flush_ledger(self):
+        await self.ledger.flush()
+
 
 class CreditSystemMaster(CreditSystemAgent):
 
@@ -103,6 +129,7 @@ class CreditSystemMaster(CreditSystemAgent):
             if not ucid:
                 await ctx.send(f"Use {ctx.prefix}linkme to link your account.")
                 return
+        await self.ledger.flush()
         data = self.get_credits(ucid)
         await ctx.message.delete()
         if len(data) == 0:
@@ -152,6 +179,7 @@ class CreditSystemMaster(CreditSystemAgent):
         if not receiver:
             await ctx.send('{} needs to properly link their DCS account to receive donations.'.format(utils.escape_string(to.display_name)))
             return
+        await self.ledger.flush()
         data = self.get_credits(receiver)
         if not data:
             await ctx.send('It seems like there is no campaign running on your server(s).')
@@ -226,6 +254,7 @@ class CreditSystemMaster(CreditSystemAgent):
         if not donor:
             await ctx.send(f'You need to properly link your DCS account to give donations!')
             return
+        await self.ledger.flush()
         data = self.get_credits(donor)
         if not len(data):
             await ctx.send(f"You can't donate credit points, as you don't have any.")
@@ -321,6 +350,7 @@ class CreditSystemMaster(CreditSystemAgent):
                 embed.add_field(name='Rank', value='n/a')
         ucid = self.bot.get_ucid_by_member(member, True)
         if ucid:
+            await self.ledger.flush()
             campaigns = {}
             for row in self.get_credits(ucid):
                 campaigns[row[1]] = {
@@ -0,0 +1,3 @@
+ALTER TABLE credits_log ADD COLUMN IF NOT EXISTS capture_xid BIGINT;
+DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'tgr_credits_log_capture_xid') THEN CREATE TRIGGER tgr_credits_log_capture_xid BEFORE INSERT OR UPDATE ON credits_log FOR EACH ROW EXECUTE PROCEDURE capture_xid(); END IF; END $$;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credits_log_capture_xid ON credits_log (capture_xid);
@@ -0,0 +1,111 @@
+from __future__ import annotations
+import asyncio
+import psycopg2
+import psycopg2.extras
+from contextlib import closing
+from core import Status
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from core import Plugin
+    from .player import CreditPlayer
+
+
+class CreditLedger:
+    """
+    Write-behind buffer for the credit points of online players.
+    The balance of a player is kept in the CreditPlayer object. Changed balances and credits_log entries are
+    collected here and written in a single transaction by the periodic flush, when a player leaves the server
+    and on shutdown. Point changes are sent to DCS after a short delay, so that a burst of changes (for instance a
+    multikill) results in a single message per player.
+    """
+    # seconds to collect point changes before they are sent to DCS
+    UPDATE_DELAY = 0.5
+
+    def __init__(self, plugin: Plugin):
+        self.log = plugin.log
+        self.pool = plugin.pool
+        self.loop = plugin.loop
+        # (campaign_id, ucid) => points
+        self.balances: dict[tuple[int, str], int] = dict()
+        # balances that are currently being written
+        self.inflight: dict[tuple[int, str], int] = dict()
+        self.entries: list[tuple] = []
+        # (server_name, ucid) => player
+        self.updates: dict[tuple[str, str], CreditPlayer] = dict()
+        self._pending: Optional[asyncio.TimerHandle] = None
+        self.lock = asyncio.Lock()
+
+    def get(self, campaign_id: int, ucid: str) -> Optional[int]:
+        key = (campaign_id, ucid)
+        return self.balances.get(key, self.inflight.get(key))
+
+    def set(self, player: CreditPlayer, campaign_id: int) -> None:
+        self.balances[(campaign_id, player.ucid)] = player.points
+        self.update(player)
+
+    def log_entry(self, player: CreditPlayer, campaign_id: int, event: str, old_points: int, remark: str) -> None:
+        self.entries.append((campaign_id, event, player.ucid, old_points, player.points, remark, datetime.now()))
+
+    def update(self, player: CreditPlayer) -> None:
+        self.updates[(player.server.name, player.ucid)] = player
+        if not self._pending:
+            self._pending = self.loop.call_later(self.UPDATE_DELAY, self._send_updates)
+
+    def _send_updates(self) -> None:
+        self._pending = None
+        updates, self.updates = self.updates, dict()
+        for player in updates.values():
+            if player.server.status not in [Status.RUNNING, Status.PAUSED]:
+                continue
+            # the latest balance is sent, no matter how many changes happened in between
+            player.server.sendtoDCS({
+                'command': 'updateUserPoints',
+                'ucid': player.ucid,
+                'points': player.points
+            })
+
+    def _write(self, balances: dict[tuple[int, str], int], entries: list[tuple]) -> bool:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                if balances:
+                    psycopg2.extras.execute_values(
+                        cursor, 'INSERT INTO credits (campaign_id, player_ucid, points) VALUES %s ON CONFLICT '
+                                '(campaign_id, player_ucid) DO UPDATE SET points = EXCLUDED.points',
+                        [(campaign_id, ucid, points) for (campaign_id, ucid), points in balances.items()])
+                if entries:
+                    # keep the time of the change, not the time of the flush
+                    psycopg2.extras.execute_values(
+                        cursor, 'INSERT INTO credits_log (campaign_id, event, player_ucid, old_points, new_points, '
+                                'remark, time) VALUES %s', entries)
+            conn.commit()
+            return True
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+            return False
+        finally:
+            self.pool.putconn(conn)
+
+    async def flush(self) -> None:
+        # flushes are serialized to keep the order of the changes
+        async with self.lock:
+            if not self.balances and not self.entries:
+                return
+            balances, self.balances = self.balances, dict()
+            entries, self.entries = self.entries, list()
+            self.inflight = balances
+            try:
+                if not await asyncio.to_thread(self._write, balances, entries):
+                    # retry with the next flush, balances that changed in between are newer
+                    self.balances = balances | self.balances
+                    self.entries = entries + self.entries
+            finally:
+                self.inflight = dict()
+
+    def close(self) -> None:
+        if self._pending:
+            self._pending.cancel()
+            self._pending = None
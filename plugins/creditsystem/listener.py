@@ -4,6 +4,7 @@ from contextlib import closing
 from core import EventListener, Server, Status, utils, event, chat_command, Player
 from typing import cast
 from .player import CreditPlayer
+from .rules import CreditRules
 
 
 class CreditSystemListener(EventListener):
@@ -27,24 +28,6 @@ class CreditSystemListener(EventListener):
     async def onMissionLoadEnd(self, server: Server, data: dict) -> None:
         self.load_params_into_mission(server)
 
-    @staticmethod
-    def get_points_per_kill(config: dict, data: dict) -> int:
-        default = 1
-        if 'points_per_kill' in config:
-            for unit in config['points_per_kill']:
-                if 'category' in unit and data['victimCategory'] != unit['category']:
-                    continue
-                if 'unit_type' in unit and unit['unit_type'] != data['arg5']:
-                    continue
-                if 'type' in unit and ((unit['type'] == 'AI' and int(data['arg4']) != -1) or
-                                       (unit['type'] == 'Player' and int(data['arg4']) == -1)):
-                    continue
-                if 'category' in unit or 'unit_type' in unit or 'type' in unit:
-                    return unit['points']
-                elif 'default' in unit:
-                    default = unit['default'] if data['victimCategory'] != 'Structures' else 0
-        return default if data['victimCategory'] != 'Structures' else 0
-
     @staticmethod
     def get_initial_points(player: CreditPlayer, config: dict) -> int:
         if not config or 'initial_points' not in config:
@@ -70,14 +53,17 @@ class CreditSystemListener(EventListener):
             player.points = self.get_initial_points(player, config)
             player.audit('init', player.points, 'Initial points received')
         else:
-            server.sendtoDCS({
-                'command': 'updateUserPoints',
-                'ucid': player.ucid,
-                'points': player.points
-            })
+            self.plugin.ledger.update(player)
         if config:
             player.sendChatMessage(f"{player.name}, you currently have {player.points} credit points.")
 
+    @event(name="onPlayerStop")
+    async def onPlayerStop(self, server: Server, data: dict) -> None:
+        if data['id'] == 1:
+            return
+        # make sure that the credits of a leaving player are written
+        await self.plugin.ledger.flush()
+
     @event(name="addUserPoints")
     async def addUserPoints(self, server: Server, data: dict) -> None:
         if data['points'] != 0:
@@ -107,28 +93,17 @@ class CreditSystemListener(EventListener):
         member = player.member
         if not member:
             return
-        config: dict = self.plugin.get_config(server)
-        if 'achievements' not in config:
+        rules: CreditRules = self.plugin.get_rules(server)
+        if not rules or not rules.achievements:
             return
 
         campaign_id, _ = utils.get_running_campaign(server)
         playtime = self.get_flighttime(player.ucid, campaign_id) / 3600.0
-        sorted_achievements = sorted(config['achievements'], key=lambda x: x['credits'], reverse=True)
-        role = None
-        for achievement in sorted_achievements:
-            if 'combined' in achievement and achievement['combined']:
-                if ('credits' in achievement and player.points >= achievement['credits']) and \
-                        ('playtime' in achievement and playtime >= achievement['playtime']):
-                    role = achievement['role']
-                    break
-            else:
-                if ('credits' in achievement and player.points >= achievement['credits']) or \
-                        ('playtime' in achievement and playtime >= achievement['playtime']):
-                    role = achievement['role']
-                    break
+        achievement = rules.get_achievement(player.points, playtime)
+        role = achievement['role'] if achievement else None
 
         if role:
-            for achievement in sorted_achievements:
+            for achievement in rules.achievements:
                 # does the member need to get that role?
                 if achievement['role'] == role and not utils.check_roles([achievement['role']], member):
                     try:
@@ -151,15 +126,15 @@ class CreditSystemListener(EventListener):
 
     @event(name="onGameEvent")
     async def onGameEvent(self, server: Server, data: dict) -> None:
-        config = self.plugin.get_config(server)
-        if not config or server.status != Status.RUNNING:
+        rules: CreditRules = self.plugin.get_rules(server)
+        if not rules or server.status != Status.RUNNING:
             return
         if data['eventName'] == 'kill':
             # players gain points only, if they don't kill themselves and no teamkills
             if data['arg1'] != -1 and data['arg1'] != data['arg4'] and data['arg3'] != data['arg6']:
+                ppk = rules.get_points_per_kill(data)
                 # Multicrew - pilot and all crew members gain points
                 for player in server.get_crew_members(server.get_player(id=data['arg1'])):  # type: CreditPlayer
-                    ppk = self.get_points_per_kill(config, data)
                     if ppk:
                         old_points = player.points
                         player.points += ppk
@@ -2,7 +2,7 @@ import psycopg2
 from contextlib import closing
 from core import Player, DataObjectFactory, utils, Plugin
 from dataclasses import field, dataclass
-from typing import cast
+from typing import Optional, cast
 
 
 @dataclass
@@ -15,22 +15,26 @@ class CreditPlayer(Player):
         super().__post_init__()
         if not self.active:
             return
+        campaign_id, _ = utils.get_running_campaign(self.server)
+        if not campaign_id:
+            return
+        plugin = self.plugin
+        # the balance might not have been written yet, if the player re-joins quickly
+        points = plugin.ledger.get(campaign_id, self.ucid) if plugin else None
+        if points is not None:
+            self._points = points
+            plugin.ledger.update(self)
+            return
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
                 # load credit points
-                campaign_id, _ = utils.get_running_campaign(self.server)
-                if not campaign_id:
-                    return
                 cursor.execute('SELECT points FROM credits WHERE campaign_id = %s AND player_ucid = %s',
                                (campaign_id, self.ucid))
                 if cursor.rowcount == 1:
                     self._points = cursor.fetchone()[0]
-                    self.server.sendtoDCS({
-                        'command': 'updateUserPoints',
-                        'ucid': self.ucid,
-                        'points': self._points
-                    })
+                    if plugin:
+                        plugin.ledger.update(self)
                 else:
                     self.log.debug(f'CreditPlayer: No entry found in credits table for player {self.name}({self.ucid})')
         except (Exception, psycopg2.DatabaseError) as error:
@@ -38,14 +42,19 @@ class CreditPlayer(Player):
         finally:
             self.pool.putconn(conn)
 
+    @property
+    def plugin(self) -> Optional[Plugin]:
+        # None, if the creditsystem plugin is not loaded (anymore)
+        return cast(Optional[Plugin], self.bot.cogs.get('CreditSystemMaster') or self.bot.cogs.get('CreditSystemAgent'))
+
     @property
     def points(self) -> int:
         return self._points
 
     @points.setter
     def points(self, p: int) -> None:
-        plugin = cast(Plugin, self.bot.cogs['CreditSystemMaster' if 'CreditSystemMaster' in self.bot.cogs else 'CreditSystemAgent'])
-        config = plugin.get_config(self.server)
+        plugin = self.plugin
+        config = plugin.get_config(self.server) if plugin else None
         if not config:
             self._points = p
             return
@@ -58,28 +67,18 @@ class CreditPlayer(Player):
         campaign_id, _ = utils.get_running_campaign(self.server)
         if not campaign_id:
             return
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute('INSERT INTO credits (campaign_id, player_ucid, points) VALUES (%s, %s, '
-                               '%s) ON CONFLICT (campaign_id, player_ucid) DO UPDATE SET points = EXCLUDED.points',
-                               (campaign_id, self.ucid, self._points))
-            conn.commit()
-            self.server.sendtoDCS({
-                'command': 'updateUserPoints',
-                'ucid': self.ucid,
-                'points': self._points
-            })
-        except (Exception, psycopg2.DatabaseError) as error:
-            conn.rollback()
-            self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
+        # the balance is written by the next flush of the ledger
+        plugin.ledger.set(self, campaign_id)
 
     def audit(self, event: str, old_points: int, remark: str):
         campaign_id, _ = utils.get_running_campaign(self.server)
         if not campaign_id:
             return
+        plugin = self.plugin
+        if plugin:
+            plugin.ledger.log_entry(self, campaign_id, event, old_points, remark)
+            return
+        # no ledger available, write the entry directly
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
@@ -0,0 +1,50 @@
+import bisect
+from itertools import product
+from typing import Optional
+
+
+class CreditRules:
+    """
+    Lookup tables compiled from the credit system configuration of a server.
+    The first matching points_per_kill entry in configuration order wins, as before, but the lookup is done
+    by key (category, type, unit_type) and its wildcard fallbacks instead of scanning the whole list on every kill.
+    """
+
+    def __init__(self, config: dict):
+        # (category, type, unit_type) => (position in the configuration, points), None is a wildcard
+        self.kills: dict[tuple[Optional[str], Optional[str], Optional[str]], tuple[int, int]] = dict()
+        self.default = 1
+        for idx, unit in enumerate(config.get('points_per_kill', [])):
+            if 'category' in unit or 'unit_type' in unit or 'type' in unit:
+                # only AI and Player restrict the type of the victim
+                _type = unit['type'] if unit.get('type') in ['AI', 'Player'] else None
+                self.kills.setdefault((unit.get('category'), _type, unit.get('unit_type')), (idx, unit['points']))
+            elif 'default' in unit:
+                self.default = unit['default']
+        # achievements ordered by credits, highest first
+        self.achievements: list[dict] = sorted(config.get('achievements', []), key=lambda x: x['credits'],
+                                               reverse=True)
+        self._credits = [-x['credits'] for x in self.achievements]
+
+    def get_points_per_kill(self, data: dict) -> int:
+        category = data['victimCategory']
+        _type = 'AI' if int(data['arg4']) == -1 else 'Player'
+        match = None
+        for key in product((category, None), (_type, None), (data['arg5'], None)):
+            rule = self.kills.get(key)
+            if rule and (not match or rule[0] < match[0]):
+                match = rule
+        if match:
+            return match[1]
+        return self.default if category != 'Structures' else 0
+
+    def get_achievement(self, points: int, playtime: float) -> Optional[dict]:
+        # achievements from this position on are reached by credits
+        idx = bisect.bisect_left(self._credits, -points)
+        for achievement in self.achievements[:idx]:
+            if not achievement.get('combined') and 'playtime' in achievement and playtime >= achievement['playtime']:
+                return achievement
+        for achievement in self.achievements[idx:]:
+            if not achievement.get('combined') or ('playtime' in achievement and playtime >= achievement['playtime']):
+                return achievement
+        return None
@@ -1,11 +1,14 @@
+import asyncio
+import gzip
 import json
 import os
 import psycopg2
+import shutil
 from contextlib import closing
 from core import Plugin, DCSServerBot, TEventListener, utils
 from discord.ext import tasks, commands
 from os import path
-from typing import Type, List
+from typing import Type, List, Optional, Any
 
 
 class DBExporter(Plugin):
@@ -14,29 +17,87 @@ class DBExporter(Plugin):
         super().__init__(bot, eventlistener)
         if not path.exists('./export'):
             os.makedirs('./export')
-        if 'config' in self.locals and 'autoexport' in self.locals['config'] and \
-                self.locals['config']['autoexport'] is True:
+        self.config = self.locals.get('config', {})
+        self.lock = asyncio.Lock()
+        if self.config.get('autoexport', False) is True:
             self.schedule.start()
 
     async def cog_unload(self):
-        if 'config' in self.locals and 'autoexport' in self.locals['config'] and \
-                self.locals['configs']['autoexport'] is True:
-            self.schedule.cancel()
+        self.schedule.cancel()
         await super().cog_unload()
 
+    @staticmethod
+    def read_state() -> dict:
+        # the last exported value of the incremental column per table
+        file = 'export/.state.json'
+        if not path.exists(file):
+            return {}
+        with open(file) as f:
+            return json.load(f)
+
+    @staticmethod
+    def write_state(state: dict) -> None:
+        with open('export/.state.json.tmp', 'w') as f:
+            json.dump(state, f, default=str)
+        os.replace('export/.state.json.tmp', 'export/.state.json')
+
+    def export_table(self, conn, table: str, column: Optional[str] = None, since: Optional[Any] = None) -> Optional[Any]:
+        compress = self.config.get('compress', False)
+        filename = f'export/{table}.json' + ('.gz' if compress else '')
+        tmpfile = filename + '.tmp'
+        sql = f'SELECT ROW_TO_JSON(t)::TEXT' + (f', t."{column}"' if column else '') + f' FROM "{table}" t'
+        if since is not None:
+            sql += f' WHERE t."{column}" > %s'
+        if column:
+            sql += f' ORDER BY t."{column}"'
+        rows = 0
+        last = since
+        # a server-side cursor keeps only one batch of rows in memory
+        with closing(conn.cursor(name=f'export_{table}')) as cursor:
+            cursor.itersize = 10000
+            cursor.execute(sql, (since, ) if since is not None else None)
+            with (gzip.open(tmpfile, 'wt', encoding='utf-8') if compress
+                  else open(tmpfile, 'w', encoding='utf-8')) as file:
+                for row in cursor:
+                    file.write(row[0] + '\n')
+                    if column:
+                        last = row[1]
+                    rows += 1
+        if not rows:
+            os.remove(tmpfile)
+        elif since is not None:
+            # concatenated gzip members are a valid gzip file, so both formats can be appended to
+            with open(tmpfile, 'rb') as src, open(filename, 'ab') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(tmpfile)
+        else:
+            os.replace(tmpfile, filename)
+        return last
+
     def do_export(self, table_filter: List[str]):
+        # tables that are only appended to, with the column that increases with every new row
+        incremental: dict[str, str] = self.config.get('incremental', {})
+        compress = self.config.get('compress', False)
+        state = self.read_state()
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
                 cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public' AND "
-                               "table_name not in ('pu_events_sdw', 'servers', 'message_persistence')")
-                for table in (x[0] for x in cursor.fetchall() if x[0] not in table_filter):
-                    cursor.execute(f'SELECT ROW_TO_JSON(t) FROM (SELECT * FROM {table}) t')
-                    if cursor.rowcount > 0:
-                        with open(f'export/{table}.json', 'w') as file:
-                            file.writelines([json.dumps(x[0]) + '\n' for x in cursor.fetchall()])
+                               "table_name not in ('pu_points', 'servers', 'message_persistence')")
+                tables = [x[0] for x in cursor.fetchall() if x[0] not in table_filter]
+            for table in tables:
+                column = incremental.get(table)
+                since = None
+                if column and path.exists(f'export/{table}.json' + ('.gz' if compress else '')):
+                    since = state.get(table)
+                last = self.export_table(conn, table, column, since)
+                if column and last is not None:
+                    state[table] = last
+                    self.write_state(state)
+            conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
+            conn.rollback()
         finally:
             self.pool.putconn(conn)
 
@@ -44,12 +105,14 @@ class DBExporter(Plugin):
     @utils.has_role('Admin')
     @commands.guild_only()
     async def export(self, ctx):
-        self.do_export([])
+        async with self.lock:
+            await asyncio.to_thread(self.do_export, [])
         await ctx.send('Database dumped to ./export')
 
     @tasks.loop(hours=1.0)
     async def schedule(self):
-        self.do_export(self.locals['config']['tablefilter'] if ('config' in self.locals and 'tablefilter' in self.locals['config']) else [])
+        async with self.lock:
+            await asyncio.to_thread(self.do_export, self.config.get('tablefilter', []))
 
 
 async def setup(bot: DCSServerBot):
@@ -1,10 +1,15 @@
+from __future__ import annotations
 import os
 import discord
 import sys
 import uuid
-import matplotlib.figure
-from core import EventListener, Plugin, Server, event
-from matplotlib import pyplot as plt
+from core import EventListener, Plugin, Server, event, utils
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+plt = utils.lazy_import('matplotlib.pyplot')
 
 
 class FunkManEventListener(EventListener):
@@ -90,13 +95,13 @@ class FunkManEventListener(EventListener):
         return embed
 
     @staticmethod
-    def save_fig(fig: matplotlib.figure.Figure) -> str:
+    def save_fig(fig: Figure) -> str:
         filename = f'{uuid.uuid4()}.png'
         fig.savefig(filename, bbox_inches='tight', facecolor='#2C2F33')
         plt.close(fig)
         return filename
 
-    async def send_fig(self, server: Server, fig: matplotlib.figure.Figure, channel: str):
+    async def send_fig(self, server: Server, fig: Figure, channel: str):
         filename = self.save_fig(fig)
         try:
             config = self.plugin.get_config(server)
@@ -28,6 +28,7 @@ class GameMasterAgent(Plugin):
             with closing(conn.cursor()) as cursor:
                 cursor.execute('UPDATE campaigns_servers SET server_name = %s WHERE server_name = %s', (new_name, old_name))
             conn.commit()
+            utils.invalidate_running_campaigns(old_name)
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
             conn.rollback()
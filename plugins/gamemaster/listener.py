@@ -140,6 +140,8 @@ class GameMasterEventListener(EventListener):
                     cursor.execute('DELETE FROM campaigns_servers WHERE campaign_id = %s', (campaign_id,))
                     cursor.execute('DELETE FROM campaigns WHERE id = %s', (campaign_id,))
             conn.commit()
+            # campaigns are addressed by name, so any server could be affected
+            utils.invalidate_running_campaigns()
         except (Exception, psycopg2.DatabaseError):
             conn.rollback()
             raise
@@ -1,3 +1,4 @@
+import asyncio
 import discord
 import json
 import os
@@ -13,6 +14,7 @@ from discord.ui import View, Select, Modal, TextInput, Item
 from os import path
 from typing import Optional, Union, List, Type, Any
 from .listener import GreenieBoardEventListener
+from .locator import archive_trapsheets, normalize_path, remove_archived
 
 
 class GreenieBoardAgent(Plugin):
@@ -23,6 +25,7 @@ class GreenieBoardAgent(Plugin):
 
     async def cog_unload(self):
         self.auto_delete.cancel()
+        await super().cog_unload()
 
     def get_config(self, server: Server, *, use_cache: Optional[bool] = True) -> Optional[dict]:
         if server.name not in self._config or not use_cache:
@@ -78,6 +81,8 @@ class GreenieBoardAgent(Plugin):
                 cursor.execute('UPDATE message_persistence SET embed_name = %s '
                                'WHERE embed_name = %s AND server_name IN (%s, %s)',
                                (f'greenieboard-{new_name}', f'greenieboard-{old_name}', old_name, new_name))
+                cursor.execute('UPDATE greenieboard_history SET server_name = %s WHERE server_name = %s',
+                               (new_name, old_name))
             conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
@@ -85,6 +90,30 @@ class GreenieBoardAgent(Plugin):
         finally:
             self.pool.putconn(conn)
 
+    def move_trapsheets(self, moved: list[tuple[str, str]]) -> bool:
+        if not moved:
+            return True
+        targets = {normalize_path(old): new for old, new in moved}
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                # the stored paths might differ from the archived ones, so they are compared normalized
+                cursor.execute(r"SELECT DISTINCT trapsheet FROM greenieboard "
+                               r"WHERE regexp_replace(trapsheet, '^.*[\\/]', '') = ANY(%s)",
+                               (list({os.path.basename(old) for old, _ in moved}), ))
+                updates = [(targets[normalize_path(row[0])], row[0]) for row in cursor.fetchall()
+                           if normalize_path(row[0]) in targets]
+                cursor.executemany('UPDATE greenieboard SET trapsheet = %s WHERE trapsheet = %s', updates)
+            conn.commit()
+            self.log.debug(f'GreenieBoard: {len(moved)} trapsheets archived.')
+            return True
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            conn.rollback()
+            return False
+        finally:
+            self.pool.putconn(conn)
+
     @tasks.loop(hours=24.0)
     async def auto_delete(self):
         def do_delete(path: str, days: int):
@@ -98,9 +127,20 @@ class GreenieBoardAgent(Plugin):
             for server in self.bot.servers.values():
                 config = self.get_config(server)
                 basedir = os.path.expandvars(self.bot.config[server.installation]['DCS_HOME'])
-                if 'Moose.AIRBOSS' in config and 'delete_after' in config['Moose.AIRBOSS']:
+                if 'Moose.AIRBOSS' in config and ('delete_after' in config['Moose.AIRBOSS'] or
+                                                  'archive_after' in config['Moose.AIRBOSS']):
                     basedir += os.path.sep + config['Moose.AIRBOSS']['basedir'] if 'basedir' in config['Moose.AIRBOSS'] else ''
-                    do_delete(basedir, config['Moose.AIRBOSS']['delete_after'])
+                    if 'archive_after' in config['Moose.AIRBOSS']:
+                        moved = await asyncio.to_thread(archive_trapsheets, basedir,
+                                                        config['Moose.AIRBOSS']['archive_after'])
+                        # keep the files, until they are not referenced anymore
+                        if self.move_trapsheets(moved):
+                            await asyncio.to_thread(remove_archived, moved)
+                    if 'delete_after' in config['Moose.AIRBOSS']:
+                        # archived trapsheets and cached renders are deleted by age as well
+                        for path in [basedir, os.path.join(basedir, 'archive'), os.path.join(basedir, 'renders')]:
+                            if os.path.exists(path):
+                                do_delete(path, config['Moose.AIRBOSS']['delete_after'])
                 elif 'FunkMan' in config and 'delete_after' in config['FunkMan']:
                     basedir += os.path.sep + config['FunkMan']['basedir'] if 'basedir' in config['FunkMan'] else ''
                     do_delete(basedir, config['FunkMan']['delete_after'])
@@ -1,3 +1,10 @@
 CREATE TABLE IF NOT EXISTS greenieboard (id SERIAL PRIMARY KEY, mission_id INTEGER NOT NULL, player_ucid TEXT NOT NULL, unit_type TEXT NOT NULL, grade TEXT NOT NULL, comment TEXT NOT NULL, place TEXT NOT NULL, trapcase INTEGER NOT NULL, wire INTEGER, night BOOLEAN NOT NULL, points DECIMAL, trapsheet TEXT, time TIMESTAMP NOT NULL DEFAULT NOW());
 CREATE INDEX IF NOT EXISTS idx_greenieboard_ucid ON greenieboard(player_ucid);
 INSERT INTO greenieboard (mission_id, player_ucid, unit_type, grade, comment, place, trapcase, wire, night, points, time) SELECT mission_id, init_id, init_type, grade, comment, place, 1, wire, FALSE, CASE WHEN grade = '_OK_' THEN 5 WHEN grade = 'OK' THEN 4 WHEN grade = '(OK)' THEN 3 WHEN grade = 'B' THEN 2.5 WHEN grade IN('--', 'OWO', 'WOP') THEN 2 WHEN grade IN ('WO', 'LIG') THEN 1 WHEN grade = 'C' THEN 0 END AS points, time FROM (SELECT mission_id, init_id, init_type, REPLACE(SUBSTRING(comment, 'LSO: GRADE:([_\(\)-BCKOW]{1,4})'), '---', '--') AS grade, REGEXP_REPLACE(TRIM(REGEXP_REPLACE(comment, 'LSO: GRADE:.*:', '')), 'WIRE# [1234]', '') as comment, place, substring(comment FROM NULLIF(position('WIRE' IN comment), 0) + 6 FOR 1)::INTEGER as wire, time FROM missionstats WHERE event LIKE '%QUALITY%') AS landings;
+CREATE TABLE IF NOT EXISTS greenieboard_history (player_ucid TEXT NOT NULL, server_name TEXT NOT NULL, points DECIMAL, grades TEXT[] NOT NULL, nights BOOLEAN[] NOT NULL, time TIMESTAMP NOT NULL, PRIMARY KEY (player_ucid, server_name));
+CREATE INDEX IF NOT EXISTS idx_greenieboard_history_points ON greenieboard_history(server_name, points DESC);
+CREATE OR REPLACE FUNCTION greenieboard_history_refresh(ucid TEXT, server TEXT) RETURNS void AS $$ BEGIN INSERT INTO greenieboard_history (player_ucid, server_name, points, grades, nights, time) SELECT ucid, server, AVG(g.points), ARRAY_AGG(TRIM(g.grade) ORDER BY g.id DESC), ARRAY_AGG(g.night ORDER BY g.id DESC), MAX(g.time) FROM (SELECT id, points, grade, night, time FROM greenieboard WHERE player_ucid = ucid AND (server = '' OR mission_id IN (SELECT id FROM missions WHERE server_name = server)) ORDER BY id DESC LIMIT 10) g HAVING COUNT(*) > 0 ON CONFLICT (player_ucid, server_name) DO UPDATE SET points = excluded.points, grades = excluded.grades, nights = excluded.nights, time = excluded.time; IF NOT FOUND THEN DELETE FROM greenieboard_history WHERE player_ucid = ucid AND server_name = server; END IF; END; $$ LANGUAGE 'plpgsql';
+CREATE OR REPLACE FUNCTION greenieboard_history_update() RETURNS trigger AS $$ BEGIN IF (TG_OP IN ('UPDATE', 'DELETE')) THEN PERFORM greenieboard_history_refresh(OLD.player_ucid, ''); PERFORM greenieboard_history_refresh(OLD.player_ucid, server_name) FROM missions WHERE id = OLD.mission_id; END IF; IF (TG_OP IN ('INSERT', 'UPDATE')) THEN PERFORM greenieboard_history_refresh(NEW.player_ucid, ''); PERFORM greenieboard_history_refresh(NEW.player_ucid, server_name) FROM missions WHERE id = NEW.mission_id; END IF; RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+SELECT greenieboard_history_refresh(player_ucid, '') FROM (SELECT DISTINCT player_ucid FROM greenieboard) AS x;
+SELECT greenieboard_history_refresh(player_ucid, server_name) FROM (SELECT DISTINCT g.player_ucid, m.server_name FROM greenieboard g, missions m WHERE g.mission_id = m.id) AS x;
+CREATE TRIGGER tgr_greenieboard_history_update AFTER INSERT OR UPDATE OR DELETE ON greenieboard FOR EACH ROW EXECUTE PROCEDURE greenieboard_history_update();
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import psycopg2
 import re
@@ -5,13 +6,14 @@ import string
 import sys
 import uuid
 from contextlib import closing
-from core import EventListener, Server, Player, Channel, Side, Plugin, PersistentReport, event
-from matplotlib import pyplot as plt
-from pathlib import Path
+from core import EventListener, Server, Player, Channel, Side, Plugin, PersistentReport, event, utils
 from plugins.creditsystem.player import CreditPlayer
 from plugins.greenieboard import get_element
+from plugins.greenieboard.locator import TrapsheetIndex
 from typing import Optional, cast
 
+plt = utils.lazy_import('matplotlib.pyplot')
+
 
 class GreenieBoardEventListener(EventListener):
 
@@ -28,15 +30,31 @@ class GreenieBoardEventListener(EventListener):
         }
     }
 
+    # landings within this number of seconds only update the boards once
+    UPDATE_DELAY = 10
+
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
+        # boards with a pending update, None is the global board
+        self.pending: dict[Optional[str], asyncio.Task] = dict()
+        # trapsheet directories, that are watched already
+        self.indexes: dict[str, TrapsheetIndex] = dict()
         config = self.locals['configs'][0]
         if 'FunkMan' in config:
             sys.path.append(config['FunkMan']['install'])
             from funkman.funkplot.funkplot import FunkPlot
             self.funkplot = FunkPlot(ImagePath=config['FunkMan']['IMAGEPATH'])
 
+    async def shutdown(self):
+        for index in self.indexes.values():
+            index.stop()
+        self.indexes.clear()
+
     async def update_greenieboard(self, server: Server):
+        await self.update_server_board(server)
+        await self.update_global_board()
+
+    async def update_server_board(self, server: Server):
         # shall we render the server specific board?
         config = self.plugin.get_config(server)
         if 'persistent_channel' in config and config.get('persistent_board', True):
@@ -45,6 +63,8 @@ class GreenieBoardEventListener(EventListener):
             report = PersistentReport(self.bot, self.plugin_name, 'greenieboard.json',
                                       server, f'greenieboard-{server.name}', channel_id=channel_id)
             await report.render(server_name=server.name, num_rows=num_rows)
+
+    async def update_global_board(self):
         # shall we render the global board?
         config = self.locals['configs'][0]
         if 'persistent_channel' in config and config.get('persistent_board', True):
@@ -55,6 +75,23 @@ class GreenieBoardEventListener(EventListener):
                                       server, f'greenieboard', channel_id=channel_id)
             await report.render(server_name=None, num_rows=num_rows)
 
+    def schedule_update(self, server: Server):
+        for name in [server.name, None]:
+            if name not in self.pending:
+                self.pending[name] = asyncio.create_task(self.delayed_update(server, name))
+
+    async def delayed_update(self, server: Server, name: Optional[str]):
+        await asyncio.sleep(self.UPDATE_DELAY)
+        # landings from now on need another update
+        del self.pending[name]
+        try:
+            if name:
+                await self.update_server_board(server)
+            else:
+                await self.update_global_board()
+        except Exception as ex:
+            self.log.exception(ex)
+
     async def send_chat_message(self, player: Player, data: dict):
         server: Server = self.bot.servers[data['server_name']]
         events_channel = server.get_channel(Channel.EVENTS)
@@ -128,13 +165,16 @@ class GreenieBoardEventListener(EventListener):
                 carrier=carrier, name=name, unit_type=player.unit_type, number='*')
         else:
             filename = data['trapsheet'] + "_{unit_type}*.csv".format(unit_type=player.unit_type)
-        p = Path(dirname)
         try:
-            return max(p.glob(filename), key=lambda x: x.stat().st_mtime).__str__()
+            if dirname not in self.indexes:
+                self.indexes[dirname] = TrapsheetIndex(dirname)
+            trapsheet = self.indexes[dirname].find(filename)
         except Exception as ex:
             self.log.exception(ex)
+            trapsheet = None
+        if not trapsheet:
             self.log.error(f'GreenieBoard: No trapsheet with pattern ({filename}) could be found!')
-            return None
+        return trapsheet
 
     def process_airboss_event(self, config: dict, server: Server, player: Player, data: dict):
         data['grade'] = self.normalize_airboss_lso_rating(data['grade'])
@@ -190,7 +230,7 @@ class GreenieBoardEventListener(EventListener):
                 update = True
             if update:
                 await self.send_chat_message(player, data)
-                await self.update_greenieboard(server)
+                self.schedule_update(server)
 
     @event(name="moose_lso_grade")
     async def moose_lso_grade(self, server: Server, data: dict) -> None:
@@ -199,4 +239,4 @@ class GreenieBoardEventListener(EventListener):
         if player:
             self.process_funkman_event(config, server, player, data)
             await self.send_chat_message(player, data)
-            await self.update_greenieboard(server)
+            self.schedule_update(server)
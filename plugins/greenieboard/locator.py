@@ -0,0 +1,175 @@
+import glob
+import os
+import re
+import threading
+import time
+import zipfile
+from contextlib import suppress
+from datetime import datetime
+from typing import Optional
+from watchdog.events import FileSystemEventHandler, FileSystemEvent, FileSystemMovedEvent
+from watchdog.observers import Observer
+
+# number of trapsheet renders to keep and their maximum age in days
+MAX_RENDERS = 500
+RENDERS_MAX_AGE = 30
+
+
+class TrapsheetIndex(FileSystemEventHandler):
+    """
+    In-memory index of the trapsheets in a directory.
+    Moose.AIRBOSS numbers the trapsheets of a player and aircraft (<prefix>_<unit_type>-0001.csv, ...), so the index
+    keeps the latest sheet per prefix. The directory is listed once and then watched for changes.
+    """
+    SEQUENCE = re.compile(r'^(.+)-\d+\.csv$', re.IGNORECASE)
+    # the trapsheet of a pass is written right before the LSO grade is sent
+    MAX_AGE = 60
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.latest: dict[str, tuple[float, str]] = dict()
+        self.lock = threading.Lock()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    self.add(entry.path, entry.stat().st_mtime)
+        self.observer = Observer()
+        self.observer.schedule(self, directory, recursive=False)
+        self.observer.start()
+
+    def stop(self):
+        self.observer.stop()
+        self.observer.join()
+
+    @staticmethod
+    def get_key(pattern: str) -> str:
+        # "*AIRBOSS-Stennis_Trapsheet-Player_FA-18C_hornet*.csv" => "airboss-stennis_trapsheet-player_fa-18c_hornet"
+        if pattern.lower().endswith('.csv'):
+            pattern = pattern[:-4]
+        return pattern.strip('*').lower()
+
+    def add(self, path: str, mtime: Optional[float] = None):
+        match = self.SEQUENCE.match(os.path.basename(path))
+        if not match:
+            return
+        key = match.group(1).lower()
+        try:
+            mtime = mtime or os.stat(path).st_mtime
+        except FileNotFoundError:
+            return
+        with self.lock:
+            if key not in self.latest or self.latest[key][0] <= mtime:
+                self.latest[key] = (mtime, path)
+
+    def remove(self, path: str):
+        match = self.SEQUENCE.match(os.path.basename(path))
+        if not match:
+            return
+        key = match.group(1).lower()
+        with self.lock:
+            # the next lookup falls back to the directory
+            if key in self.latest and self.latest[key][1] == path:
+                del self.latest[key]
+
+    def on_created(self, event: FileSystemEvent):
+        self.add(os.path.normpath(event.src_path))
+
+    def on_modified(self, event: FileSystemEvent):
+        self.add(os.path.normpath(event.src_path))
+
+    def on_moved(self, event: FileSystemMovedEvent):
+        self.remove(os.path.normpath(event.src_path))
+        self.add(os.path.normpath(event.dest_path))
+
+    def on_deleted(self, event: FileSystemEvent):
+        self.remove(os.path.normpath(event.src_path))
+
+    def find(self, pattern: str) -> Optional[str]:
+        with self.lock:
+            latest = self.latest.get(self.get_key(pattern))
+        if latest and latest[0] > time.time() - self.MAX_AGE:
+            return latest[1]
+        # unknown or old, the watcher might not have seen the new sheet yet
+        files = glob.glob(os.path.join(self.directory, pattern))
+        if not files:
+            return latest[1] if latest else None
+        path = max(files, key=lambda x: os.stat(x).st_mtime)
+        self.add(path)
+        return path
+
+
+def get_trapsheet_dir(path: str) -> str:
+    # archived trapsheets live in <dir>/archive/<bundle>.zip/<trapsheet>
+    dirname = os.path.dirname(path)
+    if dirname.lower().endswith('.zip'):
+        return os.path.dirname(os.path.dirname(dirname))
+    return dirname
+
+
+def trapsheet_exists(path: str) -> bool:
+    if os.path.exists(path):
+        return True
+    bundle = os.path.dirname(path)
+    if not os.path.isfile(bundle) or not zipfile.is_zipfile(bundle):
+        return False
+    with zipfile.ZipFile(bundle) as zf:
+        return os.path.basename(path) in zf.namelist()
+
+
+def read_trapsheet_data(path: str) -> bytes:
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            return file.read()
+    with zipfile.ZipFile(os.path.dirname(path)) as zf:
+        return zf.read(os.path.basename(path))
+
+
+def prune_renders(directory: str, max_files: int = MAX_RENDERS, max_age: int = RENDERS_MAX_AGE) -> None:
+    # the render cache is limited in size and age, the least recently used renders are deleted first
+    cutoff = time.time() - max_age * 86400
+    with os.scandir(directory) as entries:
+        renders = sorted((entry.stat().st_mtime, entry.path) for entry in entries
+                         if entry.is_file() and entry.name.endswith('.png'))
+    for i, (mtime, path) in enumerate(renders):
+        if mtime < cutoff or i < len(renders) - max_files:
+            with suppress(FileNotFoundError):
+                os.remove(path)
+
+
+def normalize_path(path: str) -> str:
+    # paths might be stored with environment variables, other separators or a different case
+    return os.path.normcase(os.path.normpath(os.path.expandvars(path)))
+
+
+def archive_trapsheets(directory: str, days: int) -> list[tuple[str, str]]:
+    """
+    Copies all trapsheets that are older than the given number of days into monthly zip bundles below
+    <directory>/archive. Returns the old and new paths of the archived trapsheets. The original files are not removed,
+    call remove_archived() when the references to them have been changed.
+    """
+    directory = os.path.normpath(os.path.expandvars(directory))
+    archive = os.path.join(directory, 'archive')
+    cutoff = time.time() - days * 86400
+    bundles: dict[str, list[os.DirEntry]] = dict()
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith('.csv') and entry.stat().st_mtime < cutoff:
+                month = datetime.fromtimestamp(entry.stat().st_mtime).strftime('%Y-%m')
+                bundles.setdefault(month, []).append(entry)
+    moved = []
+    for month, entries in bundles.items():
+        os.makedirs(archive, exist_ok=True)
+        bundle = os.path.join(archive, month + '.zip')
+        with zipfile.ZipFile(bundle, 'a', compression=zipfile.ZIP_DEFLATED) as zf:
+            names = set(zf.namelist())
+            for entry in entries:
+                if entry.name not in names:
+                    zf.write(entry.path, entry.name)
+                moved.append((entry.path, os.path.join(bundle, entry.name)))
+    return moved
+
+
+def remove_archived(moved: list[tuple[str, str]]) -> None:
+    for old, _ in moved:
+        if os.path.exists(old):
+            os.remove(old)
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import psycopg2
 import re
@@ -6,7 +7,10 @@ from core import report, Side, utils, EmbedElement, NothingToPlot
 from datetime import datetime
 from plugins.userstats.filter import StatisticsFilter
 from . import ERRORS, DISTANCE_MARKS, GRADES, const
-from .trapsheet import plot_trapsheet, read_trapsheet, parse_filename
+from .locator import get_trapsheet_dir, read_trapsheet_data, trapsheet_exists, prune_renders
+from .trapsheet import plot_trapsheet, parse_trapsheet, parse_filename
+
+plt = utils.lazy_import('matplotlib.pyplot')
 
 
 class LSORating(report.EmbedElement):
@@ -109,13 +113,28 @@ class TrapSheet(report.MultiGraphElement):
         if 'trapsheet' not in landing or not landing['trapsheet']:
             raise NothingToPlot()
         trapsheet = landing['trapsheet']
-        if not os.path.exists(landing['trapsheet']):
+        if not trapsheet_exists(landing['trapsheet']):
             self.log.error(f"Can't read trapsheet {landing['trapsheet']}, file not found.")
             return
         if landing['trapsheet'].endswith('.csv'):
-            ts = read_trapsheet(trapsheet)
-            ps = parse_filename(trapsheet)
-            plot_trapsheet(self.axes, ts, ps, trapsheet)
+            data = read_trapsheet_data(trapsheet)
+            # the plot depends on the content and the name of the trapsheet only, so it is rendered once
+            digest = hashlib.sha256(os.path.basename(trapsheet).encode('utf-8') + data).hexdigest()
+            filename = os.path.join(get_trapsheet_dir(trapsheet), 'renders', digest + '.png')
+            if not os.path.exists(filename):
+                ts = parse_trapsheet(data.decode('utf-8', errors='replace'))
+                ps = parse_filename(trapsheet)
+                plot_trapsheet(self.axes, ts, ps, trapsheet)
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                self.env.figure.subplots_adjust(hspace=0.5, wspace=0.5)
+                self.env.figure.savefig(filename + '.tmp', format='png', bbox_inches='tight', facecolor='#2C2F33')
+                os.replace(filename + '.tmp', filename)
+                prune_renders(os.path.dirname(filename))
+            else:
+                # keep the renders that are in use
+                os.utime(filename)
+            plt.close(self.env.figure)
+            self.env.filename = filename
         elif landing['trapsheet'].endswith('.png'):
             self.env.filename = landing['trapsheet']
         else:
@@ -170,36 +189,26 @@ class GreenieBoard(EmbedElement):
     def render(self, server_name: str, num_rows: int):
         conn = self.pool.getconn()
         try:
-            sql1 = 'SELECT g.player_ucid, p.name, g.points, MAX(g.time) AS time FROM (' \
-                   'SELECT player_ucid, ROW_NUMBER() OVER w AS rn, AVG(points) OVER w AS points, MAX(time) ' \
-                   'OVER w AS time FROM greenieboard'
-            sql2 = 'SELECT TRIM(grade) as "grade", night FROM greenieboard WHERE player_ucid = %s'
             if server_name:
                 self.embed.description = utils.escape_string(server_name)
-                sql1 += f" WHERE mission_id in (SELECT id FROM missions WHERE server_name = '{server_name}')"
-                sql2 += f" AND mission_id in (SELECT id FROM missions WHERE server_name = '{server_name}')"
-            sql1 += ' WINDOW w AS (PARTITION BY player_ucid ORDER BY ID DESC ROWS BETWEEN CURRENT ROW AND 9 FOLLOWING)) ' \
-                    'g, players p WHERE g.player_ucid = p.ucid AND g.rn = 1 GROUP BY 1, 2, 3 ORDER BY 3 DESC LIMIT %s'
-            sql2 += ' ORDER BY ID DESC LIMIT 10'
-
             with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
-                cursor.execute(sql1, (num_rows, ))
+                # greenieboard_history holds the last 10 landings of every pilot, per server and overall ('')
+                cursor.execute('SELECT p.name, h.points, h.grades, h.nights, h.time FROM greenieboard_history h, '
+                               'players p WHERE h.player_ucid = p.ucid AND h.server_name = %s '
+                               'ORDER BY h.points DESC LIMIT %s', (server_name or '', num_rows))
                 if cursor.rowcount > 0:
                     pilots = points = landings = ''
                     max_time = datetime.fromisocalendar(1970, 1, 1)
                     for row in cursor.fetchall():
                         pilots += utils.escape_string(row['name']) + '\n'
                         points += f"{row['points']:.2f}\n"
-                        cursor.execute(sql2, (row['player_ucid'], ))
-                        i = 0
                         landings += '**|'
-                        for landing in cursor.fetchall():
-                            if landing['night']:
-                                landings += const.NIGHT_EMOJIS[landing['grade']] + '|'
+                        for grade, night in zip(row['grades'], row['nights']):
+                            if night:
+                                landings += const.NIGHT_EMOJIS[grade] + '|'
                             else:
-                                landings += const.DAY_EMOJIS[landing['grade']] + '|'
-                            i += 1
-                        for i in range(i, 10):
+                                landings += const.DAY_EMOJIS[grade] + '|'
+                        for i in range(len(row['grades']), 10):
                             landings += const.DAY_EMOJIS[None] + '|'
                         landings += '**\n'
                         if row['time'] > max_time:
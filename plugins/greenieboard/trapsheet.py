@@ -1,11 +1,18 @@
+from __future__ import annotations
 import csv
 import datetime
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from numpy import ndarray
-from matplotlib.axes import Axes
+import io
+from core import utils
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+np = utils.lazy_import('numpy')
+plt = utils.lazy_import('matplotlib.pyplot')
+patches = utils.lazy_import('matplotlib.patches')
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from matplotlib.axes import Axes
 
 ######################################################
 # This file has been taken and amended from HypeMan! #
@@ -13,22 +20,25 @@ from pathlib import Path
 
 
 def read_trapsheet(filename: str) -> dict[str, ndarray]:
-    # read a trap sheet into a dictionary as numpy arrays
-    d = {}
     with open(filename) as f:
-        reader = csv.DictReader(f)
-
-        for k in reader.fieldnames:
-            d[k] = np.array([])
-
-        for row in reader:
-            for k in reader.fieldnames:
-                svalue = row[k]
-                try:
-                    fvalue = float(svalue)
-                    d[k] = np.append(d[k], fvalue)
-                except ValueError:
-                    d[k] = svalue
+        return parse_trapsheet(f.read())
+
+
+def parse_trapsheet(data: str) -> dict[str, ndarray]:
+    # read a trap sheet into a dictionary as numpy arrays, column by column
+    reader = csv.reader(io.StringIO(data))
+    fieldnames = next(reader, [])
+    # skip empty lines and incomplete rows (like a last line that is still being written), as they would shift
+    # or truncate the columns
+    rows = [row for row in reader if len(row) == len(fieldnames)]
+    columns = list(zip(*rows)) or [()] * len(fieldnames)
+    d = {}
+    for k, values in zip(fieldnames, columns):
+        try:
+            d[k] = np.array(values, dtype=float)
+        except ValueError:
+            # text columns only keep their last value
+            d[k] = values[-1]
     return d
 
 
@@ -349,11 +359,13 @@ def plot_trapsheet(axs: list[Axes], ts: dict[str, ndarray], pinfo: dict[str, str
 def parse_filename(vinput) -> dict[str, str]:
     pinfo = {}
     p = Path(vinput)
-    last_modified = p.stat().st_mtime
-    mod_timestamp = datetime.datetime.fromtimestamp(last_modified)
+    # archived trapsheets have no file of their own
+    if p.exists():
+        last_modified = p.stat().st_mtime
+        mod_timestamp = datetime.datetime.fromtimestamp(last_modified)
 
-    timestampStr = mod_timestamp.strftime("%b %d %Y, %H:%M:%S")
-    pinfo['time'] = timestampStr
+        timestampStr = mod_timestamp.strftime("%b %d %Y, %H:%M:%S")
+        pinfo['time'] = timestampStr
     ps = p.stem
 
     ps = ps.replace('AIRBOSS-', '')
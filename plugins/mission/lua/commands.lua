@@ -30,6 +30,9 @@ function dcsbot.registerDCSServer(json)
 	msg.chat_channel = config.CHAT_CHANNEL
 	msg.status_channel = config.STATUS_CHANNEL
 	msg.admin_channel = config.ADMIN_CHANNEL
+	-- ban list that is already applied (if any)
+	msg.ban_version = dcsbot.banListVersion
+	msg.ban_revision = dcsbot.banListRevision
 	-- backwards compatibility
 	if (config.STATISTICS ~= nil) then
 		msg.statistics = config.STATISTICS
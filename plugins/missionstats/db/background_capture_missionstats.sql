@@ -0,0 +1,3 @@
+ALTER TABLE missionstats ADD COLUMN IF NOT EXISTS capture_xid BIGINT;
+DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'tgr_missionstats_capture_xid') THEN CREATE TRIGGER tgr_missionstats_capture_xid BEFORE INSERT OR UPDATE ON missionstats FOR EACH ROW EXECUTE PROCEDURE capture_xid(); END IF; END $$;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_missionstats_capture_xid ON missionstats (capture_xid);
@@ -1,4 +1,3 @@
-import pandas as pd
 import psycopg2
 from contextlib import closing
 from core import report, ReportEnv, utils, Side, Coalition
@@ -6,6 +5,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from plugins.userstats.filter import StatisticsFilter
 
+pd = utils.lazy_import('pandas')
+
 
 @dataclass
 class Flight:
@@ -8,12 +8,12 @@ from core import Plugin, DCSServerBot, utils, Server, TEventListener, PluginInst
 from discord import app_commands
 from discord.ext import commands
 from pathlib import Path
-from typing import Type
+from typing import Optional, Type
 
+from .library import MusicLibrary
 from .listener import MusicEventListener
 from .sink import Sink
-from .utils import playlist_autocomplete, all_songs_autocomplete, songs_autocomplete, get_all_playlists, get_tag, \
-    Playlist
+from .utils import playlist_autocomplete, all_songs_autocomplete, songs_autocomplete, get_all_playlists, Playlist
 from .views import MusicPlayer, PlaylistEditor
 
 
@@ -24,11 +24,14 @@ class MusicAgent(Plugin):
         if not self.locals:
             raise PluginInstallationError(reason=f"No {self.plugin_name}.json file found!", plugin=self.plugin_name)
         self.sinks: dict[str, Sink] = dict()
+        self.libraries: dict[str, MusicLibrary] = dict()
         logging.getLogger(name='eyed3.mp3.headers').setLevel(logging.FATAL)
 
     async def cog_unload(self):
         for sink in self.sinks.values():
             await sink.stop()
+        for library in self.libraries.values():
+            library.stop()
         await super().cog_unload()
 
     def get_music_dir(self) -> str:
@@ -37,6 +40,14 @@ class MusicAgent(Plugin):
             os.makedirs(music_dir)
         return music_dir
 
+    def get_library(self, music_dir: Optional[str] = None) -> MusicLibrary:
+        music_dir = music_dir or self.get_music_dir()
+        if music_dir not in self.libraries:
+            library = MusicLibrary(self.bot, music_dir)
+            library.start()
+            self.libraries[music_dir] = library
+        return self.libraries[music_dir]
+
     @commands.command(description='Music Player')
     @utils.has_role('DCS Admin')
     @commands.guild_only()
@@ -57,7 +68,7 @@ class MusicAgent(Plugin):
         if not playlists:
             await ctx.send(f"You don't have any playlists to play. Please create them with {ctx.prefix}playlist")
             return
-        view = MusicPlayer(self.bot, music_dir=self.get_music_dir(), sink=sink, playlists=playlists)
+        view = MusicPlayer(self.bot, library=self.get_library(sink.music_dir), sink=sink, playlists=playlists)
         msg = await ctx.send(embed=view.render(), view=view)
         try:
             while not view.is_finished():
@@ -79,7 +90,7 @@ class MusicMaster(MusicAgent):
         if not len(songs):
             await ctx.send("No music uploaded on this server. You can just upload mp3 files in here.")
             return
-        view = PlaylistEditor(self.bot, self.get_music_dir(), songs)
+        view = PlaylistEditor(self.bot, self.get_library(), songs)
         msg = await ctx.send(embed=view.render(), view=view)
         try:
             await view.wait()
@@ -136,8 +147,7 @@ class MusicMasterOnly(MusicMaster):
     async def add_song(self, interaction: discord.Interaction, playlist: str, song: str):
         p = Playlist(self.bot, playlist)
         p.add(song)
-        song = os.path.join(self.get_music_dir(), song)
-        title = get_tag(song).title or os.path.basename(song)
+        title = self.get_library().get_title(song) or song
         await interaction.response.send_message(
             '{} has been added to playlist {}.'.format(utils.escape_string(title), playlist))
 
@@ -149,8 +159,7 @@ class MusicMasterOnly(MusicMaster):
         p = Playlist(self.bot, playlist)
         try:
             p.remove(song)
-            song = os.path.join(self.get_music_dir(), song)
-            title = get_tag(song).title or os.path.basename(song)
+            title = self.get_library().get_title(song) or song
             await interaction.response.send_message(
                 '{} has been removed from playlist {}.'.format(utils.escape_string(title), playlist))
         except OSError as ex:
@@ -1,3 +1,4 @@
 CREATE TABLE music_playlists(name TEXT NOT NULL, song_id INTEGER NOT NULL, song_file TEXT NOT NULL);
 CREATE TABLE music_servers(server_name TEXT NOT NULL, playlist_name TEXT NOT NULL, PRIMARY KEY (server_name));
 CREATE SEQUENCE music_song_id_seq;
+CREATE TABLE IF NOT EXISTS music_library (node TEXT NOT NULL, music_dir TEXT NOT NULL, file TEXT NOT NULL, title TEXT, artist TEXT, album TEXT, duration REAL, size BIGINT NOT NULL, mtime DOUBLE PRECISION NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (node, music_dir, file));
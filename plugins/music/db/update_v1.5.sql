@@ -0,0 +1 @@
+CREATE TABLE IF NOT EXISTS music_library (node TEXT NOT NULL, music_dir TEXT NOT NULL, file TEXT NOT NULL, title TEXT, artist TEXT, album TEXT, duration REAL, size BIGINT NOT NULL, mtime DOUBLE PRECISION NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (node, music_dir, file));
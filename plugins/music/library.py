@@ -0,0 +1,239 @@
+import bisect
+import hashlib
+import os
+import platform
+import psycopg2
+import re
+import threading
+from contextlib import closing
+from core import DCSServerBot, utils
+from dataclasses import dataclass
+from psycopg2.extras import execute_values
+from typing import Optional
+from watchdog.events import FileSystemEventHandler, FileSystemEvent, FileSystemMovedEvent
+from watchdog.observers import Observer
+
+eyed3 = utils.lazy_import('eyed3')
+
+
+@dataclass
+class Song:
+    file: str
+    title: Optional[str]
+    artist: Optional[str]
+    album: Optional[str]
+    duration: Optional[float]
+    size: int
+    mtime: float
+    hash: str
+
+    @property
+    def words(self) -> set[str]:
+        return set(re.findall(r'\w+', ' '.join([self.title or '', self.artist or '', self.file[:-4]]).casefold()))
+
+
+class MusicLibrary(FileSystemEventHandler):
+    """
+    Index of the songs in a music directory.
+    Title, artist, album, duration and a hash of every song are stored in the database, so that the tags are only
+    read again for new or changed files. The directory is watched for changes. Lookups are served from memory and
+    searches from a sorted index of the words in the titles, artists and file names.
+    """
+    # files are written in multiple steps, wait for the last change before reading them
+    DELAY = 2.0
+
+    def __init__(self, bot: DCSServerBot, music_dir: str):
+        self.log = bot.log
+        self.pool = bot.pool
+        self.node = platform.node()
+        self.music_dir = os.path.normpath(os.path.abspath(music_dir))
+        self.songs: dict[str, Song] = dict()
+        self.words: list[tuple[str, str]] = list()
+        self.timers: dict[str, threading.Timer] = dict()
+        self.lock = threading.Lock()
+        self.observer: Optional[Observer] = None
+
+    def start(self):
+        self.load()
+        self.observer = Observer()
+        self.observer.schedule(self, self.music_dir, recursive=False)
+        self.observer.start()
+        threading.Thread(target=self.scan, daemon=True).start()
+
+    def stop(self):
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+        with self.lock:
+            for timer in self.timers.values():
+                timer.cancel()
+            self.timers.clear()
+
+    def load(self):
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('SELECT file, title, artist, album, duration, size, mtime, hash FROM music_library '
+                               'WHERE node = %s AND music_dir = %s', (self.node, self.music_dir))
+                songs = [Song(*row) for row in cursor.fetchall()]
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            return
+        finally:
+            self.pool.putconn(conn)
+        with self.lock:
+            for song in songs:
+                self.songs[song.file] = song
+            self.words = sorted((word, song.file) for song in songs for word in song.words)
+
+    def store(self, songs: list[Song]):
+        if not songs:
+            return
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                execute_values(cursor, 'INSERT INTO music_library (node, music_dir, file, title, artist, album, '
+                                       'duration, size, mtime, hash) VALUES %s ON CONFLICT (node, music_dir, file) '
+                                       'DO UPDATE SET title = excluded.title, artist = excluded.artist, '
+                                       'album = excluded.album, duration = excluded.duration, size = excluded.size, '
+                                       'mtime = excluded.mtime, hash = excluded.hash',
+                               [(self.node, self.music_dir, x.file, x.title, x.artist, x.album, x.duration, x.size,
+                                 x.mtime, x.hash) for x in songs])
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
+        with self.lock:
+            for song in songs:
+                self._remove_words(song.file)
+                self.songs[song.file] = song
+                for word in song.words:
+                    bisect.insort(self.words, (word, song.file))
+
+    def delete(self, files: list[str]):
+        if not files:
+            return
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('DELETE FROM music_library WHERE node = %s AND music_dir = %s AND file = ANY(%s)',
+                               (self.node, self.music_dir, files))
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
+        with self.lock:
+            for file in files:
+                self._remove_words(file)
+                self.songs.pop(file, None)
+
+    def _remove_words(self, file: str):
+        song = self.songs.get(file)
+        if not song:
+            return
+        for word in song.words:
+            idx = bisect.bisect_left(self.words, (word, file))
+            if idx < len(self.words) and self.words[idx] == (word, file):
+                del self.words[idx]
+
+    def read(self, file: str) -> Optional[Song]:
+        path = os.path.join(self.music_dir, file)
+        try:
+            stat = os.stat(path)
+            audio = eyed3.load(path)
+            digest = hashlib.sha1()
+            with open(path, 'rb') as infile:
+                while data := infile.read(1024 * 1024):
+                    digest.update(data)
+        except Exception as ex:
+            self.log.debug(f'Music: {file} could not be read: {ex}')
+            return None
+        tag = audio.tag if audio else None
+        return Song(file=file, title=tag.title if tag else None, artist=tag.artist if tag else None,
+                    album=tag.album if tag else None, duration=audio.info.time_secs if audio and audio.info else None,
+                    size=stat.st_size, mtime=stat.st_mtime, hash=digest.hexdigest())
+
+    def scan(self):
+        try:
+            files = dict()
+            with os.scandir(self.music_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.lower().endswith('.mp3'):
+                        files[entry.name] = entry.stat()
+            with self.lock:
+                known = dict(self.songs)
+            self.delete([x for x in known.keys() if x not in files])
+            changed = []
+            for file, stat in files.items():
+                song = known.get(file)
+                if song and song.size == stat.st_size and song.mtime == stat.st_mtime:
+                    continue
+                song = self.read(file)
+                if song:
+                    changed.append(song)
+                if len(changed) == 100:
+                    self.store(changed)
+                    changed = []
+            self.store(changed)
+        except Exception as ex:
+            self.log.exception(ex)
+
+    def refresh(self, file: str):
+        with self.lock:
+            self.timers.pop(file, None)
+        if not os.path.exists(os.path.join(self.music_dir, file)):
+            self.delete([file])
+            return
+        song = self.read(file)
+        if song:
+            self.store([song])
+
+    def schedule(self, path: str):
+        file = os.path.basename(path)
+        if not file.lower().endswith('.mp3'):
+            return
+        with self.lock:
+            if file in self.timers:
+                self.timers[file].cancel()
+            self.timers[file] = threading.Timer(self.DELAY, self.refresh, args=[file])
+            self.timers[file].start()
+
+    def on_created(self, event: FileSystemEvent):
+        self.schedule(event.src_path)
+
+    def on_modified(self, event: FileSystemEvent):
+        self.schedule(event.src_path)
+
+    def on_moved(self, event: FileSystemMovedEvent):
+        self.schedule(event.src_path)
+        self.schedule(event.dest_path)
+
+    def on_deleted(self, event: FileSystemEvent):
+        self.schedule(event.src_path)
+
+    def get(self, file: str) -> Optional[Song]:
+        with self.lock:
+            return self.songs.get(os.path.basename(file))
+
+    def get_title(self, file: str) -> Optional[str]:
+        song = self.get(file)
+        return song.title if song else None
+
+    def search(self, current: Optional[str] = None, limit: int = 25) -> list[Song]:
+        # every word of the search term has to be the start of a word of the song, latest songs first
+        tokens = re.findall(r'\w+', (current or '').casefold())
+        with self.lock:
+            files = None
+            for token in tokens:
+                found = set()
+                idx = bisect.bisect_left(self.words, (token, ''))
+                while idx < len(self.words) and self.words[idx][0].startswith(token):
+                    found.add(self.words[idx][1])
+                    idx += 1
+                files = found if files is None else files & found
+            songs = [self.songs[x] for x in files] if files is not None else list(self.songs.values())
+        return sorted(songs, key=lambda x: x.mtime, reverse=True)[:limit]
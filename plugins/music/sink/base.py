@@ -3,6 +3,7 @@ import discord
 import json
 import os
 import psycopg2
+import time
 
 from abc import ABC
 from contextlib import suppress, closing
@@ -14,6 +15,8 @@ from enum import Enum
 from random import randrange
 from typing import Optional, cast
 
+from ..utils import get_tag
+
 
 __all__ = [
     "Mode",
@@ -129,6 +132,24 @@ class Sink(ABC):
     async def play(self, file: str) -> None:
         ...
 
+    async def prefetch(self, file: str) -> None:
+        # read the tags and the file of the next song while the current one is playing
+        def warm_up():
+            get_tag(file)
+            with open(file, 'rb') as infile:
+                while infile.read(1024 * 1024):
+                    pass
+
+        with suppress(Exception):
+            await asyncio.to_thread(warm_up)
+
+    def get_next(self) -> int:
+        if not self.songs:
+            return 0
+        if self._mode == Mode.SHUFFLE:
+            return randrange(len(self.songs))
+        return (self.idx + 1) % len(self.songs)
+
     async def skip(self) -> None:
         return
 
@@ -161,16 +182,22 @@ class Sink(ABC):
     @tasks.loop(reconnect=True)
     async def queue_worker(self):
         while not self.queue_worker.is_being_cancelled():
+            if not self.songs:
+                await asyncio.sleep(1)
+                continue
+            self.idx %= len(self.songs)
+            # the next song is known upfront, so that it can be prefetched
+            idx = self.get_next()
+            prefetch = asyncio.create_task(self.prefetch(os.path.join(self.music_dir, self.songs[idx])))
+            start = time.monotonic()
             with suppress(Exception):
                 await self.play(os.path.join(self.music_dir, self.songs[self.idx]))
             self._current = None
-            if self._mode == Mode.SHUFFLE:
-                self.idx = randrange(len(self.songs)) if self.songs else 0
-            elif self._mode == Mode.REPEAT:
-                self.idx += 1
-                if self.idx == len(self.songs):
-                    self.idx = 0
-            await asyncio.sleep(1)
+            self.idx = idx
+            await prefetch
+            # don't spin, if songs can't be played
+            if time.monotonic() - start < 1:
+                await asyncio.sleep(1)
 
 
 class SinkInitError(Exception):
@@ -1,6 +1,5 @@
 import asyncio
 import discord
-import subprocess
 import os
 
 from core import DCSServerBot, Server, Status, Coalition, utils
@@ -16,7 +15,7 @@ class SRSSink(Sink):
 
     def __init__(self, bot: DCSServerBot, server: Server, music_dir: str):
         super().__init__(bot, server, music_dir)
-        self.process: Optional[subprocess.Popen] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
 
     def render(self) -> discord.Embed:
         embed = discord.Embed(colour=discord.Colour.blue())
@@ -38,20 +37,21 @@ class SRSSink(Sink):
             except KeyError:
                 raise SinkInitError("You need to set the SRS path in your scheduler.json")
             self.current = file
-            self.process = subprocess.Popen(
-                [
-                    "DCS-SR-ExternalAudio.exe",
-                    "-f", self.config['frequency'],
-                    "-m", self.config['modulation'],
-                    "-c", self.config['coalition'],
-                    "-v", self.config.get('volume', '1.0'),
-                    "-p", srs_port,
-                    "-n", self.config.get('name', 'DCSSB MusicBox'),
-                    "-i", file
-                ],
-                executable=srs_inst + os.path.sep + "DCS-SR-ExternalAudio.exe",
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+            self.process = await asyncio.create_subprocess_exec(
+                "DCS-SR-ExternalAudio.exe",
+                "-f", self.config['frequency'],
+                "-m", self.config['modulation'],
+                "-c", self.config['coalition'],
+                "-v", self.config.get('volume', '1.0'),
+                "-p", str(srs_port),
+                "-n", self.config.get('name', 'DCSSB MusicBox'),
+                "-i", file,
+                # a different player can be configured, for instance for testing
+                executable=os.path.expandvars(self.config.get(
+                    'executable', srs_inst + os.path.sep + "DCS-SR-ExternalAudio.exe")),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
             )
             if 'popup' in self.config:
                 kwargs = self.config.copy()
@@ -61,15 +61,15 @@ class SRSSink(Sink):
                 kwargs = self.config.copy()
                 kwargs['song'] = get_tag(file).title or os.path.basename(file)
                 self.server.sendChatMessage(Coalition.ALL, utils.format_string(self.config['popup'], **kwargs))
-            while self.process.poll() is None:
-                await asyncio.sleep(1)
+            # the event loop wakes us up when the player exits
+            await self.process.wait()
         except Exception as ex:
             self.log.exception(ex)
         finally:
             self.current = None
 
     async def skip(self) -> None:
-        if self.process and self.process.poll() is None:
+        if self.process and self.process.returncode is None:
             self.process.kill()
             self.current = None
 
@@ -1,19 +1,23 @@
+from __future__ import annotations
 import discord
-import eyed3
-import os
 import psycopg2
 from contextlib import closing
-from core import DCSServerBot
+from core import DCSServerBot, utils
 from discord import app_commands
-from eyed3.id3 import Tag
 from functools import lru_cache
-from pathlib import Path
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from eyed3.id3 import Tag
 
-@lru_cache(maxsize=None)
+eyed3 = utils.lazy_import('eyed3')
+id3 = utils.lazy_import('eyed3.id3')
+
+
+@lru_cache(maxsize=256)
 def get_tag(file) -> Tag:
     audio = eyed3.load(file)
-    return audio.tag if audio else Tag()
+    return audio.tag if audio else id3.Tag()
 
 
 class Playlist:
@@ -117,28 +121,22 @@ async def all_songs_autocomplete(
         interaction: discord.Interaction,
         current: str,
 ) -> list[app_commands.Choice[str]]:
-    ret = []
-    music_dir = interaction.client.cogs['MusicMasterOnly'].get_music_dir()
-    for song in [
-        file.name for file in sorted
-        (Path(interaction.command.binding.get_music_dir()).glob('*.mp3'),
-         key=lambda x: x.stat().st_mtime, reverse=True)]:
-        title = get_tag(os.path.join(music_dir, song)).title or song
-        if current and current.casefold() not in title.casefold():
-            continue
-        ret.append(app_commands.Choice(name=title[:100], value=song))
-    return ret[:25]
+    library = interaction.command.binding.get_library()
+    return [
+        app_commands.Choice(name=(song.title or song.file)[:100], value=song.file)
+        for song in library.search(current)
+    ]
 
 
 async def songs_autocomplete(
         interaction: discord.Interaction,
         current: str,
 ) -> list[app_commands.Choice[str]]:
-    music_dir = interaction.client.cogs['MusicMasterOnly'].get_music_dir()
+    library = interaction.command.binding.get_library()
     playlist = Playlist(interaction.client, interaction.data['options'][0]['value'])
     ret = []
     for song in playlist.items:
-        title = get_tag(os.path.join(music_dir, song)).title or song
+        title = library.get_title(song) or song
         if current and current.casefold() not in title.casefold():
             continue
         ret.append(app_commands.Choice(name=title[:100], value=song))
@@ -7,27 +7,28 @@ from discord import SelectOption, TextStyle
 from discord.ui import View, Select, Button, TextInput, Modal
 from typing import Optional
 
+from .library import MusicLibrary
 from .sink import Sink, Mode
-from .utils import get_tag, Playlist
+from .utils import Playlist
 
 
 class PlayerBase(View):
 
-    def __init__(self, bot: DCSServerBot, music_dir: str):
+    def __init__(self, bot: DCSServerBot, library: MusicLibrary):
         super().__init__()
         self.bot = bot
         self.log = bot.log
         self.pool = bot.pool
-        self.music_dir = music_dir
+        self.library = library
 
     def get_titles(self, songs: list[str]) -> list[str]:
-        return [get_tag(os.path.join(self.music_dir, x)).title or x[:-4] for x in songs]
+        return [self.library.get_title(x) or x[:-4] for x in songs]
 
 
 class MusicPlayer(PlayerBase):
 
-    def __init__(self, bot: DCSServerBot, music_dir: str, sink: Sink, playlists: list[str]):
-        super().__init__(bot, music_dir)
+    def __init__(self, bot: DCSServerBot, library: MusicLibrary, sink: Sink, playlists: list[str]):
+        super().__init__(bot, library)
         self.sink = sink
         self.playlists = playlists
         self.titles = self.get_titles(self.sink.songs)
@@ -36,10 +37,11 @@ class MusicPlayer(PlayerBase):
         embed = self.sink.render()
         embed.title = "Music Player"
         if self.sink.current:
-            tag = get_tag(self.sink.current)
-            title = utils.escape_string(tag.title[:255] if tag.title else os.path.basename(self.sink.current)[:-4])
-            artist = utils.escape_string(tag.artist[:255] if tag.artist else 'n/a')
-            album = utils.escape_string(tag.album[:255] if tag.album else 'n/a')
+            song = self.library.get(self.sink.current)
+            title = utils.escape_string(song.title[:255] if song and song.title
+                                        else os.path.basename(self.sink.current)[:-4])
+            artist = utils.escape_string(song.artist[:255] if song and song.artist else 'n/a')
+            album = utils.escape_string(song.album[:255] if song and song.album else 'n/a')
             embed.add_field(name='▬' * 13 + " Now Playing " + '▬' * 13, value='_ _', inline=False)
             embed.add_field(name="Title", value=title)
             embed.add_field(name='Artist', value=artist)
@@ -159,8 +161,8 @@ class MusicPlayer(PlayerBase):
 
 class PlaylistEditor(PlayerBase):
 
-    def __init__(self, bot: DCSServerBot, music_dir: str, songs: list[str], playlist: Optional[str] = None):
-        super().__init__(bot, music_dir)
+    def __init__(self, bot: DCSServerBot, library: MusicLibrary, songs: list[str], playlist: Optional[str] = None):
+        super().__init__(bot, library)
         self.playlist = Playlist(bot, playlist) if playlist else None
         self.all_songs = songs
         self.all_titles = self.get_titles(self.all_songs)
@@ -1,6 +1,7 @@
 import asyncio
 import discord
 import psycopg2
+import psycopg2.extras
 
 from contextlib import closing, suppress
 from copy import deepcopy
@@ -19,13 +20,21 @@ class PunishmentAgent(Plugin):
         super().__init__(bot, eventlistener)
         if not self.locals:
             raise PluginInstallationError(reason=f"No {self.plugin_name}.json file found!", plugin=self.plugin_name)
+        self.decay_config = self.read_decay_config()
+        # punishment events to be evaluated, filled by the event listener and the punish command
+        self.queue: asyncio.Queue[dict] = asyncio.Queue()
+        # evaluations that wait for the forgive time
+        self.evaluations: set[asyncio.Task] = set()
         self.check_punishments.start()
 
     async def cog_unload(self):
         self.check_punishments.cancel()
+        for task in self.evaluations:
+            task.cancel()
         await super().cog_unload()
 
     def migrate(self, version: str) -> None:
+        # version 1.6: decay is calculated on read now, already decayed events are restored by restore_decay()
         if version in ["1.4", "1.5"]:
             conn = self.pool.getconn()
             try:
@@ -68,6 +77,62 @@ class PunishmentAgent(Plugin):
                 return None
         return self._config.get(server.name)
 
+    def read_decay_config(self):
+        if 'configs' in self.locals:
+            for element in self.locals['configs']:
+                if 'decay' in element:
+                    return element['decay']
+        return None
+
+    def decay_weight(self, age: int) -> float:
+        weight = 1.0
+        for d in self.decay_config or []:
+            if age > d['days']:
+                weight *= d['weight']
+        return weight
+
+    def get_punishment_points(self, ucid: str) -> float:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                # points are aggregated per day, decay is applied depending on the age of each day
+                cursor.execute("SELECT timezone('utc', now())::DATE - day, points FROM pu_points WHERE init_id = %s",
+                               (ucid, ))
+                return round(sum(float(row[1]) * self.decay_weight(row[0]) for row in cursor.fetchall()), 2)
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+        finally:
+            self.pool.putconn(conn)
+
+    def restore_decay(self) -> None:
+        # events that were decayed by older versions still carry their decay run, which is reset with the restore
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute("SELECT DISTINCT decay_run FROM pu_events WHERE decay_run >= 0")
+                for decay_run in [x[0] for x in cursor.fetchall()]:
+                    weight = self.decay_weight(decay_run + 1)
+                    if weight > 0:
+                        cursor.execute("UPDATE pu_events SET points = ROUND((points / %s)::numeric, 2), "
+                                       "decay_run = -1 WHERE decay_run = %s", (weight, decay_run))
+                    else:
+                        cursor.execute("UPDATE pu_events SET decay_run = -1 WHERE decay_run = %s", (decay_run, ))
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+        finally:
+            self.pool.putconn(conn)
+
+    def queue_event(self, server: Server, event_id: int, ucid: str, event: str) -> None:
+        self.queue.put_nowait({
+            "id": event_id,
+            "server_name": server.name,
+            "init_id": ucid,
+            "event": event,
+            "time": self.loop.time()
+        })
+
     @commands.command(name='punish', description='Adds punishment points to a user', usage='<member|ucid> <points>')
     @utils.has_role('DCS Admin')
     @commands.guild_only()
@@ -91,9 +156,12 @@ class PunishmentAgent(Plugin):
             with closing(conn.cursor()) as cursor:
                 cursor.execute("""
                     INSERT INTO pu_events (init_id, server_name, event, points)
-                    VALUES (%s, %s, %s, %s) 
+                    VALUES (%s, %s, %s, %s) RETURNING id
                 """, (ucid, server.name, 'admin', points))
+                event_id = cursor.fetchone()[0]
             conn.commit()
+            self.eventlistener.invalidate(ucid)
+            self.queue_event(server, event_id, ucid, 'admin')
             await ctx.send(f'User punished with {points} points.')
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
@@ -184,43 +252,79 @@ class PunishmentAgent(Plugin):
         if points:
             player.sendChatMessage(f"Your current punishment points are: {points}")
 
-    @tasks.loop(minutes=1.0)
+    def read_pending_events(self) -> list[dict]:
+        # events that were not evaluated before the bot was stopped
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
+                cursor.execute("""
+                    SELECT id, server_name, init_id, event, 
+                           EXTRACT(EPOCH FROM timezone('utc', now()) - time) AS age 
+                    FROM pu_events WHERE NOT processed AND server_name = ANY(%s) ORDER BY id
+                """, (list(self.bot.servers.keys()), ))
+                return [dict(row) for row in cursor.fetchall()]
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+            return []
+        finally:
+            self.pool.putconn(conn)
+
+    def mark_processed(self, event_id: int) -> bool:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute('UPDATE pu_events SET processed = TRUE WHERE id = %s', (event_id, ))
+                # the event was forgiven in the meantime
+                forgiven = cursor.rowcount == 0
+            conn.commit()
+            return not forgiven
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
+            self.log.exception(error)
+            return False
+        finally:
+            self.pool.putconn(conn)
+
+    async def evaluate(self, row: dict):
+        try:
+            server: Server = self.bot.servers.get(row['server_name'])
+            config = self.get_config(server) if server else None
+            # we are not initialized correctly yet, the event will be evaluated after the next start
+            if not config or 'punishments' not in config:
+                return
+            # give the victim the chance to forgive the initiator before any action is taken
+            delay = row['time'] + config.get('forgive', 0) - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self.eventlistener.lock:
+                if not await asyncio.to_thread(self.mark_processed, row['id']):
+                    return
+                points = self.eventlistener.get_points(row['init_id'])
+                for punishment in config['punishments']:
+                    if points < punishment['points']:
+                        continue
+                    reason = None
+                    for penalty in config['penalties']:
+                        if penalty['event'] == row['event']:
+                            reason = penalty['reason'] if 'reason' in penalty else row['event']
+                            break
+                    if not reason:
+                        self.log.warning(f"No penalty or reason configured for event {row['event']}.")
+                        reason = row['event']
+                    await self.punish(server, row['init_id'], punishment, reason, points)
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self.log.exception(ex)
+
+    @tasks.loop()
     async def check_punishments(self):
-        async with self.eventlistener.lock:
-            conn = self.pool.getconn()
-            try:
-                with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                    for server_name, server in self.bot.servers.items():
-                        cursor.execute('SELECT * FROM pu_events_sdw WHERE server_name = %s', (server_name, ))
-                        for row in cursor.fetchall():
-                            try:
-                                config = self.get_config(server)
-                                # we are not initialized correctly yet
-                                if not config:
-                                    continue
-                                if 'punishments' in config:
-                                    for punishment in config['punishments']:
-                                        if row['points'] < punishment['points']:
-                                            continue
-                                        reason = None
-                                        for penalty in config['penalties']:
-                                            if penalty['event'] == row['event']:
-                                                reason = penalty['reason'] if 'reason' in penalty else row['event']
-                                                break
-                                        if not reason:
-                                            self.log.warning(
-                                                f"No penalty or reason configured for event {row['event']}.")
-                                            reason = row['event']
-                                        await self.punish(server, row['init_id'], punishment, reason, row['points'])
-                                        break
-                            finally:
-                                cursor.execute('DELETE FROM pu_events_sdw WHERE id = %s', (row['id'], ))
-                    conn.commit()
-            except (Exception, psycopg2.DatabaseError) as error:
-                conn.rollback()
-                self.log.exception(error)
-            finally:
-                self.pool.putconn(conn)
+        row = await self.queue.get()
+        # every event waits for its own forgive time, without holding back the events behind it
+        task = asyncio.create_task(self.evaluate(row))
+        self.evaluations.add(task)
+        task.add_done_callback(self.evaluations.discard)
 
     @check_punishments.before_loop
     async def before_check(self):
@@ -228,13 +332,25 @@ class PunishmentAgent(Plugin):
         # we need the CreditSystem to be loaded before processing punishments
         while 'CreditSystemMaster' not in self.bot.cogs and 'CreditSystemAgent' not in self.bot.cogs:
             await asyncio.sleep(1)
+        for row in await asyncio.to_thread(self.read_pending_events):
+            # keep the remaining forgive time
+            self.queue.put_nowait({
+                "id": row['id'],
+                "server_name": row['server_name'],
+                "init_id": row['init_id'],
+                "event": row['event'],
+                "time": self.loop.time() - float(row['age'])
+            })
 
 
 class PunishmentMaster(PunishmentAgent):
 
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         super().__init__(bot, eventlistener)
-        self.decay_config = self.read_decay_config()
+
+    async def cog_load(self) -> None:
+        await super().cog_load()
+        # decay has to run after a possible migration
         self.decay.start()
 
     async def cog_unload(self):
@@ -246,7 +362,6 @@ class PunishmentMaster(PunishmentAgent):
         try:
             with closing(conn.cursor()) as cursor:
                 cursor.execute('UPDATE pu_events SET server_name = %s WHERE server_name = %s', (new_name, old_name))
-                cursor.execute('UPDATE pu_events_sdw SET server_name = %s WHERE server_name = %s', (new_name, old_name))
             conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
@@ -264,27 +379,21 @@ class PunishmentMaster(PunishmentAgent):
                 cursor.execute(f"DELETE FROM pu_events WHERE time < (DATE(NOW()) - interval '{days} days')")
         self.log.debug('Punishment pruned.')
 
-    def read_decay_config(self):
-        if 'configs' in self.locals:
-            for element in self.locals['configs']:
-                if 'decay' in element:
-                    return element['decay']
-        return None
-
     @tasks.loop(hours=12.0)
     async def decay(self):
+        # the master restores events of older versions on every start, until none are left
+        await asyncio.to_thread(self.restore_decay)
         if self.decay_config:
             self.log.debug('Punishment - Running decay.')
+            # decay itself is calculated on read, so only events that have fully decayed need to be removed
+            days = min((d['days'] for d in self.decay_config if d['weight'] == 0), default=None)
             conn = self.pool.getconn()
             try:
-                with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cursor:
-                    for d in self.decay_config:
-                        cursor.execute("""
-                            UPDATE pu_events 
-                            SET points = ROUND((points * %s)::numeric, 2), decay_run = %s 
-                            WHERE time < (timezone('utc', now()) - interval '%s days') AND decay_run < %s
-                        """, (d['weight'], d['days'], d['days'], d['days']))
-                        cursor.execute("DELETE FROM pu_events WHERE points = 0")
+                with closing(conn.cursor()) as cursor:
+                    if days is not None:
+                        cursor.execute("DELETE FROM pu_events "
+                                       "WHERE time < (timezone('utc', now()) - interval '%s days')", (days, ))
+                    cursor.execute("DELETE FROM pu_points WHERE points = 0")
                 conn.commit()
             except (Exception, psycopg2.DatabaseError) as error:
                 conn.rollback()
@@ -312,7 +421,7 @@ class PunishmentMaster(PunishmentAgent):
                         ucids = [user]
                     for ucid in ucids:
                         cursor.execute('DELETE FROM pu_events WHERE init_id = %s', (ucid, ))
-                        cursor.execute('DELETE FROM pu_events_sdw WHERE init_id = %s', (ucid, ))
+                        self.eventlistener.invalidate(ucid)
                         cursor.execute(f"DELETE FROM bans WHERE ucid = %s AND banned_by = '{self.plugin_name}'",
                                        (ucid,))
                         for server_name, server in self.bot.servers.items():
@@ -373,11 +482,13 @@ class PunishmentMaster(PunishmentAgent):
                 )
                 times = events = points = ''
                 total = 0.0
+                now = datetime.utcnow()
                 for row in cursor.fetchall():
+                    decayed = float(row['points']) * self.decay_weight((now.date() - row['time'].date()).days)
                     times += f"{row['time']:%m/%d %H:%M}\n"
                     events += ' '.join(row['event'].split('_')).title() + '\n'
-                    points += f"{row['points']:.2f}\n"
-                    total += row['points']
+                    points += f"{decayed:.2f}\n"
+                    total += decayed
                 embed.description = f"Total penalty points: {total:.2f}"
                 embed.add_field(name='▬' * 10 + ' Log ' + '▬' * 10, value='_ _', inline=False)
                 embed.add_field(name='Time (UTC)', value=times)
@@ -0,0 +1,3 @@
+ALTER TABLE pu_events ADD COLUMN IF NOT EXISTS capture_xid BIGINT;
+DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'tgr_pu_events_capture_xid') THEN CREATE TRIGGER tgr_pu_events_capture_xid BEFORE INSERT OR UPDATE ON pu_events FOR EACH ROW EXECUTE PROCEDURE capture_xid(); END IF; END $$;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pu_events_capture_xid ON pu_events (capture_xid);
@@ -1,7 +1,8 @@
-CREATE TABLE IF NOT EXISTS pu_events (id SERIAL PRIMARY KEY, init_id TEXT NOT NULL, target_id TEXT, server_name TEXT NOT NULL, event TEXT NOT NULL, points DECIMAL NOT NULL, time TIMESTAMP NOT NULL DEFAULT timezone('utc', now()), decay_run INTEGER NOT NULL DEFAULT -1);
+CREATE TABLE IF NOT EXISTS pu_events (id SERIAL PRIMARY KEY, init_id TEXT NOT NULL, target_id TEXT, server_name TEXT NOT NULL, event TEXT NOT NULL, points DECIMAL NOT NULL, time TIMESTAMP NOT NULL DEFAULT timezone('utc', now()), decay_run INTEGER NOT NULL DEFAULT -1, processed BOOLEAN NOT NULL DEFAULT FALSE);
 CREATE INDEX IF NOT EXISTS idx_pu_events_init_id ON pu_events(init_id);
 CREATE INDEX IF NOT EXISTS idx_pu_events_target_id ON pu_events(target_id);
+CREATE INDEX IF NOT EXISTS idx_pu_events_processed ON pu_events(id) WHERE NOT processed;
 CREATE UNIQUE INDEX idx_pu_events_unique ON pu_events (init_id, COALESCE(target_id, '-1'), event, DATE_TRUNC('minute', time));
-CREATE TABLE IF NOT EXISTS pu_events_sdw (id SERIAL PRIMARY KEY, init_id TEXT NOT NULL, target_id TEXT, server_name TEXT NOT NULL, event TEXT NOT NULL, points DECIMAL NOT NULL, time TIMESTAMP NOT NULL);
-CREATE OR REPLACE FUNCTION pu_events_insert() RETURNS trigger AS $$ BEGIN INSERT INTO pu_events_sdw(init_id, target_id, server_name, event, points, time) SELECT NEW.init_id, NEW.target_id, NEW.server_name, NEW.event, (SELECT SUM(points) FROM pu_events WHERE init_id = NEW.init_id), NEW.time; RETURN NEW; END; $$ LANGUAGE 'plpgsql';
-CREATE TRIGGER tgr_pu_events_insert AFTER INSERT ON pu_events FOR EACH ROW EXECUTE PROCEDURE pu_events_insert();
+CREATE TABLE IF NOT EXISTS pu_points (init_id TEXT NOT NULL, day DATE NOT NULL, points DECIMAL NOT NULL DEFAULT 0, PRIMARY KEY (init_id, day));
+CREATE OR REPLACE FUNCTION pu_points_update() RETURNS trigger AS $$ BEGIN IF (TG_OP IN ('UPDATE', 'DELETE')) THEN UPDATE pu_points SET points = points - OLD.points WHERE init_id = OLD.init_id AND day = DATE(OLD.time); END IF; IF (TG_OP IN ('INSERT', 'UPDATE')) THEN INSERT INTO pu_points (init_id, day, points) VALUES (NEW.init_id, DATE(NEW.time), NEW.points) ON CONFLICT (init_id, day) DO UPDATE SET points = pu_points.points + excluded.points; END IF; RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE TRIGGER tgr_pu_points_update AFTER INSERT OR UPDATE OR DELETE ON pu_events FOR EACH ROW EXECUTE PROCEDURE pu_points_update();
@@ -0,0 +1,7 @@
+DROP TRIGGER IF EXISTS tgr_pu_events_insert ON pu_events;
+DROP FUNCTION IF EXISTS pu_events_insert();
+DROP TABLE IF EXISTS pu_events_sdw;
+CREATE TABLE IF NOT EXISTS pu_points (init_id TEXT NOT NULL, day DATE NOT NULL, points DECIMAL NOT NULL DEFAULT 0, PRIMARY KEY (init_id, day));
+INSERT INTO pu_points (init_id, day, points) SELECT init_id, DATE(time), SUM(points) FROM pu_events GROUP BY 1, 2 ON CONFLICT DO NOTHING;
+CREATE OR REPLACE FUNCTION pu_points_update() RETURNS trigger AS $$ BEGIN IF (TG_OP IN ('UPDATE', 'DELETE')) THEN UPDATE pu_points SET points = points - OLD.points WHERE init_id = OLD.init_id AND day = DATE(OLD.time); END IF; IF (TG_OP IN ('INSERT', 'UPDATE')) THEN INSERT INTO pu_points (init_id, day, points) VALUES (NEW.init_id, DATE(NEW.time), NEW.points) ON CONFLICT (init_id, day) DO UPDATE SET points = pu_points.points + excluded.points; END IF; RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE TRIGGER tgr_pu_points_update AFTER INSERT OR UPDATE OR DELETE ON pu_events FOR EACH ROW EXECUTE PROCEDURE pu_points_update();
@@ -0,0 +1,3 @@
+ALTER TABLE pu_events ADD COLUMN IF NOT EXISTS processed BOOLEAN NOT NULL DEFAULT TRUE;
+ALTER TABLE pu_events ALTER COLUMN processed SET DEFAULT FALSE;
+CREATE INDEX IF NOT EXISTS idx_pu_events_processed ON pu_events(id) WHERE NOT processed;
@@ -1,9 +1,13 @@
 import asyncio
 import psycopg2
+import time
 
 from datetime import timezone
 from contextlib import closing
-from core import EventListener, Plugin, Server, Player, Status, event, chat_command, Channel
+from core import EventListener, Plugin, Server, Player, Status, Side, event, chat_command, Channel
+from typing import Optional
+
+from .state import PunishmentState
 
 
 class PunishmentEventListener(EventListener):
@@ -11,35 +15,72 @@ class PunishmentEventListener(EventListener):
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
         self.lock = asyncio.Lock()
+        # punishment relevant data of online players, loaded on join and updated by the event stream
+        self.states: dict[str, PunishmentState] = dict()
 
     @event(name="onMissionLoadEnd")
     async def onMissionLoadEnd(self, server: Server, data: dict) -> None:
         # make sure the config cache is re-read on mission changes
         self.plugin.get_config(server, use_cache=False)
 
-    def _get_flight_hours(self, player: Player) -> int:
+    def _load_state(self, ucid: str) -> PunishmentState:
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
-                cursor.execute('SELECT COALESCE(ROUND(SUM(EXTRACT(EPOCH FROM (COALESCE(hop_off, NOW()) - hop_on)))) / '
-                               '3600, 0) AS playtime FROM statistics WHERE player_ucid = %s', (player.ucid, ))
-                return cursor.fetchone()[0] if cursor.rowcount > 0 else 0
+                # open sessions count until now and keep counting as long as the player stays in their slot
+                cursor.execute('SELECT COALESCE(SUM(EXTRACT(EPOCH FROM (COALESCE(hop_off, NOW()) - hop_on))), 0), '
+                               'COUNT(*) FILTER (WHERE hop_off IS NULL) FROM statistics WHERE player_ucid = %s',
+                               (ucid, ))
+                flight_time, sessions = cursor.fetchone()
+                flight_time = float(flight_time)
         except psycopg2.DatabaseError as error:
             self.log.exception(error)
+            flight_time, sessions = 0, 0
         finally:
             self.pool.putconn(conn)
+        return PunishmentState(ucid=ucid, flight_time=flight_time, slot_time=time.monotonic() if sessions else None,
+                               points=self.plugin.get_punishment_points(ucid) or 0)
+
+    async def get_state(self, ucid: str) -> PunishmentState:
+        state = self.states.get(ucid)
+        # the bot might have been restarted while the player was online
+        if not state:
+            state = self.states[ucid] = await asyncio.to_thread(self._load_state, ucid)
+        return state
+
+    def get_points(self, ucid: str) -> float:
+        state = self.states.get(ucid)
+        return state.points if state else self.plugin.get_punishment_points(ucid)
+
+    def invalidate(self, ucid: str) -> None:
+        self.states.pop(ucid, None)
 
-    def _get_punishment_points(self, player: Player) -> int:
+    def _add_event(self, initiator: str, target: Optional[str], server_name: str, event: str,
+                   points: float) -> Optional[int]:
         conn = self.pool.getconn()
         try:
             with closing(conn.cursor()) as cursor:
-                cursor.execute("SELECT COALESCE(SUM(points), 0) FROM pu_events WHERE init_id = %s", (player.ucid, ))
-                return int(cursor.fetchone()[0])
-        except psycopg2.DatabaseError as error:
+                cursor.execute('INSERT INTO pu_events (init_id, target_id, server_name, event, points) '
+                               'VALUES (%s, %s, %s, %s, %s) ON CONFLICT DO NOTHING RETURNING id',
+                               (initiator, target, server_name, event, points))
+                # events within the same minute are counted only once
+                event_id = cursor.fetchone()[0] if cursor.rowcount == 1 else None
+                conn.commit()
+                return event_id
+        except (Exception, psycopg2.DatabaseError) as error:
+            conn.rollback()
             self.log.exception(error)
         finally:
             self.pool.putconn(conn)
 
+    @staticmethod
+    def _is_exempted(config: dict, player: Player) -> bool:
+        roles = [x.name for x in player.member.roles] if player.member else []
+        for e in config.get('exemptions', []):
+            if ('ucid' in e and e['ucid'] == player.ucid) or ('discord' in e and e['discord'] in roles):
+                return True
+        return False
+
     async def _punish(self, data: dict):
         server: Server = self.bot.servers[data['server_name']]
         config = self.plugin.get_config(server)
@@ -48,25 +89,16 @@ class PunishmentEventListener(EventListener):
             if penalty:
                 initiator = server.get_player(name=data['initiator'])
                 # check if there is an exemption for this user
-                if 'exemptions' in config:
-                    user = self.bot.get_member_by_ucid(initiator.ucid)
-                    roles = [x.name for x in user.roles] if user else []
-                    for e in config['exemptions']:
-                        if ('ucid' in e and e['ucid'] == initiator.ucid) or ('discord' in e and e['discord'] in roles):
-                            self.log.debug(f"User {initiator.name} not penalized due to exemption.")
-                            return
+                if self._is_exempted(config, initiator):
+                    self.log.debug(f"User {initiator.name} not penalized due to exemption.")
+                    return
                 if 'default' in penalty:
                     points = penalty['default']
                 else:
                     points = penalty['human'] if 'target' in data else penalty['AI']
                 # apply flight hours to points
-                hours = self._get_flight_hours(initiator)
-                if 'flightHoursWeight' in config:
-                    weight = 1
-                    for fhw in config['flightHoursWeight']:
-                        if fhw['time'] <= hours:
-                            weight = fhw['weight']
-                    points = points * weight
+                state = await self.get_state(initiator.ucid)
+                points = points * state.get_weight(config)
                 # check if an action should be run immediately
                 if 'action' in penalty:
                     await self.plugin.punish(server, initiator.ucid, penalty,
@@ -84,24 +116,14 @@ class PunishmentEventListener(EventListener):
                             f"player.")
                 else:
                     target = None
-                # add the event to the database
+                # add the event to the database without blocking the event processing
                 async with self.lock:
-                    conn = self.pool.getconn()
-                    try:
-                        with closing(conn.cursor()) as cursor:
-                            cursor.execute('INSERT INTO pu_events (init_id, target_id, server_name, event, points) '
-                                           'VALUES (%s, %s, %s, %s, %s) ON CONFLICT DO NOTHING', (initiator.ucid,
-                                                                                                  target.ucid if
-                                                                                                  target else None,
-                                                                                                  data['server_name'],
-                                                                                                  data['eventName'],
-                                                                                                  points))
-                            conn.commit()
-                    except (Exception, psycopg2.DatabaseError) as error:
-                        conn.rollback()
-                        self.log.exception(error)
-                    finally:
-                        self.pool.putconn(conn)
+                    event_id = await asyncio.to_thread(self._add_event, initiator.ucid,
+                                                       target.ucid if target else None, data['server_name'],
+                                                       data['eventName'], points)
+                    if event_id:
+                        state.points += points
+                        self.plugin.queue_event(server, event_id, initiator.ucid, data['eventName'])
 
     @event(name="onGameEvent")
     async def onGameEvent(self, server: Server, data: dict):
@@ -137,38 +159,48 @@ class PunishmentEventListener(EventListener):
         if data['id'] == 1:
             return
         # check if someone was banned on server A and tries to sneak into server B on another node
-        conn = self.pool.getconn()
-        try:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute('SELECT reason, banned_until FROM bans WHERE ucid = %s AND banned_until >= NOW()',
-                               (data['ucid'], ))
-                if cursor.rowcount > 0:
-                    row = cursor.fetchone()
-                    if row[1].year == 9999:
-                        until = 'never'
-                    else:
-                        until = row[1].astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M') + ' (UTC)'
-                    # ban them on all servers on this node as it wasn't populated yet
-                    for s in self.bot.servers.values():
-                        s.sendtoDCS({
-                            "command": "ban",
-                            "ucid": data['ucid'],
-                            "reason": row[0],
-                            "banned_until": until
-                        })
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.log.exception(error)
-        finally:
-            self.pool.putconn(conn)
+        ban = self.bot.bans.get(data['ucid'])
+        if ban:
+            if ban['banned_until'].year == 9999:
+                until = 'never'
+            else:
+                until = ban['banned_until'].astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M') + ' (UTC)'
+            # ban them on all servers on this node as it wasn't populated yet
+            for s in self.bot.servers.values():
+                s.sendtoDCS({
+                    "command": "ban",
+                    "ucid": data['ucid'],
+                    "reason": ban['reason'],
+                    "banned_until": until
+                })
 
     @event(name="onPlayerStart")
     async def onPlayerStart(self, server: Server, data: dict) -> None:
         if data['id'] == 1:
             return
         player: Player = server.get_player(id=data['id'])
-        points = self._get_punishment_points(player)
-        if points > 0:
-            player.sendChatMessage(f"{player.name}, you currently have {points} penalty points.")
+        # (re-)load the state, as points might have decayed since the last visit
+        self.invalidate(player.ucid)
+        state = await self.get_state(player.ucid)
+        if state.points > 0:
+            player.sendChatMessage(f"{player.name}, you currently have {state.points} penalty points.")
+
+    @event(name="onPlayerChangeSlot")
+    async def onPlayerChangeSlot(self, server: Server, data: dict) -> None:
+        if 'side' not in data:
+            return
+        # keep the flight hours up to date without reading the statistics again
+        state = self.states.get(data['ucid'])
+        if state:
+            state.change_slot(Side(data['side']) != Side.SPECTATOR)
+
+    @event(name="onPlayerStop")
+    async def onPlayerStop(self, server: Server, data: dict) -> None:
+        if data['id'] == 1:
+            return
+        player: Player = server.get_player(id=data['id'])
+        if player:
+            self.invalidate(player.ucid)
 
     @chat_command(name="forgive", help="forgive another user for teamhits/-kills")
     async def forgive(self, server: Server, target: Player, params: list[str]):
@@ -198,14 +230,11 @@ class PunishmentEventListener(EventListener):
                         DELETE FROM pu_events 
                         WHERE target_id = %s AND time >= (timezone('utc', now()) - interval '%s seconds')
                     """, (target.ucid, config['forgive']))
-                    # cancel pending punishment tasks
-                    cursor.execute("""
-                        DELETE FROM pu_events_sdw 
-                        WHERE target_id = %s AND time >= (timezone('utc', now()) - interval '%s seconds')
-                    """, (target.ucid, config['forgive']))
                     conn.commit()
                     names = []
                     for initiator in initiators:
+                        # the forgiven points have to be re-read on the next event
+                        self.invalidate(initiator)
                         player = self.bot.get_player_by_ucid(initiator)
                         if player:
                             names.append(player.name)
@@ -227,5 +256,5 @@ class PunishmentEventListener(EventListener):
 
     @chat_command(name="penalty", help="displays your penalty points")
     async def penalty(self, server: Server, player: Player, params: list[str]):
-        points = self._get_punishment_points(player)
+        points = (await self.get_state(player.ucid)).points
         player.sendChatMessage(f"{player.name}, you currently have {points} penalty points.")
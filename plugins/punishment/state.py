@@ -0,0 +1,32 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class PunishmentState:
+    ucid: str
+    # flight time until the state was loaded or the player left their last slot
+    flight_time: float = 0
+    points: float = 0
+    # start of the current flight time (monotonic), if the player sits in a slot
+    slot_time: Optional[float] = None
+
+    @property
+    def flight_hours(self) -> float:
+        flight_time = self.flight_time
+        if self.slot_time is not None:
+            flight_time += time.monotonic() - self.slot_time
+        return flight_time / 3600
+
+    def change_slot(self, active: bool) -> None:
+        if self.slot_time is not None:
+            self.flight_time += time.monotonic() - self.slot_time
+        self.slot_time = time.monotonic() if active else None
+
+    def get_weight(self, config: dict) -> float:
+        weight = 1
+        for fhw in config.get('flightHoursWeight', []):
+            if fhw['time'] <= self.flight_hours:
+                weight = fhw['weight']
+        return weight
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from fastapi import Request, Response
+from typing import Any, Optional
+
+
+class CacheEntry:
+
+    def __init__(self, data: Any, ttl: Optional[int], headers: Optional[dict] = None):
+        self.headers = headers or {}
+        self.body = json.dumps(data, default=lambda x: x.isoformat() if isinstance(x, datetime) else str(x)).encode()
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.ttl = ttl
+        self.expires = time.monotonic() + ttl if ttl else None
+
+    def is_expired(self) -> bool:
+        return self.expires is not None and self.expires < time.monotonic()
+
+
+class ResponseCache:
+    """
+    Cache of serialized responses.
+    Entries with a TTL expire, entries without are valid until they are replaced. Every entry carries an ETag, so
+    that clients can revalidate their copy with If-None-Match and get a 304 without a body.
+    """
+
+    def __init__(self, ttl: int = 60, maxsize: int = 1000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries: dict[Any, CacheEntry] = dict()
+        # endpoints run in the thread pool of the web server
+        self.lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[CacheEntry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry.is_expired():
+                del self.entries[key]
+                return None
+            return entry
+
+    def put(self, key: Any, data: Any, *, ttl: Optional[int] = -1, headers: Optional[dict] = None) -> CacheEntry:
+        entry = CacheEntry(data, self.ttl if ttl == -1 else ttl, headers)
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = entry
+            if len(self.entries) > self.maxsize:
+                for k in [k for k, v in self.entries.items() if v.is_expired()]:
+                    del self.entries[k]
+                # drop the oldest entries
+                while len(self.entries) > self.maxsize:
+                    del self.entries[next(iter(self.entries))]
+        return entry
+
+    @staticmethod
+    def response(request: Request, entry: CacheEntry) -> Response:
+        headers = entry.headers | {"ETag": entry.etag}
+        if entry.ttl:
+            headers['Cache-Control'] = f"max-age={entry.ttl}"
+        if entry.etag in [x.strip() for x in request.headers.get('if-none-match', '').split(',')]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -1,22 +1,26 @@
 import asyncio
+import json
 import logging
 import os
+import psycopg2
+import psycopg2.extras
 import shutil
 import uvicorn
 
 from contextlib import closing
 from core import Plugin, DCSServerBot
 from datetime import datetime
-from fastapi import FastAPI, APIRouter, Form, Response
-from psycopg.rows import dict_row
-from services import DCSServerBot
-from typing import Optional
+from discord.ext import tasks
+from fastapi import FastAPI, APIRouter, Form, Request, Response
+from typing import Optional, Any
 from uvicorn import Config
-from core import const, report, Status, Server, utils, ServiceRegistry
-import json, sys
+from .cache import ResponseCache
 
 app: Optional[FastAPI] = None
 
+# maximum number of rows per request
+MAX_LIMIT = 1000
+
 
 class RestAPI(Plugin):
 
@@ -27,6 +31,7 @@ class RestAPI(Plugin):
         self.router = APIRouter()
         self.router.add_api_route("/topkills", self.topkills, methods=["GET"])
         self.router.add_api_route("/topkdr", self.topkdr, methods=["GET"])
+        self.router.add_api_route("/leaderboard", self.leaderboard, methods=["GET"])
         self.router.add_api_route("/servers", self.servers, methods=["GET"])
         self.router.add_api_route("/getuser", self.getuser, methods=["POST"])
         self.router.add_api_route("/missilepk", self.missilepk, methods=["POST"])
@@ -37,39 +42,94 @@ class RestAPI(Plugin):
                              use_colors=False)
         self.server: uvicorn.Server = uvicorn.Server(config=self.config)
         self.task = None
+        self.cache = ResponseCache(ttl=cfg.get('cache_ttl', 60))
+        self.leaderboard_size = cfg.get('leaderboard_size', 100)
+        self.leaderboards: dict[str, list[dict]] = dict()
+        self.refresh_leaderboards.change_interval(seconds=cfg.get('refresh', 60))
 
     async def cog_load(self) -> None:
         await super().cog_load()
+        self.refresh_leaderboards.start()
         self.task = asyncio.create_task(self.server.serve())
 
     async def cog_unload(self):
+        self.refresh_leaderboards.cancel()
         self.server.should_exit = True
         await self.task
         await super().cog_unload()
 
-    def topkills(self):
-        with self.pool.connection() as conn:
-            with closing(conn.cursor(row_factory=dict_row)) as cursor:
-                return cursor.execute("""
-                    SELECT p.name AS "fullNickname", SUM(pvp) AS "AAkills", SUM(deaths) AS "deaths", 
-                           CASE WHEN SUM(deaths) = 0 THEN SUM(pvp) ELSE SUM(pvp)/SUM(deaths::DECIMAL) END AS "AAKDR" 
-                    FROM statistics s, players p 
-                    WHERE s.player_ucid = p.ucid 
-                    GROUP BY 1 ORDER BY 2 DESC LIMIT 10
-                """).fetchall()
-
-    def topkdr(self):
-        with self.pool.connection() as conn:
-            with closing(conn.cursor(row_factory=dict_row)) as cursor:
-                return cursor.execute("""
-                    SELECT p.name AS "fullNickname", SUM(pvp) AS "AAkills", SUM(deaths) AS "deaths", 
-                           CASE WHEN SUM(deaths) = 0 THEN SUM(pvp) ELSE SUM(pvp)/SUM(deaths::DECIMAL) END AS "AAKDR" 
-                    FROM statistics s, players p 
-                    WHERE s.player_ucid = p.ucid 
-                    GROUP BY 1 ORDER BY 4 DESC LIMIT 10
-                """).fetchall()
-
-    def servers(self):
+    def query(self, sql: str, params: Optional[tuple] = None) -> list[dict]:
+        conn = self.pool.getconn()
+        try:
+            with closing(conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)) as cursor:
+                cursor.execute(sql, params)
+                return [dict(x) for x in cursor.fetchall()]
+        finally:
+            conn.rollback()
+            self.pool.putconn(conn)
+
+    def cached(self, request: Request, key: Any, func, *args) -> Response:
+        entry = self.cache.get(key)
+        if not entry:
+            entry = self.cache.put(key, func(*args))
+        return self.cache.response(request, entry)
+
+    @staticmethod
+    def select(rows: list[dict], fields: Optional[str]) -> list[dict]:
+        if not fields:
+            return rows
+        names = [x.strip() for x in fields.split(',')]
+        return [{k: v for k, v in row.items() if k in names} for row in rows]
+
+    def get_leaderboard(self, order: int, limit: int = 10) -> list[dict]:
+        return self.query(f"""
+            SELECT p.name AS "fullNickname", SUM(pvp) AS "AAkills", SUM(deaths) AS "deaths", 
+                   CASE WHEN SUM(deaths) = 0 THEN SUM(pvp) ELSE SUM(pvp)/SUM(deaths::DECIMAL) END AS "AAKDR" 
+            FROM statistics s, players p 
+            WHERE s.player_ucid = p.ucid 
+            GROUP BY 1 ORDER BY {order} DESC LIMIT %s
+        """, (limit, ))
+
+    def update_leaderboards(self) -> None:
+        self.leaderboards = {
+            "kills": self.get_leaderboard(2, self.leaderboard_size),
+            "kdr": self.get_leaderboard(4, self.leaderboard_size)
+        }
+        # leaderboards don't expire, they are replaced by the next refresh
+        self.cache.put('topkills', self.leaderboards['kills'][:10], ttl=None)
+        self.cache.put('topkdr', self.leaderboards['kdr'][:10], ttl=None)
+
+    @tasks.loop(seconds=60)
+    async def refresh_leaderboards(self):
+        try:
+            await asyncio.to_thread(self.update_leaderboards)
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.log.exception(error)
+
+    def topkills(self, request: Request):
+        return self.cached(request, 'topkills', self.get_leaderboard, 2)
+
+    def topkdr(self, request: Request):
+        return self.cached(request, 'topkdr', self.get_leaderboard, 4)
+
+    def leaderboard(self, request: Request, what: str = 'kills', limit: int = 10, cursor: int = 0,
+                    fields: Optional[str] = None):
+        if what not in ['kills', 'kdr']:
+            return Response(status_code=400)
+        limit = max(min(limit, MAX_LIMIT), 1)
+        cursor = max(cursor, 0)
+        key = ('leaderboard', what, limit, cursor, fields)
+        entry = self.cache.get(key)
+        if not entry:
+            rows = self.leaderboards.get(what) or self.get_leaderboard(2 if what == 'kills' else 4,
+                                                                       self.leaderboard_size)
+            # the cursor is the rank of the last row of the previous page
+            page = [{"rank": cursor + i + 1} | row for i, row in enumerate(rows[cursor:cursor + limit])]
+            headers = {"X-Next-Cursor": str(cursor + limit)} if cursor + limit < len(rows) else None
+            entry = self.cache.put(key, self.select(page, fields), headers=headers)
+        return self.cache.response(request, entry)
+
+    def servers(self, fields: Optional[str] = None):
         servers_data = []
 # get all servers, and their status, and add them to the servers_data list as JSON
         for server in self.bot.servers.values():
@@ -77,7 +137,7 @@ class RestAPI(Plugin):
             server_status = f"{server.status}"
             active_players = f"{len(server.players) + 1}"
             max_players = f"{server.settings['maxPlayers']}"
-            ip_addr = f"{server.node.public_ip}:{server.settings['port']}"
+            ip_addr = f"{self.bot.external_ip}:{server.settings['port']}"
             current_mission = ""
             mission_time = ""
             password = ""
@@ -119,6 +179,8 @@ class RestAPI(Plugin):
                 },
                 "weather": weather
             }
+            if fields:
+                server_data['data'] = self.select([server_data['data']], fields)[0]
             servers_data.append(server_data)
 
         # convert the list to a JSON array
@@ -127,80 +189,105 @@ class RestAPI(Plugin):
         # return the JSON array as a string
         return Response(content=servers_json, media_type="application/json")
 
+    def get_user(self, nick: str, limit: int, cursor: Optional[str]) -> list[dict]:
+        # the name search is backed by a trigram index, pages are sorted by ucid
+        sql = 'SELECT ucid, name AS "nick", last_seen AS "date" FROM players WHERE name ILIKE %s'
+        params = ['%' + nick + '%']
+        if cursor:
+            sql += ' AND ucid > %s'
+            params.append(cursor)
+        sql += ' ORDER BY ucid LIMIT %s'
+        params.append(limit)
+        return self.query(sql, tuple(params))
+
+    def getuser(self, request: Request, nick: str = Form(default=None), limit: int = Form(default=100),
+                cursor: Optional[str] = Form(default=None), fields: str = Form(default='nick,date')):
+        limit = max(min(limit, MAX_LIMIT), 1)
+        key = ('getuser', nick, limit, cursor, fields)
+        entry = self.cache.get(key)
+        if not entry:
+            rows = self.get_user(nick, limit, cursor)
+            headers = {"X-Next-Cursor": rows[-1]['ucid']} if len(rows) == limit else None
+            entry = self.cache.put(key, self.select(rows, fields), headers=headers)
+        return self.cache.response(request, entry)
+
+    def get_missilepk(self, nick: str, date: datetime) -> dict:
+        return {
+            "missilePK": dict([(row['weapon'], row['pk']) for row in self.query("""
+                SELECT weapon, shots, hits, 
+                       ROUND(CASE WHEN shots = 0 THEN 0 ELSE hits/shots::DECIMAL END, 2) AS "pk"
+                FROM (
+                    SELECT weapon, SUM(CASE WHEN event='S_EVENT_SHOT' THEN 1 ELSE 0 END) AS "shots", 
+                           SUM(CASE WHEN event='S_EVENT_HIT' THEN 1 ELSE 0 END) AS "hits" 
+                    FROM missionstats 
+                    WHERE init_id = (SELECT ucid FROM players WHERE name = %s AND last_seen = %s)
+                    AND weapon IS NOT NULL
+                    GROUP BY weapon
+                ) x
+                ORDER BY 4 DESC
+            """, (nick, date))])
+        }
+
+    def missilepk(self, request: Request, nick: str = Form(default=None), date: str = Form(default=None)):
+        return self.cached(request, ('missilepk', nick, date), self.get_missilepk, nick, datetime.fromisoformat(date))
+
+    def get_stats(self, nick: str, date: datetime) -> Optional[dict]:
+        rows = self.query("SELECT ucid FROM players WHERE name = %s AND last_seen = %s", (nick, date))
+        if not rows:
+            return None
+        ucid = rows[0]['ucid']
+        data = self.query("""
+            SELECT overall.deaths, overall.aakills, 
+                   ROUND(CASE WHEN overall.deaths = 0 
+                              THEN overall.aakills 
+                              ELSE overall.aakills/overall.deaths::DECIMAL END, 2) AS "aakdr", 
+                   lastsession.kills AS "lastSessionKills", lastsession.deaths AS "lastSessionDeaths"
+            FROM (
+                SELECT SUM(deaths) AS "deaths", SUM(pvp) AS "aakills"
+                FROM statistics
+                WHERE player_ucid = %s
+            ) overall, (
+                SELECT SUM(pvp) AS "kills", SUM(deaths) AS "deaths"
+                FROM statistics
+                WHERE (player_ucid, mission_id) = (
+                    SELECT player_ucid, max(mission_id) FROM statistics WHERE player_ucid = %s GROUP BY 1
+                )
+            ) lastsession
+        """, (ucid, ucid))[0]
+        data['killsByModule'] = self.query("""
+            SELECT slot AS "module", SUM(pvp) AS "kills" 
+            FROM statistics 
+            WHERE player_ucid = %s 
+            GROUP BY 1 HAVING SUM(pvp) > 1 
+            ORDER BY 2 DESC
+        """, (ucid, ))
+        data['kdrByModule'] = self.query("""
+            SELECT slot AS "module", 
+                   CASE WHEN SUM(deaths) = 0 THEN SUM(pvp) ELSE SUM(pvp) / SUM(deaths::DECIMAL) END AS "kdr" 
+            FROM statistics 
+            WHERE player_ucid = %s 
+            GROUP BY 1 HAVING SUM(pvp) > 1 
+            ORDER BY 2 DESC
+        """, (ucid, ))
+        return data
 
-    def getuser(self, nick: str = Form(default=None)):
-        with self.pool.connection() as conn:
-            with closing(conn.cursor(row_factory=dict_row)) as cursor:
-                return cursor.execute("""
-                    SELECT name AS \"nick\", last_seen AS \"date\" FROM players WHERE name ILIKE %s
-                """, ('%' + nick + '%', )).fetchall()
-
-    def missilepk(self, nick: str = Form(default=None), date: str = Form(default=None)):
-        with self.pool.connection() as conn:
-            with closing(conn.cursor(row_factory=dict_row)) as cursor:
-                return {
-                    "missilePK": dict([(row['weapon'], row['pk']) for row in cursor.execute("""
-                        SELECT weapon, shots, hits, 
-                               ROUND(CASE WHEN shots = 0 THEN 0 ELSE hits/shots::DECIMAL END, 2) AS "pk"
-                        FROM (
-                            SELECT weapon, SUM(CASE WHEN event='S_EVENT_SHOT' THEN 1 ELSE 0 END) AS "shots", 
-                                   SUM(CASE WHEN event='S_EVENT_HIT' THEN 1 ELSE 0 END) AS "hits" 
-                            FROM missionstats 
-                            WHERE init_id = (SELECT ucid FROM players WHERE name = %s AND last_seen = %s)
-                            AND weapon IS NOT NULL
-                            GROUP BY weapon
-                        ) x
-                        ORDER BY 4 DESC
-                    """, (nick, datetime.fromisoformat(date))).fetchall()])
-                }
-
-    def stats(self, nick: str = Form(default=None), date: str = Form(default=None)):
-        with self.pool.connection() as conn:
-            with closing(conn.cursor(row_factory=dict_row)) as cursor:
-                ucid = cursor.execute("SELECT ucid FROM players WHERE name = %s AND last_seen = %s",
-                                      (nick, datetime.fromisoformat(date))).fetchone()['ucid']
-                data = cursor.execute("""
-                    SELECT overall.deaths, overall.aakills, 
-                           ROUND(CASE WHEN overall.deaths = 0 
-                                      THEN overall.aakills 
-                                      ELSE overall.aakills/overall.deaths::DECIMAL END, 2) AS "aakdr", 
-                           lastsession.kills AS "lastSessionKills", lastsession.deaths AS "lastSessionDeaths"
-                    FROM (
-                        SELECT SUM(deaths) AS "deaths", SUM(pvp) AS "aakills"
-                        FROM statistics
-                        WHERE player_ucid = %s
-                    ) overall, (
-                        SELECT SUM(pvp) AS "kills", SUM(deaths) AS "deaths"
-                        FROM statistics
-                        WHERE (player_ucid, mission_id) = (
-                            SELECT player_ucid, max(mission_id) FROM statistics WHERE player_ucid = %s GROUP BY 1
-                        )
-                    ) lastsession
-                """, (ucid, ucid)).fetchone()
-                data['killsByModule'] = cursor.execute("""
-                    SELECT slot AS "module", SUM(pvp) AS "kills" 
-                    FROM statistics 
-                    WHERE player_ucid = %s 
-                    GROUP BY 1 HAVING SUM(pvp) > 1 
-                    ORDER BY 2 DESC
-                """, (ucid, )).fetchall()
-                data['kdrByModule'] = cursor.execute("""
-                    SELECT slot AS "module", 
-                           CASE WHEN SUM(deaths) = 0 THEN SUM(pvp) ELSE SUM(pvp) / SUM(deaths::DECIMAL) END AS "kdr" 
-                    FROM statistics 
-                    WHERE player_ucid = %s 
-                    GROUP BY 1 HAVING SUM(pvp) > 1 
-                    ORDER BY 2 DESC
-                """, (ucid, )).fetchall()
-                return data
+    def stats(self, request: Request, nick: str = Form(default=None), date: str = Form(default=None)):
+        key = ('stats', nick, date)
+        entry = self.cache.get(key)
+        if not entry:
+            data = self.get_stats(nick, datetime.fromisoformat(date))
+            if not data:
+                return Response(status_code=404)
+            entry = self.cache.put(key, data)
+        return self.cache.response(request, entry)
 
 
 async def setup(bot: DCSServerBot):
     global app
 
-    if not os.path.exists('config/plugins/restapi.yaml'):
-        bot.log.info('No restapi.yaml found, copying the sample.')
-        shutil.copyfile('config/samples/restapi.yaml', 'config/plugins/restapi.yaml')
+    if not os.path.exists('config/restapi.json'):
+        bot.log.info('No restapi.json found, copying the sample.')
+        shutil.copyfile('config/samples/restapi.json', 'config/restapi.json')
     app = FastAPI()
     restapi = RestAPI(bot)
     await bot.add_cog(restapi)
@@ -0,0 +1 @@
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_players_name_trgm ON players USING gin (name gin_trgm_ops);
@@ -5,6 +5,7 @@ import json
 import os
 import platform
 import random
+from contextlib import suppress
 from copy import deepcopy
 from discord import Interaction
 from discord.ui import View, Select, Button
@@ -13,15 +14,27 @@ from datetime import datetime, timedelta
 from discord.ext import tasks, commands
 from typing import Type, Optional, List, TYPE_CHECKING, cast
 from .listener import SchedulerListener
+from .orchestrator import StartupOrchestrator
+from .schedule import is_in_timeframe, next_transition
 
 if TYPE_CHECKING:
     from core import DCSServerBot, TEventListener
 
 
+# seconds to wait for extensions like SRS to come up before DCS is launched
+STANDALONE_TIMEOUT = 30
+
+
 class Scheduler(Plugin):
 
     def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
         super().__init__(bot, eventlistener)
+        self.wakeup = asyncio.Event()
+        self.launches: dict[str, asyncio.Task] = dict()
+        # (server name, local time) => minute of the last restart that was triggered by it
+        self.fired: dict[tuple[str, str], datetime] = dict()
+        startup = self.get_startup_config()
+        self.orchestrator = StartupOrchestrator(startup.get('max_parallel', 0), startup.get('stagger', 0))
         self.check_state.start()
         self.lastrun = None
         self.schedule_extensions.start()
@@ -123,6 +136,13 @@ class Scheduler(Plugin):
                 json.dump(new, file, indent=2)
                 self.log.info('  => config/scheduler.json migrated to new format, please verify!')
 
+    def get_startup_config(self) -> dict:
+        # the startup settings are node-wide and only read from the default section
+        for element in self.locals.get('configs', []):
+            if not element.get('installation'):
+                return element.get('startup', {})
+        return {}
+
     def get_config(self, server: Server, *, use_cache: Optional[bool] = True) -> Optional[dict]:
         if server.name not in self._config or not use_cache:
             default, specific = self.get_base_config(server)
@@ -157,15 +177,15 @@ class Scheduler(Plugin):
             for period, daystate in config['schedule'].items():  # type: str, dict
                 state = daystate[weekday]
                 # check, if the server should be running
-                if utils.is_in_timeframe(now, period) and state.upper() == 'Y' and server.status == Status.SHUTDOWN:
+                if is_in_timeframe(now, period) and state.upper() == 'Y' and server.status == Status.SHUTDOWN:
                     return Status.RUNNING
-                elif utils.is_in_timeframe(now, period) and state.upper() == 'P' and \
+                elif is_in_timeframe(now, period) and state.upper() == 'P' and \
                         server.status in [Status.RUNNING, Status.PAUSED, Status.STOPPED] and not server.is_populated():
                     return Status.SHUTDOWN
-                elif utils.is_in_timeframe(now + timedelta(seconds=restart_in), period) and state.upper() == 'N' and \
+                elif is_in_timeframe(now + timedelta(seconds=restart_in), period) and state.upper() == 'N' and \
                         server.status == Status.RUNNING:
                     return Status.SHUTDOWN
-                elif utils.is_in_timeframe(now, period) and state.upper() == 'N' and \
+                elif is_in_timeframe(now, period) and state.upper() == 'N' and \
                         server.status in [Status.PAUSED, Status.STOPPED]:
                     return Status.SHUTDOWN
         return server.status
@@ -188,23 +208,41 @@ class Scheduler(Plugin):
                 if ext.is_installed():
                     server.extensions[extension] = ext
 
+    async def start_standalone_extensions(self, server: Server):
+        extensions = [x for x in server.extensions.values() if x.standalone and not x.is_running()]
+        for ext in extensions:
+            await ext.startup()
+        # wait for them to be ready before DCS connects to them
+        for _ in range(STANDALONE_TIMEOUT):
+            if all(x.is_running() for x in extensions):
+                return
+            await asyncio.sleep(1)
+        self.log.warning(f"  => {', '.join(x.name for x in extensions if not x.is_running())} not running for "
+                         f"DCS server \"{server.name}\", starting DCS anyway.")
+
     async def launch_dcs(self, server: Server, config: dict, member: Optional[discord.Member] = None):
-        await self.init_extensions(server, config)
-        for ext in sorted(server.extensions):
-            await server.extensions[ext].prepare()
-            await server.extensions[ext].beforeMissionLoad()
-        # change the weather in the mission if provided
-        if 'settings' in config:
-            await self.change_mizfile(server, config)
-        self.log.info(f"  => DCS server \"{server.name}\" starting up ...")
-        await server.startup()
+        timer = utils.PhaseTimer()
+        async with self.orchestrator.launch(timer):
+            with timer.measure('prepare'):
+                await self.init_extensions(server, config)
+                for ext in sorted(server.extensions):
+                    await server.extensions[ext].prepare()
+                    await server.extensions[ext].beforeMissionLoad()
+                # change the weather in the mission if provided
+                if 'settings' in config:
+                    await self.change_mizfile(server, config)
+            with timer.measure('extensions'):
+                await self.start_standalone_extensions(server)
+            self.log.info(f"  => DCS server \"{server.name}\" starting up ...")
+            with timer.measure('startup'):
+                await server.startup()
         if not member:
             self.log.info(f"  => DCS server \"{server.name}\" started by "
-                          f"{self.plugin_name.title()}.")
+                          f"{self.plugin_name.title()} ({timer}).")
             await self.bot.audit(f"{self.plugin_name.title()} started DCS server", server=server)
         else:
             self.log.info(f"  => DCS server \"{server.name}\" started by "
-                          f"{member.display_name}.")
+                          f"{member.display_name} ({timer}).")
             await self.bot.audit(f"started DCS server", user=member, server=server)
 
     @staticmethod
@@ -326,7 +364,7 @@ class Scheduler(Plugin):
             _presets = config['settings']
             if isinstance(_presets, dict):
                 for key, value in _presets.items():
-                    if utils.is_in_timeframe(now, key):
+                    if is_in_timeframe(now, key):
                         _presets = presets = value
                         break
                 if not presets:
@@ -437,8 +475,13 @@ class Scheduler(Plugin):
             for warn_time in sorted(warn_times):
                 if 'local_times' in rconf:
                     restart_time = datetime.now() + timedelta(seconds=warn_time)
+                    minute = restart_time.replace(second=0, microsecond=0)
                     for t in rconf['local_times']:
-                        if utils.is_in_timeframe(restart_time, t):
+                        if is_in_timeframe(restart_time, t):
+                            # the restart might be done within the same minute, don't trigger it twice
+                            if self.fired.get((server.name, t)) == minute:
+                                continue
+                            self.fired[(server.name, t)] = minute
                             asyncio.create_task(self.restart_mission(server, config, rconf, warn_time))
                             return
                 elif 'mission_time' in rconf:
@@ -463,8 +506,39 @@ class Scheduler(Plugin):
         if server.process:
             server.process.cpu_affinity(config['affinity'])
 
-    @tasks.loop(minutes=1.0)
+    def wake_up(self):
+        # re-evaluate all servers now, for instance because their state or their config has changed
+        self.wakeup.set()
+
+    def get_next_check(self, server: Server, config: dict) -> Optional[datetime]:
+        # the next point in time at which the result of check_server_state() or check_mission_state() can change
+        now = datetime.now()
+        warn_times = [0] + self.get_warn_times(config)
+        checks = []
+        if 'schedule' in config:
+            checks.append(next_transition(now, config['schedule'].keys(), warn_times))
+        if 'restart' not in config or server.status not in [Status.RUNNING, Status.PAUSED]:
+            return min(checks, default=None)
+        for rconf in config['restart'] if isinstance(config['restart'], list) else [config['restart']]:
+            if 'local_times' in rconf:
+                checks.append(next_transition(now, rconf['local_times'], warn_times))
+            elif 'mission_time' in rconf and server.status == Status.RUNNING:
+                # the mission time only advances while the mission is running
+                targets = [rconf['mission_time'] * 60 - x for x in warn_times]
+                if 'max_mission_time' in rconf:
+                    targets.append(rconf['max_mission_time'] * 60 - max(warn_times))
+                for target in targets:
+                    remaining = target - server.current_mission.mission_time
+                    if remaining > 0:
+                        checks.append(now + timedelta(seconds=remaining))
+        return min(checks, default=None)
+
+    @tasks.loop()
     async def check_state(self):
+        # events that happen while the servers are checked trigger another run
+        self.wakeup.clear()
+        # extensions and affinities are checked at least once a minute
+        next_check = datetime.now() + timedelta(minutes=1)
         # check all servers
         for server_name, server in self.bot.servers.items():
             # only care about servers that are not in the startup phase
@@ -478,7 +552,9 @@ class Scheduler(Plugin):
                         await self.check_affinity(server, config)
                     target_state = await self.check_server_state(server, config)
                     if target_state == Status.RUNNING and server.status == Status.SHUTDOWN:
-                        asyncio.create_task(self.launch_dcs(server, config))
+                        # the server is still in state SHUTDOWN while the extensions are prepared
+                        if server.name not in self.launches or self.launches[server.name].done():
+                            self.launches[server.name] = asyncio.create_task(self.launch_dcs(server, config))
                     elif target_state == Status.SHUTDOWN and server.status in [
                         Status.STOPPED, Status.RUNNING, Status.PAUSED
                     ]:
@@ -492,8 +568,12 @@ class Scheduler(Plugin):
                         for ext in server.extensions.values():
                             if not ext.is_running():
                                 await ext.startup()
+                    next_check = min(next_check, self.get_next_check(server, config) or next_check)
                 except Exception as ex:
                     self.log.warning("Exception in check_state(): " + str(ex))
+        # sleep until the next transition of any server or until something happens
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.wakeup.wait(), timeout=max((next_check - datetime.now()).total_seconds(), 0))
 
     @check_state.before_loop
     async def before_check(self):
@@ -688,6 +768,7 @@ class Scheduler(Plugin):
         if server:
             if server.maintenance:
                 server.maintenance = False
+                self.wake_up()
                 await ctx.send(f"Maintenance mode cleared for server {server.display_name}.\n"
                                f"The {self.plugin_name.title()} will take over the state handling now.")
                 await self.bot.audit("cleared maintenance flag", user=ctx.message.author, server=server)
@@ -97,11 +97,14 @@ class SchedulerListener(EventListener):
         for ext in server.extensions.values():
             if not ext.is_running():
                 await ext.startup()
+        self.plugin.wake_up()
 
     @event(name="onPlayerStart")
     async def onPlayerStart(self, server: Server, data: dict) -> None:
         if data['id'] == 1 or 'ucid' not in data:
             return
+        # populated servers use the warn times
+        self.plugin.wake_up()
         if server.restart_pending:
             player: Player = server.get_player(id=data['id'])
             player.sendChatMessage("*** Mission is about to be restarted soon! ***")
@@ -114,13 +117,20 @@ class SchedulerListener(EventListener):
 
     @event(name="onSimulationPause")
     async def onSimulationPause(self, server: Server, data: dict) -> None:
+        self.plugin.wake_up()
         if server.on_empty:
             self.bot.loop.call_soon(asyncio.create_task, self.process(server, server.on_empty.copy()))
             server.on_empty.clear()
 
+    @event(name="onSimulationResume")
+    async def onSimulationResume(self, server: Server, data: dict) -> None:
+        # the mission time advances again
+        self.plugin.wake_up()
+
     @event(name="onGameEvent")
     async def onGameEvent(self, server: Server, data: dict) -> None:
         if data['eventName'] == 'disconnect':
+            self.plugin.wake_up()
             if not server.is_populated() and server.on_empty:
                 self.bot.loop.call_soon(asyncio.create_task, self.process(server, server.on_empty.copy()))
                 server.on_empty.clear()
@@ -132,6 +142,7 @@ class SchedulerListener(EventListener):
 
     @event(name="onSimulationStart")
     async def onSimulationStart(self, server: Server, data: dict) -> None:
+        self.plugin.wake_up()
         config = self.plugin.get_config(server)
         if config and 'onMissionStart' in config:
             await self.run(server, config['onMissionStart'])
@@ -146,6 +157,7 @@ class SchedulerListener(EventListener):
         for ext in server.extensions.values():
             if ext.is_running():
                 await ext.onMissionLoadEnd(data)
+        self.plugin.wake_up()
 
     @event(name="onMissionEnd")
     async def onMissionEnd(self, server: Server, data: dict) -> None:
@@ -155,6 +167,7 @@ class SchedulerListener(EventListener):
 
     @event(name="onSimulationStop")
     async def onSimulationStop(self, server: Server, data: dict) -> None:
+        self.plugin.wake_up()
         for ext in server.extensions.values():
             if ext.is_running():
                 await ext.shutdown(data)
@@ -167,6 +180,7 @@ class SchedulerListener(EventListener):
 
     @event(name="onShutdown")
     async def onShutdown(self, server: Server, data: dict) -> None:
+        self.plugin.wake_up()
         config = self.plugin.get_config(server)
         if config and 'onShutdown' in config:
             await self.run(server, config['onShutdown'])
@@ -212,6 +226,7 @@ class SchedulerListener(EventListener):
     async def clear(self, server: Server, player: Player, params: list[str]):
         if server.maintenance:
             server.maintenance = False
+            self.plugin.wake_up()
             player.sendChatMessage('Maintenance mode disabled/cleared.')
             await self.bot.audit("cleared maintenance flag", user=player.member, server=server)
         else:
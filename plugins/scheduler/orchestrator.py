@@ -0,0 +1,41 @@
+from __future__ import annotations
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from core.utils import PhaseTimer
+from typing import Optional
+
+
+class StartupOrchestrator:
+    """
+    Controls the launches of DCS servers on this node.
+    At most max_parallel servers are in their startup phase at the same time (0 = no limit) and two launches are at
+    least stagger seconds apart, so that a bot start with many servers does not saturate disk and CPU.
+    """
+
+    def __init__(self, max_parallel: int = 0, stagger: int = 0):
+        self.semaphore: Optional[asyncio.Semaphore] = asyncio.Semaphore(max_parallel) if max_parallel > 0 else None
+        self.stagger = stagger
+        self.lock = asyncio.Lock()
+        self.last_launch = 0.0
+
+    @asynccontextmanager
+    async def launch(self, timer: PhaseTimer):
+        with timer.measure('queued'):
+            if self.semaphore:
+                await self.semaphore.acquire()
+            try:
+                async with self.lock:
+                    delay = self.last_launch + self.stagger - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    self.last_launch = time.monotonic()
+            except BaseException:
+                if self.semaphore:
+                    self.semaphore.release()
+                raise
+        try:
+            yield
+        finally:
+            if self.semaphore:
+                self.semaphore.release()
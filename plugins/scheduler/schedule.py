@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable
+
+MINUTES_PER_DAY = 1440
+
+
+class TimeFrame:
+    """
+    A parsed time frame like "08:00-20:00", "18-24" or "03:00", see utils.is_in_timeframe().
+    Start and end are stored in minutes after midnight. If the end is before the start, it belongs to the next day,
+    but only the part until midnight matches, as the time to check is always taken from the first day.
+    """
+
+    def __init__(self, timeframe: str):
+        pos = timeframe.find('-')
+        if pos != -1:
+            self.start = self.parse(timeframe[:pos])
+            self.end = self.parse(timeframe[pos+1:])
+            if self.end <= self.start:
+                self.end += MINUTES_PER_DAY
+        else:
+            self.start = self.end = self.parse(timeframe)
+
+    @staticmethod
+    def parse(time_str: str) -> int:
+        hours, minutes = time_str.split(':') if ':' in time_str else (time_str, '0')
+        hours, minutes = int(hours), int(minutes)
+        if not 0 <= hours <= 24 or not 0 <= minutes <= 59:
+            raise ValueError(f'Invalid time "{time_str}"')
+        return (hours % 24) * 60 + minutes
+
+    def contains(self, time: datetime) -> bool:
+        return self.start <= time.hour * 60 + time.minute <= self.end
+
+    def boundaries(self) -> list[int]:
+        # minutes of the day at which contains() changes, the end of frames that wrap is covered by midnight
+        if self.end + 1 < MINUTES_PER_DAY:
+            return [self.start, self.end + 1]
+        return [self.start]
+
+
+@lru_cache(maxsize=256)
+def get_timeframe(timeframe: str) -> TimeFrame:
+    return TimeFrame(timeframe)
+
+
+def is_in_timeframe(time: datetime, timeframe: str) -> bool:
+    return get_timeframe(timeframe).contains(time)
+
+
+def next_transition(now: datetime, timeframes: Iterable[str], offsets: Iterable[int] = (0, )) -> datetime:
+    """
+    Returns the next point in time after now, at which one of the time frames starts or ends, when checked with any
+    of the offsets (in seconds) added. Midnight always counts, as the day of a schedule changes there.
+    """
+    minutes = {0}
+    for timeframe in timeframes:
+        minutes.update(get_timeframe(timeframe).boundaries())
+    result = None
+    for offset in offsets:
+        time = now + timedelta(seconds=offset)
+        current = time.hour * 60 + time.minute
+        delta = min((minute - current - 1) % MINUTES_PER_DAY + 1 for minute in minutes)
+        transition = time.replace(second=0, microsecond=0) + timedelta(minutes=delta, seconds=-offset)
+        if not result or transition < result:
+            result = transition
+    return result
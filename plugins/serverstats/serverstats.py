@@ -1,11 +1,12 @@
-import numpy as np
-import pandas as pd
 import psycopg2
 from contextlib import closing
-from core import const, report
-from matplotlib.ticker import FuncFormatter
+from core import const, report, utils
 from typing import Optional
 
+np = utils.lazy_import('numpy')
+pd = utils.lazy_import('pandas')
+ticker = utils.lazy_import('matplotlib.ticker')
+
 
 class ServerUsage(report.EmbedElement):
 
@@ -174,7 +175,7 @@ class UsersPerDayTime(report.GraphElement):
                     values[int(row['hour'])][int(row['weekday']) - 1] = row['players']
                 self.axes.imshow(values, cmap='cividis', aspect='auto')
                 self.axes.set_title('Users per Day/Time (UTC)', color='white', fontsize=25)
-                self.axes.xaxis.set_major_formatter(FuncFormatter(lambda x, pos: const.WEEKDAYS[int(np.clip(x, 0, 6))]))
+                self.axes.xaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: const.WEEKDAYS[int(np.clip(x, 0, 6))]))
         except (Exception, psycopg2.DatabaseError) as error:
             self.log.exception(error)
         finally:
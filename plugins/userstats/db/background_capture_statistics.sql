@@ -0,0 +1,3 @@
+ALTER TABLE statistics ADD COLUMN IF NOT EXISTS capture_xid BIGINT;
+DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'tgr_statistics_capture_xid') THEN CREATE TRIGGER tgr_statistics_capture_xid BEFORE INSERT OR UPDATE ON statistics FOR EACH ROW EXECUTE PROCEDURE capture_xid(); END IF; END $$;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_statistics_capture_xid ON statistics (capture_xid);
@@ -1,15 +1,19 @@
+from __future__ import annotations
 import discord
-import matplotlib.pyplot as plt
-import numpy as np
 import psycopg2
 import psycopg2.extras
 from contextlib import closing
 from core import report, utils
-from matplotlib.axes import Axes
-from matplotlib.patches import ConnectionPatch
-from typing import Union
+from typing import Union, TYPE_CHECKING
 from .filter import StatisticsFilter
 
+np = utils.lazy_import('numpy')
+plt = utils.lazy_import('matplotlib.pyplot')
+patches = utils.lazy_import('matplotlib.patches')
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
 
 class PlaytimesPerPlane(report.GraphElement):
 
@@ -417,8 +421,8 @@ class KDRatio(report.MultiGraphElement):
             # draw top connecting line
             x = r * np.cos(np.pi / 180 * theta2) + center[0]
             y = r * np.sin(np.pi / 180 * theta2) + center[1]
-            con = ConnectionPatch(xyA=(-0.2 / 2, bar_height), coordsA=self.axes[2].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(-0.2 / 2, bar_height), coordsA=self.axes[2].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
@@ -427,8 +431,8 @@ class KDRatio(report.MultiGraphElement):
             # draw bottom connecting line
             x = r * np.cos(np.pi / 180 * theta1) + center[0]
             y = r * np.sin(np.pi / 180 * theta1) + center[1]
-            con = ConnectionPatch(xyA=(-0.2 / 2, 0), coordsA=self.axes[2].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(-0.2 / 2, 0), coordsA=self.axes[2].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
@@ -450,8 +454,8 @@ class KDRatio(report.MultiGraphElement):
             # draw top connecting line
             x = r * np.cos(np.pi / 180 * theta2) + center[0]
             y = r * np.sin(np.pi / 180 * theta2) + center[1]
-            con = ConnectionPatch(xyA=(0.2 / 2, 0), coordsA=self.axes[0].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(0.2 / 2, 0), coordsA=self.axes[0].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
@@ -460,8 +464,8 @@ class KDRatio(report.MultiGraphElement):
             # draw bottom connecting line
             x = r * np.cos(np.pi / 180 * theta1) + center[0]
             y = r * np.sin(np.pi / 180 * theta1) + center[1]
-            con = ConnectionPatch(xyA=(0.2 / 2, bar_height), coordsA=self.axes[0].transData,
-                                  xyB=(x, y), coordsB=self.axes[1].transData)
+            con = patches.ConnectionPatch(xyA=(0.2 / 2, bar_height), coordsA=self.axes[0].transData,
+                                          xyB=(x, y), coordsB=self.axes[1].transData)
             con.set_color('lightgray')
             con.set_linewidth(2)
             con.set_linestyle('dashed')
@@ -15,13 +15,13 @@ import time
 import traceback
 import zipfile
 
-from core import utils, Server, DCSServerBot, Status, ThreadedConnectionPool
+from core import utils, Server, DCSServerBot, Status, ThreadedConnectionPool, init_migrations, run_migration, \
+    start_background_migrations
 from contextlib import closing
 from discord import SelectOption
 from discord.ext import commands
 from install import Install
 from logging.handlers import RotatingFileHandler
-from matplotlib import font_manager
 from pathlib import Path
 from typing import Optional, TYPE_CHECKING
 from version import __version__
@@ -54,6 +54,8 @@ UPDATES_SQL = 'sql/update_{}.sql'
 class Main:
 
     def __init__(self):
+        # startup timings, reported by the bot when it's ready
+        self.timer = utils.PhaseTimer()
         self.config = self.read_config()
         self.log = self.init_logger()
         self.log.info(f'DCSServerBot v{BOT_VERSION}.{SUB_VERSION} starting up ...')
@@ -63,10 +65,12 @@ class Main:
             exit(-1)
         self.db_version = None
         self.install_plugins()
-        self.pool = self.init_db()
+        with self.timer.measure('database'):
+            self.pool = self.init_db()
         if self.config.getboolean('BOT', 'DESANITIZE'):
             utils.desanitize(self)
-        self.install_hooks()
+        with self.timer.measure('hooks'):
+            self.install_hooks()
         self.bot: DCSServerBot = self.init_bot()
         self.add_commands()
 
@@ -120,10 +124,7 @@ class Main:
                     # initial setup
                     if len(tables) == 0:
                         self.log.info('Initializing Database ...')
-                        with open(TABLES_SQL) as tables_sql:
-                            for query in tables_sql.readlines():
-                                self.log.debug(query.rstrip())
-                                cursor.execute(query.rstrip())
+                        run_migration(cursor, TABLES_SQL)
                         self.log.info('Database initialized.')
                     else:
                         # version table missing
@@ -132,14 +133,15 @@ class Main:
                                            "INSERT INTO version (version) VALUES ('v1.4');")
                         cursor.execute('SELECT version FROM version')
                         self.db_version = cursor.fetchone()[0]
+                        # the version decides which update scripts are pending, applied ones are not read again
                         while os.path.exists(UPDATES_SQL.format(self.db_version)):
                             self.log.info('Updating Database {} ...'.format(self.db_version))
-                            with open(UPDATES_SQL.format(self.db_version)) as tables_sql:
-                                for query in tables_sql.readlines():
-                                    self.log.debug(query.rstrip())
-                                    cursor.execute(query.rstrip())
+                            init_migrations(cursor)
+                            # every update runs in its own transaction
+                            run_migration(cursor, UPDATES_SQL.format(self.db_version))
                             cursor.execute('SELECT version FROM version')
                             self.db_version = cursor.fetchone()[0]
+                            conn.commit()
                             self.log.info(f"Database updated to {self.db_version}.")
                 else:
                     cursor.execute("SELECT tablename FROM pg_catalog.pg_tables WHERE tablename = 'servers'")
@@ -153,6 +155,9 @@ class Main:
             raise error
         finally:
             db_pool.putconn(conn)
+        if self.config.getboolean('BOT', 'MASTER') is True:
+            # long-running migrations like index builds don't block the startup
+            start_background_migrations(db_pool, self.log, os.path.dirname(TABLES_SQL))
         # Make sure we only get back floats, not Decimal
         dec2float = psycopg2.extensions.new_type(
             psycopg2.extensions.DECIMAL.values,
@@ -167,41 +172,57 @@ class Main:
             if installation not in self.config:
                 continue
             self.log.info(f'  => {installation}')
-            dcs_path = os.path.expandvars(self.config[installation]['DCS_HOME'] + '\\Scripts')
-            if not os.path.exists(dcs_path):
-                os.mkdir(dcs_path)
-            ignore = None
-            if os.path.exists(dcs_path + r'\net\DCSServerBot'):
-                self.log.debug('  - Updating Hooks ...')
+            dcs_home = os.path.expandvars(self.config[installation]['DCS_HOME'])
+            dcs_path = dcs_home + '\\Scripts'
+            if not utils.read_hooks_manifest(dcs_home) and os.path.exists(dcs_path + r'\net\DCSServerBot'):
+                # installed by an older version, start from scratch once
+                self.log.debug('  - Removing old Hooks ...')
                 shutil.rmtree(dcs_path + r'\net\DCSServerBot')
-                ignore = shutil.ignore_patterns('DCSServerBotConfig.lua.tmpl')
-            else:
-                self.log.debug('  - Installing Hooks ...')
-            shutil.copytree('./Scripts', dcs_path, dirs_exist_ok=True, ignore=ignore)
+            changed, removed = utils.install_luas('./Scripts', dcs_home, 'Scripts',
+                                                  ignore=['DCSServerBotConfig.lua.tmpl'])
             try:
+                config = []
                 with open(r'Scripts/net/DCSServerBot/DCSServerBotConfig.lua.tmpl', 'r') as template:
-                    with open(dcs_path + r'\net\DCSServerBot\DCSServerBotConfig.lua', 'w') as outfile:
-                        for line in template.readlines():
-                            s = line.find('{')
-                            e = line.find('}')
-                            if s != -1 and e != -1 and (e - s) > 1:
-                                param = line[s + 1:e].split('.')
-                                if len(param) == 2:
-                                    if param[0] == 'BOT' and param[1] == 'HOST' and self.config[param[0]][param[1]] == '0.0.0.0':
-                                        line = line.replace('{' + '.'.join(param) + '}', '127.0.0.1')
-                                    else:
-                                        line = line.replace('{' + '.'.join(param) + '}', self.config[param[0]][param[1]])
-                                elif len(param) == 1:
-                                    line = line.replace('{' + '.'.join(param) + '}', self.config[installation][param[0]])
-                            outfile.write(line)
+                    for line in template.readlines():
+                        s = line.find('{')
+                        e = line.find('}')
+                        if s != -1 and e != -1 and (e - s) > 1:
+                            param = line[s + 1:e].split('.')
+                            if len(param) == 2:
+                                if param[0] == 'BOT' and param[1] == 'HOST' and self.config[param[0]][param[1]] == '0.0.0.0':
+                                    line = line.replace('{' + '.'.join(param) + '}', '127.0.0.1')
+                                else:
+                                    line = line.replace('{' + '.'.join(param) + '}', self.config[param[0]][param[1]])
+                            elif len(param) == 1:
+                                line = line.replace('{' + '.'.join(param) + '}', self.config[installation][param[0]])
+                        config.append(line)
             except KeyError as k:
                 self.log.error(
                     f'! Your dcsserverbot.ini contains errors. You must set a value for {k}. See README for help.')
                 raise k
+            # only write the config, if it has changed
+            filename = dcs_path + r'\net\DCSServerBot\DCSServerBotConfig.lua'
+            if os.path.exists(filename):
+                with open(filename, 'r') as infile:
+                    dirty = infile.read() != ''.join(config)
+            else:
+                dirty = True
+            if dirty:
+                with open(filename, 'w') as outfile:
+                    outfile.writelines(config)
+                changed.append('net/DCSServerBot/DCSServerBotConfig.lua')
+            for file in changed:
+                self.log.debug(f'  - {file} updated.')
+            for file in removed:
+                self.log.debug(f'  - {file} removed.')
+            if changed or removed:
+                self.log.info(f'  - {len(changed)} files updated, {len(removed)} removed.')
             self.log.debug('  - Hooks installed into {}.'.format(installation))
 
     async def install_fonts(self):
         if 'CJK_FONT' in self.config['REPORTS']:
+            from matplotlib import font_manager
+
             if not os.path.exists('fonts'):
                 os.makedirs('fonts')
 
@@ -252,12 +273,14 @@ class Main:
                             log=self.log,
                             config=self.config,
                             pool=self.pool,
+                            timer=self.timer,
                             help_command=None,
                             heartbeat_timeout=120,
                             assume_unsync_clock=True)
 
     async def run(self):
-        await self.install_fonts()
+        with self.timer.measure('fonts'):
+            await self.install_fonts()
         self.log.info('- Starting {}-Node on {}'.format('Master' if self.config.getboolean(
             'BOT', 'MASTER') is True else 'Agent', platform.node()))
         async with self.bot:
@@ -0,0 +1,2 @@
+CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, checksum TEXT NOT NULL, applied TIMESTAMP NOT NULL DEFAULT NOW());
+UPDATE version SET version='v1.7';
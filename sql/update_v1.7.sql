@@ -0,0 +1,2 @@
+CREATE OR REPLACE FUNCTION capture_xid() RETURNS trigger AS $$ BEGIN NEW.capture_xid := txid_current(); RETURN NEW; END; $$ LANGUAGE 'plpgsql';
+UPDATE version SET version='v1.8';